@@ -11,17 +11,183 @@
 # functions that governise the alert system of the tank operations
 
 from pymata4 import pymata4
+import json
+import queue
+import socket
+import threading
 import time
 import random
+from collections import namedtuple
+from tank_states import state_alerts
+
+
+# an alert raised (active True) or cleared (active False)
+#     kind - 'enable', 'rov' (rate of volume change), 'state' (near empty or empty), 'state persistent' (empty,
+#            near empty, near full or overfull for 5 s) or 'overfull' (level out of measurement range)
+#     message - warning shown to the user
+#     timestamp - time the alert was published, s
+#     source - tank the alert was raised for, None for the single tank of the polling loop
+AlertEvent = namedtuple('AlertEvent', ['kind', 'active', 'message', 'timestamp', 'source'], defaults=(None,))
+
+# socket address alerts are also sent to as JSON datagrams, e.g. ('127.0.0.1', 9300); None for no socket
+alertSocketAddress = None
+
+
+# AlertEngine decouples raising an alert from acting on it. The polling loop publishes alert events, each with one
+# non-blocking queue put, and a worker thread passes them on to the sinks (alert pins, console, alert log, socket).
+# The worker deduplicates the events: an alert that is raised or cleared is passed on at once, an alert with a
+# warning that stays raised is passed on again at most once per reminderInterval, and other repeats are dropped.
+# Every alert starts cleared, as alert_setup turns the alert pins off. So a fault that raises alerts every cycle
+# costs the loop a queue put per alert, whatever the sinks do.
+# Inputs:
+#     sinks - objects with a handle(event) method, called on the worker thread
+#     reminderInterval - least time between two passes of an alert that stays raised, s
+#     maxQueue - events queued before new ones are dropped
+#     source - tank the engine's alerts are raised for, see AlertEvent
+class AlertEngine:
+
+    def __init__(self, sinks, reminderInterval=5, maxQueue=1000, source=None):
+        self.sinks = sinks
+        self.source = source
+        self.reminderInterval = reminderInterval
+        self.events = queue.Queue(maxQueue)
+        self.lastPassed = {}  # kind: (active, time) of the last event passed on
+        self.counts = {'published': 0, 'passed': 0, 'suppressed': 0, 'dropped': 0, 'sink errors': 0}
+        self.worker = threading.Thread(target=self.run, name='alerts', daemon=True)
+        self.worker.start()
+
+    # Publishes an alert event without blocking
+    # Inputs:
+    #     kind, active, message - see AlertEvent (the message of a cleared alert is dropped)
+    # Return:
+    #     None
+    def publish(self, kind, active, message=''):
+        self.counts['published'] += 1
+        try:
+            self.events.put_nowait(AlertEvent(kind, active, message if active else '', time.time(), self.source))
+        except queue.Full:
+            self.counts['dropped'] += 1
+
+    # Worker thread: passes the events on to the sinks until stopped
+    # no input parameters and no return value
+    def run(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            if isinstance(event, threading.Event):
+                # flush marker, every event before it has been handled
+                event.set()
+                continue
+            lastActive, lastTime = self.lastPassed.get(event.kind, (False, None))
+            if event.active == lastActive and (not event.active or not event.message or
+                                               event.timestamp - lastTime < self.reminderInterval):
+                self.counts['suppressed'] += 1
+                continue
+            self.lastPassed[event.kind] = (event.active, event.timestamp)
+            self.counts['passed'] += 1
+            for sink in self.sinks:
+                try:
+                    sink.handle(event)
+                except Exception:
+                    # a failing sink must not stop the alerts reaching the others
+                    self.counts['sink errors'] += 1
+
+    # Waits until the events published so far have been handled
+    # Inputs:
+    #     timeout - longest time to wait, s
+    # Return:
+    #     True if they have been handled
+    def flush(self, timeout=1):
+        marker = threading.Event()
+        try:
+            self.events.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.wait(timeout)
+
+    # Handles the events published so far and stops the worker and the sinks
+    # no input parameters and no return value
+    def stop(self):
+        self.flush()
+        self.events.put(None)
+        self.worker.join(timeout=1)
+        for sink in self.sinks:
+            close = getattr(sink, 'close', None)
+            if close is not None:
+                close()
+
+
+# PinAlertSink drives an LED/buzzer pin for every kind of alert that has one
+# Inputs:
+#     board - the arduino board used
+#     pins - dictionary of {alert kind: digital pin}
+class PinAlertSink:
+
+    def __init__(self, board, pins):
+        self.board = board
+        self.pins = pins
+
+    def handle(self, event):
+        pin = self.pins.get(event.kind)
+        if pin is not None:
+            self.board.digital_write(pin, 1 if event.active else 0)
+
+
+# ConsoleAlertSink prints the warning of every raised alert
+class ConsoleAlertSink:
+
+    def handle(self, event):
+        if event.active and event.message:
+            # one write, so the line is not split by the polling loop printing at the same time
+            source = '' if event.source is None else f'{event.source}: '
+            print(f"|| WARNING: {source}{event.message} ||\n", end='')
+
+
+# LogAlertSink appends every alert raised or cleared to a text log that persists across sessions. Each alert is one
+# line, labelled with its tank when it has one, so the engines of several tanks can share the log.
+# Inputs:
+#     path - path of the alert log
+class LogAlertSink:
+
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def handle(self, event):
+        eventTime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event.timestamp))
+        kind = event.kind if event.source is None else f'{event.source} {event.kind}'
+        self.file.write(f"{eventTime}\t{kind}\t{'raised' if event.active else 'cleared'}\t{event.message}\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# SocketAlertSink sends every alert raised or cleared as a JSON datagram to a local socket, e.g. for a dashboard
+# Inputs:
+#     address - (host, port) the datagrams are sent to
+class SocketAlertSink:
+
+    def __init__(self, address):
+        self.address = address
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def handle(self, event):
+        self.socket.sendto(json.dumps(event._asdict()).encode(), self.address)
+
+    def close(self):
+        self.socket.close()
+
 
 # alert_setup function is used to setup the alert system which will response if abnormal tank operations detected
 # Inputs:
 #     board - current Arduino board
+#     logPath - path of the alert log, None for no log
 # Return:
 #     None
-def alert_setup(board):
+def alert_setup(board, logPath=None):
 
-    global alertPinROV, alertPinTankState, alertPinTankState5s, alertPinEnable
+    global alertPinROV, alertPinTankState, alertPinTankState5s, alertPinEnable, alertEngine
 
     alertPinROV = 11
     alertPinTankState = 2
@@ -33,8 +199,22 @@ def alert_setup(board):
     board.set_pin_mode_digital_output(alertPinTankState5s)
     board.set_pin_mode_digital_output(alertPinEnable)
 
+    board.digital_write(alertPinROV,0)
     board.digital_write(alertPinTankState,0)
     board.digital_write(alertPinTankState5s,0)
+    board.digital_write(alertPinEnable,0)
+
+    # the alerts are acted on by the alert engine's worker from here on
+    if 'alertEngine' in globals():
+        alertEngine.stop()
+    sinks = [PinAlertSink(board, {'enable': alertPinEnable, 'rov': alertPinROV, 'state': alertPinTankState,
+                                  'state persistent': alertPinTankState5s}),
+             ConsoleAlertSink()]
+    if logPath is not None:
+        sinks.append(LogAlertSink(logPath))
+    if alertSocketAddress is not None:
+        sinks.append(SocketAlertSink(alertSocketAddress))
+    alertEngine = AlertEngine(sinks)
 
     print("ALERT SYSTEM setup complete.")
     time.sleep(2)
@@ -48,13 +228,8 @@ def alert_setup(board):
 # Return:
 #     None
 def rov_alert(board,rateOfVolumeChange,limitRate):
-    global alertPinROV
-
-    if rateOfVolumeChange > limitRate:
-        board.digital_write(alertPinROV,1)
-        print("|| WARNING: Rate of volume change exceeds normal amount. ||")
-    else:
-        board.digital_write(alertPinROV,0)
+    alertEngine.publish('rov', rateOfVolumeChange > limitRate,
+                        "Rate of volume change exceeds normal amount. Please check for tank leaks/damages.")
 
 # tank_state_alert function is used to generate buzzer alerts when the tank is near empty or empty 
 # and when the tank is empty, near empty, overfull, near full for 5 seconds
@@ -65,17 +240,19 @@ def rov_alert(board,rateOfVolumeChange,limitRate):
 # Return:
 #     None
 def tank_state_alert(board,tankVolumeState,tankVolumeStateTime):
-    global alertPinTankState, alertPinTankState, alertPinEnable
-    board.digital_write(alertPinEnable,1)
-    if (tankVolumeState == "Empty" or tankVolumeState == "Near empty" or tankVolumeState == "Near full" or tankVolumeState == "Overfull") and tankVolumeStateTime >= 5:
-        board.digital_write(alertPinTankState,0)
-        board.digital_write(alertPinTankState5s,1)
-        print(f"|| WARNING: The tank has been {tankVolumeState} for more than 5s ||")
-    elif tankVolumeState == "Empty" or tankVolumeState == "Near empty":
-        board.digital_write(alertPinTankState,1)
-    else:
-        board.digital_write(alertPinTankState5s,0)
-        board.digital_write(alertPinTankState,0)
+    stateAlert, persistentAlert = state_alerts(tankVolumeState, tankVolumeStateTime)
+    alertEngine.publish('enable', True)
+    alertEngine.publish('state persistent', persistentAlert, f"The tank has been {tankVolumeState} for more than 5s")
+    alertEngine.publish('state', stateAlert)
+
+# overfull_alert function is used to warn the user when the tank water level is out of the measurement range
+# Inputs:
+#     overfull - True if the tank is overfull
+# Return:
+#     None
+def overfull_alert(overfull):
+    alertEngine.publish('overfull', overfull,
+                        "Tank water level exceeds measurement range. Please inspect tank for overflows.")
 
 # stop_alert_system function is used to stop the alert system when user quit the tank_operations
 # Inputs:
@@ -83,8 +260,18 @@ def tank_state_alert(board,tankVolumeState,tankVolumeStateTime):
 # Return:
 #     None     
 def stop_alert_system(board):
-    board.digital_write(alertPinROV,0)
-    board.digital_write(alertPinEnable,0)
+    alertEngine.publish('rov', False)
+    alertEngine.publish('enable', False)
+    # the pins are off before the polling loop returns
+    alertEngine.flush()
+
+# print_alert_report function is used to print the counts of the alert engine
+# no input parameters and return value
+def print_alert_report():
+    counts = alertEngine.counts
+    print(f"Alerts: {counts['published']} published, {counts['passed']} passed to the sinks, "
+          f"{counts['suppressed']} suppressed as repeats, {counts['dropped']} dropped, "
+          f"{counts['sink errors']} sink errors")
 
 
 # code for testing
@@ -0,0 +1,125 @@
+# analytics.py
+# Analyses the recorded tank history (rate of volume change, leak statistics) in vectorised NumPy passes
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import numpy as np
+
+
+# Calculates the rate of volume change dV/dt over a whole series in one pass
+# Inputs:
+#     timestamps - monotonic sample timestamps, s
+#     volumes - tank water volumes at those timestamps, L
+#     method - 'diff' for the backward difference used by the polling loop (first rate is NaN),
+#              'gradient' for central differences over the (uneven) timestamps
+#     smoothing - number of samples in the trailing moving average applied to the rates, 1 for none
+# Return:
+#     rates - NumPy array of rates of volume change, L/s, one per sample
+def rate_of_change(timestamps, volumes, method='diff', smoothing=1):
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    rates = np.full(len(volumes), np.nan)
+
+    if len(volumes) < 2:
+        return rates
+
+    if method == 'diff':
+        changeInTime = np.diff(timestamps)
+        changeInVolume = np.diff(volumes)
+        # samples with no time between them have no defined rate
+        np.divide(changeInVolume, changeInTime, out=rates[1:], where=changeInTime > 0)
+    elif method == 'gradient':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.gradient(volumes, timestamps)
+        rates[~np.isfinite(rates)] = np.nan
+    else:
+        raise ValueError(f"Unknown rate of change method: {method}")
+
+    if smoothing > 1:
+        rates = moving_average(rates, smoothing)
+    return rates
+
+
+# Smooths a series with a trailing moving average, ignoring NaN values. The first values are averaged over the
+# samples available so far.
+# Inputs:
+#     values - series to be smoothed
+#     windowSize - number of samples in the average
+# Return:
+#     NumPy array of smoothed values, NaN where the window holds no valid value
+def moving_average(values, windowSize):
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    # running sums of the valid values and of their count, so every window costs one subtraction
+    valueSums = np.concatenate(([0], np.cumsum(np.where(valid, values, 0))))
+    validCounts = np.concatenate(([0], np.cumsum(valid)))
+    windowStart = np.maximum(np.arange(1, len(values) + 1) - windowSize, 0)
+    windowSums = valueSums[1:] - valueSums[windowStart]
+    windowCounts = validCounts[1:] - validCounts[windowStart]
+
+    averages = np.full(len(values), np.nan)
+    np.divide(windowSums, windowCounts, out=averages, where=windowCounts > 0)
+    return averages
+
+
+# Summarises a series of rates of volume change
+# Inputs:
+#     rates - rates of volume change, L/s (NaN values are ignored)
+#     percentiles - percentiles to be reported
+# Return:
+#     statistics - dictionary of min, max, mean, max absolute rate and the requested percentiles,
+#                  None if there is no valid rate
+def rate_statistics(rates, percentiles=(5, 50, 95)):
+    rates = np.asarray(rates, dtype=np.float64)
+    rates = rates[np.isfinite(rates)]
+    if len(rates) == 0:
+        return None
+
+    statistics = {
+        'min': float(rates.min()),
+        'max': float(rates.max()),
+        'mean': float(rates.mean()),
+        'max abs': float(np.abs(rates).max())
+    }
+    for percentile, value in zip(percentiles, np.percentile(rates, percentiles)):
+        statistics[f'p{percentile}'] = float(value)
+    return statistics
+
+
+# Calculates the rates of volume change for a time window of a telemetry store and summarises them
+# Inputs:
+#     telemetryStore - telemetry store of the polling loop
+#     duration - length of the window ending at the newest sample, s (None for all retained history)
+#     method - rate of change method, see rate_of_change
+#     smoothing - moving average length, see rate_of_change
+#     percentiles - percentiles to be reported
+# Return:
+#     statistics - rate statistics of the window, see rate_statistics
+def window_rate_statistics(telemetryStore, duration=None, method='diff', smoothing=1, percentiles=(5, 50, 95)):
+    if duration is None:
+        timestamps = telemetryStore.column('timestamp')
+        volumes = telemetryStore.column('volume')
+    else:
+        window = telemetryStore.window(duration, includePrevious=True)
+        timestamps = window['timestamp']
+        volumes = window['volume']
+    rates = rate_of_change(timestamps, volumes, method, smoothing)
+    return rate_statistics(rates, percentiles)
+
+
+# Prints a summary of rate statistics to the console
+# Inputs:
+#     statistics - rate statistics, see rate_statistics
+# Return:
+#     None
+def print_rate_statistics(statistics):
+    if statistics is None:
+        print('Rate of volume change: INSUFFICIENT DATA.')
+        return
+    summary = ', '.join(f'{name} = {value:.4f}' for name, value in statistics.items())
+    print(f'Rate of volume change (L/s): {summary}')
@@ -0,0 +1,418 @@
+# benchmark.py
+# Measures the serial traffic and timing of the tank system components without an Arduino connected
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import tempfile
+import time
+import numpy as np
+from pymata4.private_constants import PrivateConstants
+import seven_segment as ss
+import system_menu
+import tank_operations
+import thermistor as tm
+import ultrasonic as us
+import alert_system as rov
+from board_guard import BoardGuard
+from simulated_board import SimulatedBoard
+from tank_controller import TankController
+from tank_supervisor import TankSupervisor
+import board_workers
+
+
+# stages of a polling cycle, as (stage name, module, function name) of the function that runs the stage
+pollingStages = [
+    ('thermistor', tm, 'thermistor_detect'),
+    ('ultrasonic', us, 'ultrasonic_detect'),
+    ('level detection', tank_operations, 'tank_water_level_detection'),
+    ('state alert', rov, 'tank_state_alert'),
+    ('pump', tank_operations, 'pump_activation'),
+    ('display', tank_operations, 'seven_segment_display'),
+    ('rate of change', tank_operations, 'rate_of_volume_change')
+]
+
+
+# CountingBoard stands in for a pymata4 board and records every message it would have sent over serial.
+# Digital writes are encoded exactly as pymata4 encodes them, so message and byte counts match the real link.
+class CountingBoard:
+
+    def __init__(self):
+        self.transactions = 0
+        self.messages = 0
+        self.bytesSent = 0
+
+    # Records one serial write of one or more Firmata messages
+    # Inputs:
+    #     command - bytes of the messages to be sent
+    # Return:
+    #     number of bytes sent
+    def _send_command(self, command):
+        self.transactions += 1
+        self.bytesSent += len(command)
+        # every Firmata message starts with a command byte, the only bytes with the high bit set
+        self.messages += sum(1 for byte in command if byte & 0x80)
+        return len(command)
+
+    def set_pin_mode_digital_output(self, pin):
+        pass
+
+    def digital_write(self, pin, value):
+        port = pin // 8
+        mask = 1 << (pin % 8)
+        if value == 1:
+            PrivateConstants.DIGITAL_OUTPUT_PORT_PINS[port] |= mask
+        else:
+            PrivateConstants.DIGITAL_OUTPUT_PORT_PINS[port] &= ~mask
+        portValue = PrivateConstants.DIGITAL_OUTPUT_PORT_PINS[port]
+        self._send_command((PrivateConstants.DIGITAL_MESSAGE + port, portValue & 0x7f, (portValue >> 7) & 0x7f))
+
+    def reset_counts(self):
+        self.transactions = 0
+        self.messages = 0
+        self.bytesSent = 0
+
+
+# Counts the serial transactions, messages and bytes used to refresh all 4 digits once, with and without
+# the batched shift-out path.
+# Inputs:
+#     strInput - message to be displayed
+#     tankVolumeState - tank state shown on the LEDs
+# Return:
+#     results - dictionary of {'per-pin': counts, 'batched': counts}, counts given per 4-digit refresh
+def benchmark_display_frame(strInput="5.23L", tankVolumeState="Within normal range"):
+    countingBoard = CountingBoard()
+    board = BoardGuard(countingBoard)
+    ss.seven_segment_setup(board)
+    frames = ss.seven_seg_frames(strInput, tankVolumeState)
+
+    results = {}
+    batchedSetting = ss.batchedShiftOut
+    try:
+        for mode, batched in (('per-pin', False), ('batched', True)):
+            ss.batchedShiftOut = batched
+            countingBoard.reset_counts()
+            ss.write_frames(board, frames[0], latchDelay=0)
+            results[mode] = {
+                'transactions': countingBoard.transactions,
+                'messages': countingBoard.messages,
+                'bytes': countingBoard.bytesSent,
+                'messages per digit': countingBoard.messages / len(frames[0]),
+                'bytes per digit': countingBoard.bytesSent / len(frames[0])
+            }
+    finally:
+        ss.batchedShiftOut = batchedSetting
+    return results
+
+
+# Summarises a list of timings or counts as percentiles
+# Inputs:
+#     values - measured values
+# Return:
+#     dictionary of count, mean, p50, p95, p99 and max
+def percentile_summary(values):
+    if not values:
+        return {'count': 0}
+    values = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {
+        'count': len(values),
+        'mean': float(values.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': float(values.max())
+    }
+
+
+# Runs the polling loop for a number of cycles against a simulated board and times every stage of every cycle.
+# The cycles are released at the polling period, as the polling loop does, so the display service and the motor
+# run between them as they would on the tank. The serial traffic is counted over the whole window of cycles times
+# the period, which takes in the writes of those threads. Console output of the loop is discarded while it runs.
+# Inputs:
+#     cycles - number of polling cycles to be run
+#     writeLatency - latency injected into every serial write of the simulated board, in seconds
+#     thermistorTime - thermistor detection time per cycle, in seconds (None keeps the loop's setting)
+#     ultrasonicTime - ultrasonic detection time per cycle, in seconds (None keeps the loop's setting)
+#     cacheWrites - False to send every pin write, unchanged or not
+#     period - polling period the cycles are released at, in seconds (None keeps the system's pollingMinRate)
+# Return:
+#     results - dictionary of configuration, per stage and per cycle timings (s), serial traffic of the window and
+#               per cycle, the pin writes sent and suppressed over all cycles and the schedule statistics
+def benchmark_polling_loop(cycles=20, writeLatency=0, thermistorTime=None, ultrasonicTime=None, cacheWrites=True,
+                           period=0.25):
+    stageTimes = {stageName: [] for stageName, _, _ in pollingStages}
+    cycleTimes = []
+
+    # wraps a stage function so that every call is timed
+    def timed(stageName, function):
+        def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stageTimes[stageName].append(time.perf_counter() - start)
+        return timed_call
+
+    originalFunctions = [(module, name, getattr(module, name)) for _, module, name in pollingStages]
+    originalDetectionTimes = (tank_operations.thermistorDetectionTime, tank_operations.ultrasonicDetectionTime)
+    simulatedBoard = None
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), \
+                tempfile.TemporaryDirectory() as logDirectory:
+            system_menu.initialise_system_parameters()
+            system_menu.telemetryLogDirectory = logDirectory
+            if period is not None:
+                system_menu.pollingMinRate = period
+                system_menu.pollingMaxRate = max(system_menu.pollingMaxRate, period)
+            simulatedBoard = SimulatedBoard(system_menu.tankBaseArea, system_menu.tankHeight, writeLatency=writeLatency,
+                                            tankGeometry=system_menu.tankGeometry)
+            system_menu.board = BoardGuard(simulatedBoard, cacheWrites)
+            system_menu.board_setup(system_menu.board)
+            if thermistorTime is not None:
+                tank_operations.thermistorDetectionTime = thermistorTime
+            if ultrasonicTime is not None:
+                tank_operations.ultrasonicDetectionTime = ultrasonicTime
+            for stageName, module, name in pollingStages:
+                setattr(module, name, timed(stageName, getattr(module, name)))
+
+            tank_operations.polling_setup()
+            writeCountsBefore = system_menu.board.write_counts()
+            # the display service and motor threads also write between cycles, so the traffic is counted over the
+            # window from the first release to the release after the last cycle rather than inside each cycle
+            serialBefore = (simulatedBoard.transactions, simulatedBoard.messages, simulatedBoard.bytesSent)
+            windowStart = time.perf_counter()
+            try:
+                for _ in range(cycles):
+                    tank_operations.pollingScheduler.wait_next()
+                    start = time.perf_counter()
+                    tank_operations.polling_cycle()
+                    cycleTimes.append(time.perf_counter() - start)
+                tank_operations.pollingScheduler.wait_next()
+                windowTime = time.perf_counter() - windowStart
+                serialAfter = (simulatedBoard.transactions, simulatedBoard.messages, simulatedBoard.bytesSent)
+                serialCounts = {countName: after - before for countName, before, after
+                                in zip(('transactions', 'messages', 'bytes'), serialBefore, serialAfter)}
+                writeCounts = {name: count - writeCountsBefore[name]
+                               for name, count in system_menu.board.write_counts().items()}
+                schedule = tank_operations.pollingScheduler.snapshot()
+            finally:
+                ss.stop_display_service()
+                tank_operations.telemetryLog.close()
+    finally:
+        for module, name, function in originalFunctions:
+            setattr(module, name, function)
+        tank_operations.thermistorDetectionTime, tank_operations.ultrasonicDetectionTime = originalDetectionTimes
+        if simulatedBoard is not None:
+            simulatedBoard.shutdown()
+
+    return {
+        'config': {
+            'cycles': cycles,
+            'write latency': writeLatency,
+            'thermistor time': tank_operations.thermistorDetectionTime if thermistorTime is None else thermistorTime,
+            'ultrasonic time': tank_operations.ultrasonicDetectionTime if ultrasonicTime is None else ultrasonicTime,
+            'write cache': cacheWrites,
+            'period': system_menu.pollingMinRate,
+            'python': platform.python_version()
+        },
+        'stages': {stageName: percentile_summary(times) for stageName, times in stageTimes.items()},
+        'cycle': percentile_summary(cycleTimes),
+        'serial per cycle': {
+            'window': dict(serialCounts, seconds=windowTime),
+            'per cycle': {countName: count / cycles for countName, count in serialCounts.items()}
+        },
+        'pin writes': writeCounts,
+        'schedule': schedule
+    }
+
+
+# Runs a number of simulated tanks under the tank supervisor, each tank on its own simulated board, and measures
+# whether every tank holds its polling rate
+# Inputs:
+#     tanks - number of tanks
+#     duration - time to run for, s
+#     sensorWindow - sensor window of every tank per cycle, s
+#     pollingMinRate - polling period of every tank, s
+#     pollingMaxRate - longest acceptable time between two polls of a tank, s
+#     writeLatency - latency injected into every serial write, s
+# Return:
+#     results - dictionary of configuration, totals and the per tank summary
+def benchmark_supervisor(tanks=16, duration=10, sensorWindow=0.5, pollingMinRate=1, pollingMaxRate=5, writeLatency=0):
+    boards = [SimulatedBoard(initialLevel=4 + 12 * i / max(tanks - 1, 1), writeLatency=writeLatency)
+              for i in range(tanks)]
+    controllers = [TankController(f'tank {i + 1}', BoardGuard(board), pollingMinRate=pollingMinRate,
+                                  pollingMaxRate=pollingMaxRate, sensorWindow=sensorWindow, alertConsole=False)
+                   for i, board in enumerate(boards)]
+    supervisor = TankSupervisor(controllers)
+    try:
+        supervisor.setup()
+        supervisor.run(duration)
+        supervisor.shutdown()
+    finally:
+        for board in boards:
+            board.shutdown()
+
+    tankSummaries = supervisor.summary()
+    cycles = sum(tank['cycles'] for tank in tankSummaries.values())
+    pollTimes = [controller.instrumentation.snapshot()['stages']['sensors']['mean'] for controller in controllers]
+    return {
+        'config': {'tanks': tanks, 'duration': duration, 'sensor window': sensorWindow,
+                   'polling min rate': pollingMinRate, 'polling max rate': pollingMaxRate,
+                   'write latency': writeLatency},
+        'totals': {
+            'polls per second': (cycles + tanks) / duration,
+            'target polls per second': tanks / pollingMinRate,
+            'sequential loop time': sum(pollTimes),
+            'worst interval p95': max(tank['interval p95'] for tank in tankSummaries.values()),
+            'worst interval max': max(tank['interval max'] for tank in tankSummaries.values()),
+            'late polls': sum(tank['late'] for tank in tankSummaries.values()),
+            'overruns': sum(tank['overruns'] for tank in tankSummaries.values())
+        },
+        'tanks': tankSummaries
+    }
+
+
+# Runs a number of simulated boards, one tank each, in worker processes and measures the rate at which the parent
+# receives their records
+# Inputs:
+#     boards - number of boards
+#     duration - time to run for, s
+#     sensorWindow - sensor window of every tank per cycle, s
+#     pollingMinRate - polling period of every tank, s
+# Return:
+#     results - dictionary of configuration and totals
+def benchmark_board_workers(boards=4, duration=10, sensorWindow=0.5, pollingMinRate=1):
+    aggregator = board_workers.BoardAggregator(
+        board_workers.simulated_board_configs(boards, sensorWindow=sensorWindow, pollingMinRate=pollingMinRate))
+    aggregator.start()
+    try:
+        # workers take a moment to start, the rate is measured from the first record
+        while not aggregator.latest:
+            aggregator.run(0.1)
+        firstCounts = sum(aggregator.recordCounts.values())
+        aggregator.run(duration)
+        records = sum(aggregator.recordCounts.values()) - firstCounts
+    finally:
+        aggregator.stop()
+    return {
+        'config': {'boards': boards, 'duration': duration, 'sensor window': sensorWindow,
+                   'polling min rate': pollingMinRate},
+        'totals': {
+            'records per second': records / duration,
+            'target records per second': boards / pollingMinRate,
+            'worker errors': len(aggregator.errors)
+        }
+    }
+
+
+# Prints the differences between two polling loop benchmark results, e.g. from two commits
+# Inputs:
+#     previous - earlier benchmark results
+#     current - new benchmark results
+# Return:
+#     None
+def compare_results(previous, current):
+    print('\n====================================')
+    print('COMPARISON (previous -> current)'.center(40))
+    print('====================================')
+    rows = dict(previous['stages'], cycle=previous['cycle'])
+    newRows = dict(current['stages'], cycle=current['cycle'])
+    for rowName, row in rows.items():
+        if rowName not in newRows or 'p50' not in row or 'p50' not in newRows[rowName]:
+            continue
+        changes = []
+        for statistic in ('p50', 'p95', 'p99'):
+            before, after = row[statistic], newRows[rowName][statistic]
+            change = (after - before) / before * 100 if before else 0
+            changes.append(f'{statistic} {before * 1000:.2f} -> {after * 1000:.2f}ms ({change:+.1f}%)')
+        print(f'{rowName:<18}' + ', '.join(changes))
+
+
+# Converts the timings of a percentile summary from seconds to milliseconds for printing
+# Inputs:
+#     summary - summary of timings in seconds, see percentile_summary
+# Return:
+#     count and the mean, p50, p95, p99 and max timings in milliseconds
+def milliseconds(summary):
+    return dict({'count': summary['count']},
+                **{statistic: summary[statistic] * 1000 for statistic in ('mean', 'p50', 'p95', 'p99', 'max')
+                   if statistic in summary})
+
+
+# Prints a table of benchmark results
+# Inputs:
+#     title - title of the table
+#     results - dictionary of {row name: {column name: value}}
+# Return:
+#     None
+def print_results(title, results):
+    print('\n====================================')
+    print(title.center(40))
+    print('====================================')
+    for rowName, row in results.items():
+        print(f'\n{rowName}')
+        for columnName, value in row.items():
+            if isinstance(value, float):
+                value = f'{value:.2f}'
+            print(f'    {columnName:<22}{value}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the tank system against a simulated board')
+    parser.add_argument('--cycles', type=int, default=20, help='number of polling cycles')
+    parser.add_argument('--write-latency', type=float, default=0, help='latency of every serial write, in seconds')
+    parser.add_argument('--thermistor-time', type=float, default=None, help='thermistor detection time, in seconds')
+    parser.add_argument('--ultrasonic-time', type=float, default=None, help='ultrasonic detection time, in seconds')
+    parser.add_argument('--period', type=float, default=0.25,
+                        help='polling period the cycles are released at, in seconds')
+    parser.add_argument('--no-write-cache', action='store_true', help='send every pin write, unchanged or not')
+    parser.add_argument('--tanks', type=int, default=16, help='number of tanks run by the supervisor, 0 to skip')
+    parser.add_argument('--supervisor-duration', type=float, default=10, help='time the supervisor runs, in seconds')
+    parser.add_argument('--boards', type=int, default=4, help='number of boards run in worker processes, 0 to skip')
+    parser.add_argument('--output', default='benchmark_results.json', help='file the results are written to')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    print_results('DISPLAY REFRESH (4 DIGITS)', benchmark_display_frame())
+
+    results = benchmark_polling_loop(args.cycles, args.write_latency, args.thermistor_time, args.ultrasonic_time,
+                                     not args.no_write_cache, args.period)
+    results['display refresh'] = benchmark_display_frame()
+    print_results('POLLING LOOP STAGES (ms)', {stageName: milliseconds(summary)
+                                               for stageName, summary in results['stages'].items()})
+    print_results('POLLING LOOP CYCLE (ms)', {'cycle': milliseconds(results['cycle'])})
+    print_results('SERIAL TRAFFIC PER CYCLE', results['serial per cycle'])
+    print_results(f"PIN WRITES ({args.cycles} CYCLES)", {'writes': results['pin writes']})
+    schedule = results['schedule']
+    print_results('SCHEDULE (ms)', {
+        'release jitter': milliseconds(schedule['jitter']),
+        'interval minus period': {'min': (schedule['min interval'] - schedule['period']) * 1000,
+                                  'max': (schedule['max interval'] - schedule['period']) * 1000}
+    })
+
+    if args.tanks > 0:
+        results['supervisor'] = benchmark_supervisor(args.tanks, args.supervisor_duration,
+                                                     writeLatency=args.write_latency)
+        print_results(f"SUPERVISOR ({args.tanks} TANKS)", {'totals': results['supervisor']['totals']})
+
+    if args.boards > 0:
+        results['board workers'] = benchmark_board_workers(args.boards, args.supervisor_duration)
+        print_results(f"BOARD WORKERS ({args.boards} BOARDS)", {'totals': results['board workers']['totals']})
+
+    with open(args.output, 'w') as resultsFile:
+        json.dump(results, resultsFile, indent=2)
+    print(f'\nResults written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as previousFile:
+            compare_results(json.load(previousFile), results)
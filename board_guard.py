@@ -0,0 +1,139 @@
+# board_guard.py
+# Wraps the Arduino board so that several threads can share the one serial link safely
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import threading
+from pymata4.private_constants import PrivateConstants
+
+
+# BoardGuard wraps a pymata4 board and serialises every call made through it with a lock, so that concurrent
+# tasks (e.g. thermistor and ultrasonic acquisition) never interleave Firmata messages on the serial link or
+# race on pymata4's shared digital port state. It is used exactly like the board it wraps.
+# It also remembers the last value written to every digital and PWM output pin and drops a write that would not
+# change the pin, so a polling loop that drives its pump and alerts every cycle only sends the changes over the
+# serial link. Setting a pin's mode forgets its value, as the board resets the pin.
+# Inputs:
+#     board - the arduino board to be guarded
+#     cacheWrites - False to send every digital and PWM write
+class BoardGuard:
+
+    def __init__(self, board, cacheWrites=True):
+        self.board = board
+        self.lock = threading.RLock()
+        self.cacheWrites = cacheWrites
+        self.pinValues = {}  # (pin type, pin): last value written
+        self.writeCounts = {'digital sent': 0, 'digital suppressed': 0, 'pwm sent': 0, 'pwm suppressed': 0}
+
+    # Returns the requested board attribute. Board methods are wrapped so that the lock is held for the whole call,
+    # any other attribute is returned as it is.
+    # Inputs:
+    #     name - name of the board attribute
+    # Return:
+    #     the (guarded) board attribute
+    def __getattr__(self, name):
+        attribute = getattr(self.board, name)
+        if not callable(attribute):
+            return attribute
+
+        def guarded_call(*args, **kwargs):
+            with self.lock:
+                if name.startswith('set_pin_mode_'):
+                    # the pins given to a mode change (both for a sonar) no longer hold the cached values
+                    self.forget_pins(*(arg for arg in args[:2] if isinstance(arg, int)))
+                elif name == 'shutdown':
+                    self.pinValues.clear()
+                return attribute(*args, **kwargs)
+
+        return guarded_call
+
+    # Writes a digital output pin unless it already holds the value
+    # Inputs:
+    #     pin - digital pin number
+    #     value - 0 or 1
+    # Return:
+    #     True if the write was sent, False if it was suppressed
+    def digital_write(self, pin, value):
+        return self.cached_write('digital', self.board.digital_write, pin, value)
+
+    # Writes a PWM output pin unless it already holds the duty
+    # Inputs:
+    #     pin - PWM pin number
+    #     value - PWM duty
+    # Return:
+    #     True if the write was sent, False if it was suppressed
+    def pwm_write(self, pin, value):
+        return self.cached_write('pwm', self.board.pwm_write, pin, value)
+
+    # Sends a pin write through the cache
+    # Inputs:
+    #     pinType - 'digital' or 'pwm'
+    #     write - board method that writes the pin
+    #     pin - pin number
+    #     value - value to be written
+    # Return:
+    #     True if the write was sent, False if it was suppressed
+    def cached_write(self, pinType, write, pin, value):
+        with self.lock:
+            if self.cacheWrites and self.pinValues.get((pinType, pin)) == value:
+                self.writeCounts[f'{pinType} suppressed'] += 1
+                return False
+            write(pin, value)
+            self.pinValues[pinType, pin] = value
+            self.writeCounts[f'{pinType} sent'] += 1
+            return True
+
+    # Forgets the cached values of pins, so their next writes are always sent
+    # Inputs:
+    #     pins - pin numbers, every pin if none are given
+    # Return:
+    #     None
+    def forget_pins(self, *pins):
+        with self.lock:
+            if not pins:
+                self.pinValues.clear()
+            for pin in pins:
+                self.pinValues.pop(('digital', pin), None)
+                self.pinValues.pop(('pwm', pin), None)
+
+    # Returns the counts of digital and PWM writes sent and suppressed
+    # no input parameters
+    # Return:
+    #     dictionary of {'digital sent', 'digital suppressed', 'pwm sent', 'pwm suppressed'}
+    def write_counts(self):
+        with self.lock:
+            return dict(self.writeCounts)
+
+    # Sends a whole sequence of digital port states to the board as one serial transaction. Each state becomes a
+    # Firmata digital message for the port, pins outside pinMask keep their current values. The port state of the
+    # board (pymata4 keeps it in PrivateConstants) is updated afterwards so later digital_write calls stay consistent.
+    # Inputs:
+    #     port - digital port number (pin // 8)
+    #     pinMask - bits of the port driven by the sequence
+    #     portStates - values of the masked bits, in the order they are to be written
+    # Return:
+    #     number of messages sent, or None if the board has no batched write support
+    def write_digital_port_sequence(self, port, pinMask, portStates):
+        sendCommand = getattr(self.board, '_send_command', None)
+        if sendCommand is None or not portStates:
+            return None
+
+        with self.lock:
+            portPins = getattr(self.board, 'digitalOutputPortPins', PrivateConstants.DIGITAL_OUTPUT_PORT_PINS)
+            otherPins = portPins[port] & ~pinMask
+            command = []
+            for state in portStates:
+                value = otherPins | state
+                command.extend((PrivateConstants.DIGITAL_MESSAGE + port, value & 0x7f, (value >> 7) & 0x7f))
+            sendCommand(command)
+            portPins[port] = value
+            # the masked pins are left at the last state of the sequence
+            for bit in range(8):
+                if pinMask >> bit & 1:
+                    self.pinValues['digital', port * 8 + bit] = value >> bit & 1
+        return len(portStates)
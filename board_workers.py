@@ -0,0 +1,308 @@
+# board_workers.py
+# Runs the tanks of every board in a worker process of its own and aggregates their telemetry in the parent
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import json
+import multiprocessing
+import os
+import signal
+import struct
+import threading
+import time
+from multiprocessing.connection import wait
+import metrics_server
+import telemetry_log
+from alert_system import AlertEvent
+from tank_states import persistentAlertStates
+from telemetry import stateCodes, tankStates, unknownStateCode
+
+
+# message from a worker: tank index on the board, then one telemetry log record (see telemetry_log.pack_record)
+tankIndexStruct = struct.Struct('<H')
+# tank index of a message carrying the error that stopped a worker, as UTF-8 text
+workerErrorIndex = 0xFFFF
+# tank index of a message carrying an alert event raised or cleared, as JSON (see alert_system.AlertEvent)
+alertMessageIndex = 0xFFFE
+
+
+# ParentAlertSink passes the alerts of a worker's tanks on to the parent, which writes them to the alert sinks of
+# the site. The tanks' alert engines have deduplicated them already, so only raises, clears and reminders are sent.
+# Inputs:
+#     connection - sending end of the pipe to the parent
+#     sendLock - lock shared with the other senders on the pipe
+class ParentAlertSink:
+
+    def __init__(self, connection, sendLock):
+        self.connection = connection
+        self.sendLock = sendLock
+
+    def handle(self, event):
+        with self.sendLock:
+            self.connection.send_bytes(tankIndexStruct.pack(alertMessageIndex) + json.dumps(event._asdict()).encode())
+
+
+# Creates the board of a worker
+# Inputs:
+#     boardConfig - board configuration, see run_board_worker
+# Return:
+#     board - the board, wrapped in a BoardGuard
+#     boardClose - function that shuts the board down
+def open_board(boardConfig):
+    from board_guard import BoardGuard
+    if boardConfig.get('simulated'):
+        from simulated_board import SimulatedBoard
+        board = SimulatedBoard(**boardConfig.get('boardOptions', {}))
+    else:
+        from pymata4 import pymata4
+        board = pymata4.Pymata4(com_port=boardConfig.get('port'), **boardConfig.get('boardOptions', {}))
+    return BoardGuard(board), board.shutdown
+
+
+# Runs the tanks of one board until the stop event is set. Runs in a worker process: every poll of every tank is
+# streamed to the parent as one compact record and every alert as one event, the parent owns persistence, the
+# alert sinks and the alerts roll-up. The tanks only drive their alert pins in the worker.
+# Inputs:
+#     boardConfig - dictionary of the board configuration:
+#                   'simulated' - True for a simulated board
+#                   'port' - serial port of an Arduino (None to let pymata4 find it)
+#                   'boardOptions' - keyword arguments of the board
+#                   'tanks' - list of {'name', 'pins', 'parameters'} of the tanks wired to the board, pins and
+#                             parameters as taken by tank_controller.TankController
+#     connection - sending end of the pipe to the parent
+#     stopEvent - multiprocessing event set by the parent to stop the worker
+#     boardIndex - index of the board, labels the alerts of its tanks as "board <index> <tank name>"
+# Return:
+#     None
+def run_board_worker(boardConfig, connection, stopEvent, boardIndex=0):
+    from tank_controller import TankController
+    from tank_supervisor import TankSupervisor
+
+    # CTRL+C reaches every process of the console; the parent stops the workers through the stop event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        board, boardClose = open_board(boardConfig)
+        sendLock = threading.Lock()
+        alertSink = ParentAlertSink(connection, sendLock)
+        controllers = [TankController(tank['name'], board, tank.get('pins'),
+                                      **dict({'alertSource': f"board {boardIndex} {tank['name']}",
+                                              'alertConsole': False, 'alertSinks': [alertSink]},
+                                             **tank.get('parameters', {})))
+                       for tank in boardConfig['tanks']]
+        sequences = [0] * len(controllers)
+
+        # packs the readings of a poll into one record and streams it to the parent
+        def send_record(index, controller, readings):
+            record = telemetry_log.pack_record(sequences[index], readings['time'], readings['gapHeight'],
+                                               readings['volume'], readings['level'],
+                                               stateCodes.get(readings['state'], unknownStateCode),
+                                               readings['temperature'], readings['rate'], readings['pwm'])
+            sequences[index] += 1
+            with sendLock:
+                connection.send_bytes(tankIndexStruct.pack(index) + record)
+
+        supervisor = TankSupervisor(controllers, onPoll=send_record)
+        supervisor.setup()
+        # the stop event is a process-shared event, so a thread turns it into a supervisor stop
+        threading.Thread(target=lambda: (stopEvent.wait(), supervisor.stop()), daemon=True).start()
+        try:
+            supervisor.run()
+        finally:
+            supervisor.shutdown()
+            boardClose()
+    except Exception as error:
+        try:
+            connection.send_bytes(tankIndexStruct.pack(workerErrorIndex) + repr(error).encode())
+        except OSError:
+            pass
+    finally:
+        connection.close()
+
+
+# BoardAggregator starts one worker process per board and collects the records they stream back. Running every
+# board's serial link, reporter thread and tank loops in a process of its own spreads them over the CPU cores, so
+# adding boards does not slow the control loops of the other boards. The parent keeps the latest readings of
+# every tank, writes each tank's records to its own telemetry log, passes the alerts of every tank on to the alert
+# sinks and rolls up the alerts.
+# Inputs:
+#     boardConfigs - list of board configurations, see run_board_worker
+#     logDirectory - directory of the telemetry logs, one per tank; None for no logs
+#     alertSinks - alert sinks the alerts of every tank are passed on to (e.g. console, alert log, socket), see
+#                  alert_system.AlertEngine; closed when the aggregator stops
+class BoardAggregator:
+
+    def __init__(self, boardConfigs, logDirectory=None, alertSinks=None):
+        self.boardConfigs = boardConfigs
+        self.logDirectory = logDirectory
+        self.alertSinks = list(alertSinks or [])
+        self.alertCounts = {'received': 0, 'sink errors': 0}
+        self.stopEvent = multiprocessing.Event()
+        self.processes = []
+        self.connections = {}  # receiving connection: board index
+        self.latest = {}  # (board index, tank index): latest record fields
+        self.recordCounts = {}
+        self.telemetryLogs = {}
+        self.errors = []
+
+    # Starts the worker processes and opens the telemetry logs
+    # no input parameters and no return value
+    def start(self):
+        sessionTime = time.strftime('%Y%m%d_%H%M%S')
+        for boardIndex, boardConfig in enumerate(self.boardConfigs):
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_board_worker,
+                                              args=(boardConfig, sender, self.stopEvent, boardIndex),
+                                              name=f'board {boardIndex}', daemon=True)
+            process.start()
+            # the worker holds the only sending end, so the pipe reports end of file when the worker exits
+            sender.close()
+            self.processes.append(process)
+            self.connections[receiver] = boardIndex
+            if self.logDirectory is not None:
+                os.makedirs(self.logDirectory, exist_ok=True)
+                for tankIndex in range(len(boardConfig['tanks'])):
+                    path = os.path.join(self.logDirectory, f'session_{sessionTime}_board{boardIndex}_tank{tankIndex}.tlog')
+                    self.telemetryLogs[boardIndex, tankIndex] = telemetry_log.TelemetryLog(path)
+
+    # Receives the records of the workers until the duration has passed, every worker has exited or
+    # KeyboardInterrupt
+    # Inputs:
+    #     duration - time to run for, s (None to run until interrupted)
+    #     reportInterval - time between printed roll-ups, s (None for none)
+    # Return:
+    #     None
+    def run(self, duration=None, reportInterval=None):
+        endTime = None if duration is None else time.monotonic() + duration
+        nextReport = None if reportInterval is None else time.monotonic() + reportInterval
+        try:
+            while self.connections:
+                now = time.monotonic()
+                if endTime is not None and now >= endTime:
+                    break
+                if nextReport is not None and now >= nextReport:
+                    print_rollup(self.alert_rollup())
+                    nextReport += reportInterval
+                deadlines = [deadline - now for deadline in (endTime, nextReport) if deadline is not None]
+                for connection in wait(list(self.connections), min(deadlines) if deadlines else None):
+                    self.receive(connection)
+        except KeyboardInterrupt:
+            pass
+
+    # Receives one message from a worker
+    # Inputs:
+    #     connection - receiving connection of the worker
+    # Return:
+    #     None
+    def receive(self, connection):
+        boardIndex = self.connections[connection]
+        try:
+            message = connection.recv_bytes()
+        except (EOFError, OSError):
+            # the worker has exited
+            del self.connections[connection]
+            return
+        tankIndex, = tankIndexStruct.unpack_from(message)
+        if tankIndex == workerErrorIndex:
+            self.errors.append((boardIndex, message[tankIndexStruct.size:].decode()))
+            return
+        if tankIndex == alertMessageIndex:
+            self.receive_alert(AlertEvent(**json.loads(message[tankIndexStruct.size:])))
+            return
+        record = telemetry_log.unpack_record(message[tankIndexStruct.size:])
+        if record is None:
+            return
+        key = (boardIndex, tankIndex)
+        self.latest[key] = record
+        state = tankStates[record['stateCode']] if 0 <= record['stateCode'] < len(tankStates) else 'Unknown'
+        metrics_server.publish_tank_snapshot(
+            f"board {boardIndex} {self.boardConfigs[boardIndex]['tanks'][tankIndex]['name']}",
+            {'timestamp': record['timestamp'], 'volume': record['volume'], 'level': record['level'], 'state': state,
+             'stateCode': record['stateCode'], 'temperature': record['temperature'], 'rate': record['rate'],
+             'pwm': record['pwm'], 'gapHeight': record['gapHeight']})
+        self.recordCounts[key] = self.recordCounts.get(key, 0) + 1
+        telemetryLog = self.telemetryLogs.get(key)
+        if telemetryLog is not None:
+            telemetryLog.append(record['timestamp'], record['gapHeight'], record['volume'], record['level'],
+                                record['stateCode'], record['temperature'], record['rate'], record['pwm'])
+
+    # Passes an alert event of a worker on to the alert sinks
+    # Inputs:
+    #     event - alert event, see alert_system.AlertEvent
+    # Return:
+    #     None
+    def receive_alert(self, event):
+        self.alertCounts['received'] += 1
+        for sink in self.alertSinks:
+            try:
+                sink.handle(event)
+            except Exception:
+                # a failing sink must not stop the alerts reaching the others
+                self.alertCounts['sink errors'] += 1
+
+    # Rolls up the latest readings of every tank into one alert summary
+    # no input parameters
+    # Return:
+    #     dictionary of the number of tanks in every state, the tanks in an alert state and the number of records
+    #     received per tank, tanks named "board <index> <tank name>"
+    def alert_rollup(self):
+        stateCounts = {}
+        alertTanks = []
+        for (boardIndex, tankIndex), record in self.latest.items():
+            state = tankStates[record['stateCode']] if 0 <= record['stateCode'] < len(tankStates) else 'Unknown'
+            stateCounts[state] = stateCounts.get(state, 0) + 1
+            if state in persistentAlertStates:
+                alertTanks.append(f"board {boardIndex} {self.boardConfigs[boardIndex]['tanks'][tankIndex]['name']}")
+        records = {f"board {boardIndex} {self.boardConfigs[boardIndex]['tanks'][tankIndex]['name']}": count
+                   for (boardIndex, tankIndex), count in sorted(self.recordCounts.items())}
+        return {'states': stateCounts, 'alerts': alertTanks, 'records': records, 'errors': list(self.errors)}
+
+    # Stops the workers, waits for them to exit and closes the telemetry logs and alert sinks
+    # no input parameters and no return value
+    def stop(self):
+        self.stopEvent.set()
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        # keep the records sent before the workers stopped
+        for connection in list(self.connections):
+            while connection in self.connections and connection.poll():
+                self.receive(connection)
+            connection.close()
+        self.connections = {}
+        for telemetryLog in self.telemetryLogs.values():
+            telemetryLog.close()
+        for sink in self.alertSinks:
+            close = getattr(sink, 'close', None)
+            if close is not None:
+                close()
+
+
+# Prints an alert roll-up to the console
+# Inputs:
+#     rollup - alert roll-up, see BoardAggregator.alert_rollup
+# Return:
+#     None
+def print_rollup(rollup):
+    states = ', '.join(f'{state}: {count}' for state, count in rollup['states'].items())
+    print(f"\nTANKS: {states or 'no data yet'}")
+    if rollup['alerts']:
+        print(f"|| ALERT: {', '.join(rollup['alerts'])} ||")
+    for boardIndex, error in rollup['errors']:
+        print(f"|| WARNING: board {boardIndex} stopped: {error} ||")
+
+
+# Builds the configuration of a number of simulated boards, each with one tank on the default pins
+# Inputs:
+#     boards - number of boards
+#     parameters - tank parameters, as taken by tank_controller.TankController
+# Return:
+#     list of board configurations
+def simulated_board_configs(boards, **parameters):
+    return [{'simulated': True, 'boardOptions': {'initialLevel': 4 + 12 * i / max(boards - 1, 1)},
+             'tanks': [{'name': 'tank', 'parameters': parameters}]} for i in range(boards)]
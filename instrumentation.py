@@ -0,0 +1,237 @@
+# instrumentation.py
+# Always-on timing of the polling loop stages with log-bucketed latency histograms and event counters
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import functools
+import threading
+import time
+
+
+# bucket i of a histogram counts durations of [2^(i-1), 2^i) nanoseconds, the last bucket everything longer
+histogramBuckets = 40  # 2^39 ns is about 9 minutes
+
+
+# LatencyHistogram counts durations in power-of-two buckets, so recording a duration is a bit_length and an
+# increment whatever the number of samples, and percentiles are read back to within a factor of two.
+class LatencyHistogram:
+
+    def __init__(self):
+        self.buckets = [0] * histogramBuckets
+        self.count = 0
+        self.totalNs = 0
+        self.maxNs = 0
+        self.lastNs = 0
+
+    # Records one duration
+    # Inputs:
+    #     durationNs - duration, in nanoseconds
+    # Return:
+    #     None
+    def record(self, durationNs):
+        self.buckets[min(durationNs.bit_length(), histogramBuckets - 1)] += 1
+        self.count += 1
+        self.totalNs += durationNs
+        self.lastNs = durationNs
+        if durationNs > self.maxNs:
+            self.maxNs = durationNs
+
+    # Estimates a percentile from the buckets, as the upper bound of the bucket holding it (capped at the maximum)
+    # Inputs:
+    #     percentile - percentile to be estimated, 0 - 100
+    # Return:
+    #     estimated duration, in seconds (0 if nothing has been recorded)
+    def percentile(self, percentile):
+        if self.count == 0:
+            return 0.0
+        rank = percentile / 100 * self.count
+        seen = 0
+        for bucket, bucketCount in enumerate(self.buckets):
+            seen += bucketCount
+            if bucketCount and seen >= rank:
+                return min(1 << bucket, self.maxNs) / 1e9
+        return self.maxNs / 1e9
+
+    # Summarises the histogram
+    # no input parameters
+    # Return:
+    #     dictionary of count, mean, p50, p95, p99, max and last duration (durations in seconds) and the
+    #     non-empty buckets as {bucket upper bound in seconds: count}
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.totalNs / self.count / 1e9 if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.maxNs / 1e9,
+            'last': self.lastNs / 1e9,
+            'buckets': {(1 << bucket) / 1e9: bucketCount
+                        for bucket, bucketCount in enumerate(self.buckets) if bucketCount}
+        }
+
+
+# StageTimer times one stage of the polling loop into its histogram. It is used as a context manager
+# ("with instrumentation.stage('pump'):") and keeps its start time per thread, so stages running on
+# different threads at the same time are timed independently.
+class StageTimer:
+
+    def __init__(self, name, histogram, cycleStages):
+        self.name = name
+        self.histogram = histogram
+        self.cycleStages = cycleStages
+        self.local = threading.local()
+
+    def __enter__(self):
+        self.local.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        durationNs = time.perf_counter_ns() - self.local.start
+        self.histogram.record(durationNs)
+        self.cycleStages[self.name] = durationNs
+        return False
+
+
+# Instrumentation holds the stage histograms, the cycle histogram and the event counters of the polling loop.
+# Stages are timed with stage() as a context manager or timed() as a decorator; record_cycle closes a cycle,
+# counting it as an overrun when it takes longer than the maximum polling rate and keeping the stage breakdown
+# of the slowest cycle and of the latest overrun.
+class Instrumentation:
+
+    def __init__(self):
+        self.reset()
+
+    # Clears all histograms and counters, e.g. at the start of a polling session
+    # no input parameters and no return value
+    def reset(self):
+        self.startTime = time.time()
+        self.stageHistograms = {}
+        self.stageTimers = {}
+        self.cycleHistogram = LatencyHistogram()
+        self.counters = {}
+        self.cycleStages = {}
+        self.slowestCycle = None
+        self.lastOverrun = None
+
+    # Returns the timer of a stage, created on first use
+    # Inputs:
+    #     name - stage name
+    # Return:
+    #     StageTimer context manager of the stage
+    def stage(self, name):
+        timer = self.stageTimers.get(name)
+        if timer is None:
+            histogram = self.stageHistograms.setdefault(name, LatencyHistogram())
+            timer = self.stageTimers[name] = StageTimer(name, histogram, self.cycleStages)
+        return timer
+
+    # Decorator that times every call of a function as a stage
+    # Inputs:
+    #     name - stage name
+    # Return:
+    #     decorator
+    def timed(self, name):
+        def decorator(function):
+            @functools.wraps(function)
+            def timed_call(*args, **kwargs):
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            return timed_call
+        return decorator
+
+    # Adds to an event counter
+    # Inputs:
+    #     name - counter name
+    #     amount - amount added
+    # Return:
+    #     None
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Records a completed polling cycle and starts the stage breakdown of the next one
+    # Inputs:
+    #     elapsedTime - duration of the cycle, in seconds
+    #     pollingMaxRate - maximum polling rate, in seconds; longer cycles are counted as overruns
+    # Return:
+    #     True if the cycle overran pollingMaxRate, False otherwise
+    def record_cycle(self, elapsedTime, pollingMaxRate):
+        durationNs = int(elapsedTime * 1e9)
+        self.cycleHistogram.record(durationNs)
+        self.count('cycles')
+        breakdown = {'time': time.time(), 'elapsed': elapsedTime,
+                     'stages': {name: stageNs / 1e9 for name, stageNs in self.cycleStages.items()}}
+        if self.slowestCycle is None or elapsedTime > self.slowestCycle['elapsed']:
+            self.slowestCycle = breakdown
+        overrun = elapsedTime > pollingMaxRate
+        if overrun:
+            self.count('overruns')
+            self.lastOverrun = breakdown
+        self.cycleStages.clear()
+        return overrun
+
+    # Returns a copy of all measurements that can be read while the loop keeps running
+    # no input parameters
+    # Return:
+    #     dictionary of uptime, counters, cycle summary, stage summaries and the slowest and last overrun cycles
+    def snapshot(self):
+        return {
+            'uptime': time.time() - self.startTime,
+            'counters': dict(self.counters),
+            'cycle': self.cycleHistogram.summary(),
+            'stages': {name: histogram.summary() for name, histogram in list(self.stageHistograms.items())},
+            'slowest cycle': self.slowestCycle,
+            'last overrun': self.lastOverrun
+        }
+
+
+# Returns the stage that took the longest in a cycle breakdown
+# Inputs:
+#     breakdown - cycle breakdown, see Instrumentation.record_cycle
+# Return:
+#     (stage name, duration in seconds), or None if no stage was timed
+def slowest_stage(breakdown):
+    if not breakdown or not breakdown['stages']:
+        return None
+    return max(breakdown['stages'].items(), key=lambda item: item[1])
+
+
+# Prints the measurements of an instrumentation snapshot as a report
+# Inputs:
+#     snapshot - instrumentation snapshot, see Instrumentation.snapshot
+# Return:
+#     None
+def print_report(snapshot):
+    print('\n====================================')
+    print('POLLING LOOP TIMING'.center(40))
+    print('====================================')
+    counters = snapshot['counters']
+    print(f"Cycles: {counters.get('cycles', 0)}, overruns: {counters.get('overruns', 0)}, "
+          f"uptime: {snapshot['uptime']:.1f}s")
+    for name, value in counters.items():
+        if name not in ('cycles', 'overruns'):
+            print(f'{name}: {value}')
+
+    print(f"\n{'stage':<18}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = dict(snapshot['stages'], cycle=snapshot['cycle'])
+    for name, summary in rows.items():
+        print(f"{name:<18}{summary['count']:>7}" +
+              ''.join(f"{summary[statistic] * 1000:>8.2f}ms" for statistic in ('mean', 'p50', 'p95', 'p99', 'max')))
+
+    for title in ('slowest cycle', 'last overrun'):
+        breakdown = snapshot[title]
+        stage = slowest_stage(breakdown)
+        if stage is not None:
+            stageBreakdown = ', '.join(f'{name} {duration:.3f}s' for name, duration in breakdown['stages'].items())
+            print(f"\n{title.capitalize()}: {breakdown['elapsed']:.3f}s at "
+                  f"{time.strftime('%H:%M:%S', time.localtime(breakdown['time']))}, mostly {stage[0]} ({stage[1]:.3f}s)")
+            print(f'    {stageBreakdown}')
+
+
+# instrumentation of the polling loop, always on
+pollingInstrumentation = Instrumentation()
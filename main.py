@@ -9,14 +9,76 @@
 # Last modified: 21 MAY 2023
 
 
+import argparse
+import os
 import system_menu as sm
+import metrics_server
+import board_workers
+import alert_system
 from pymata4 import pymata4
 
 
 # main function runs the main function required to operate the entire system
+# Command line options:
+#   --simulate - run against a simulated board instead of an Arduino
+#   --ports - run one worker process per Arduino on the given serial ports, each with one tank on the default pins
+#   --boards - with --simulate, run this many simulated boards in worker processes
+#   --metrics-port - serve tank readings and loop timings on http://127.0.0.1:<port>/metrics (and /metrics.json)
+#   --alert-port - also send every alert raised or cleared as a JSON datagram to UDP 127.0.0.1:<port>
 # no input parameters and return value
 def main():
-  sm.system_menu_and_data()
+  parser = argparse.ArgumentParser(description='Water Tank Operating System')
+  parser.add_argument('--simulate', action='store_true', help='run against a simulated board, no Arduino required')
+  parser.add_argument('--metrics-port', type=int, default=None,
+                      help='serve metrics on this localhost port (Prometheus text at /metrics, JSON at /metrics.json)')
+  parser.add_argument('--alert-port', type=int, default=None,
+                      help='send alerts as JSON datagrams to this localhost UDP port')
+  parser.add_argument('--ports', nargs='+', default=None, help='serial ports of several Arduinos, one worker process each')
+  parser.add_argument('--boards', type=int, default=None, help='number of simulated boards (with --simulate)')
+  args = parser.parse_args()
+  if args.metrics_port is not None:
+    host, port = metrics_server.start_metrics_server(args.metrics_port)
+    print(f'Metrics served at http://{host}:{port}/metrics')
+  if args.alert_port is not None:
+    alert_system.alertSocketAddress = ('127.0.0.1', args.alert_port)
+
+  if args.ports or (args.simulate and args.boards):
+    run_board_workers(args.ports, args.boards if args.simulate else None)
+  else:
+    sm.system_menu_and_data(args.simulate)
+
+
+# run_board_workers runs the tanks of several boards in one worker process per board, printing the alert roll-up
+# until CTRL+C
+# Inputs:
+#   ports - serial ports of the Arduinos, or None
+#   simulatedBoards - number of simulated boards, or None
+# Return:
+#   None
+def run_board_workers(ports, simulatedBoards):
+  sm.initialise_system_parameters()
+  parameters = {'tankHeight': sm.tankHeight, 'maxTankVolume': sm.maxTankVolume, 'motorSpeedLow': sm.motorSpeedLow,
+                'motorSpeedHigh': sm.motorSpeedHigh, 'pollingMinRate': sm.pollingMinRate,
+                'pollingMaxRate': sm.pollingMaxRate, 'tankGeometry': sm.tankGeometry}
+  if simulatedBoards:
+    boardConfigs = board_workers.simulated_board_configs(simulatedBoards, **parameters)
+  else:
+    boardConfigs = [{'port': port, 'tanks': [{'name': 'tank', 'parameters': parameters}]} for port in ports]
+
+  # the workers send their tanks' alerts to the parent, which writes them to the one alert log
+  os.makedirs(sm.telemetryLogDirectory, exist_ok=True)
+  alertSinks = [alert_system.ConsoleAlertSink(),
+                alert_system.LogAlertSink(os.path.join(sm.telemetryLogDirectory, 'alerts.log'))]
+  if alert_system.alertSocketAddress is not None:
+    alertSinks.append(alert_system.SocketAlertSink(alert_system.alertSocketAddress))
+  aggregator = board_workers.BoardAggregator(boardConfigs, sm.telemetryLogDirectory, alertSinks)
+  print(f'Running {len(boardConfigs)} boards in worker processes [CTRL+C to stop]')
+  aggregator.start()
+  try:
+    aggregator.run(reportInterval=5)
+  finally:
+    aggregator.stop()
+    board_workers.print_rollup(aggregator.alert_rollup())
 
 if __name__== '__main__':
     main()
\ No newline at end of file
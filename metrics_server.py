@@ -0,0 +1,178 @@
+# metrics_server.py
+# Serves the latest tank readings and polling loop timings over HTTP on localhost, for monitoring scrapers
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from instrumentation import pollingInstrumentation
+
+
+# latest tank readings published by the polling loop. The loop replaces the whole dictionary in one assignment and
+# never changes a published one, so the server threads can read it without a lock.
+tankSnapshot = {}
+# latest readings of every tank of a multi-board site, as {tank name: snapshot}, replaced as a whole the same way
+tankSnapshots = {}
+metricsServer = None
+metricsThread = None
+
+# tank readings exported as Prometheus gauges, as (snapshot key, metric name, help text)
+tankGauges = [
+    ('volume', 'tank_volume_litres', 'Tank water volume'),
+    ('level', 'tank_level_cm', 'Tank water level'),
+    ('stateCode', 'tank_state_code', 'Tank state code (see telemetry.stateCodes)'),
+    ('temperature', 'tank_temperature_celsius', 'Water temperature'),
+    ('rate', 'tank_volume_rate_litres_per_second', 'Rate of volume change'),
+    ('pwm', 'tank_pump_pwm', 'Pump PWM duty'),
+    ('timestamp', 'tank_last_update_timestamp_seconds', 'Unix time of the latest polling cycle')
+]
+
+
+# Publishes the latest tank readings to the metrics server. Called by the polling loop once per cycle; it only
+# swaps a reference, so the loop never waits for a scrape.
+# Inputs:
+#     snapshot - dictionary of the latest readings (keys as in tankGauges plus 'state'); must not be changed after
+# Return:
+#     None
+def publish_snapshot(snapshot):
+    global tankSnapshot
+    tankSnapshot = snapshot
+
+
+# Publishes the latest readings of one tank of a multi-board site. Called by the board aggregator for every record
+# it receives; the snapshots of the other tanks are carried over into a new dictionary, so the server threads never
+# see one being changed.
+# Inputs:
+#     tankName - name of the tank, e.g. "board 0 tank"
+#     snapshot - dictionary of the latest readings of the tank, see publish_snapshot
+# Return:
+#     None
+def publish_tank_snapshot(tankName, snapshot):
+    global tankSnapshots
+    snapshots = dict(tankSnapshots)
+    snapshots[tankName] = snapshot
+    tankSnapshots = snapshots
+
+
+# Builds the JSON document served at /metrics.json
+# no input parameters
+# Return:
+#     dictionary of the tank readings, the readings of every tank of a multi-board site and the polling loop timings
+def metrics_json():
+    instrumentationSnapshot = pollingInstrumentation.snapshot()
+    return {'tank': tankSnapshot, 'tanks': tankSnapshots, 'loop': instrumentationSnapshot}
+
+
+# Builds the Prometheus text exposition served at /metrics
+# no input parameters
+# Return:
+#     metrics text
+def metrics_text():
+    instrumentationSnapshot = pollingInstrumentation.snapshot()
+    lines = []
+
+    # the tanks of a multi-board site are told apart by a tank label, the single tank has none
+    snapshots = [(f'tank="{tankName}"', snapshot) for tankName, snapshot in sorted(tankSnapshots.items())]
+    if tankSnapshot:
+        snapshots.append(('', tankSnapshot))
+    for key, name, helpText in tankGauges:
+        values = [(labels, snapshot[key]) for labels, snapshot in snapshots if snapshot.get(key) is not None]
+        if not values:
+            continue
+        lines.append(f'# HELP {name} {helpText}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in values:
+            lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+    states = [(labels, snapshot['state']) for labels, snapshot in snapshots if 'state' in snapshot]
+    if states:
+        lines.append('# HELP tank_state Current tank state')
+        lines.append('# TYPE tank_state gauge')
+        for labels, state in states:
+            lines.append(f'tank_state{{{labels + "," if labels else ""}state="{state}"}} 1')
+
+    counters = instrumentationSnapshot['counters']
+    lines.append('# HELP tank_loop_events_total Polling loop events')
+    lines.append('# TYPE tank_loop_events_total counter')
+    for name, value in counters.items():
+        lines.append(f'tank_loop_events_total{{event="{name}"}} {value}')
+
+    # each log2 bucket bound of a histogram is the upper bound (le) of a Prometheus bucket
+    lines.append('# HELP tank_loop_stage_seconds Duration of the polling loop stages')
+    lines.append('# TYPE tank_loop_stage_seconds histogram')
+    stages = dict(instrumentationSnapshot['stages'], cycle=instrumentationSnapshot['cycle'])
+    for stage, summary in stages.items():
+        cumulativeCount = 0
+        for bound, bucketCount in sorted(summary['buckets'].items()):
+            cumulativeCount += bucketCount
+            lines.append(f'tank_loop_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulativeCount}')
+        lines.append(f'tank_loop_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {summary["count"]}')
+        lines.append(f'tank_loop_stage_seconds_sum{{stage="{stage}"}} {summary["mean"] * summary["count"]:.9f}')
+        lines.append(f'tank_loop_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+# MetricsRequestHandler answers GET /metrics (Prometheus text) and GET /metrics.json (JSON). Every request is
+# answered on a server thread from the published snapshot and never touches the board.
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            self.send_body(metrics_text().encode(), 'text/plain; version=0.0.4; charset=utf-8')
+        elif path == '/metrics.json':
+            self.send_body(json.dumps(metrics_json()).encode(), 'application/json')
+        else:
+            self.send_error(404, 'Use /metrics or /metrics.json')
+
+    # Sends a 200 response
+    # Inputs:
+    #     body - response body, bytes
+    #     contentType - content type of the body
+    # Return:
+    #     None
+    def send_body(self, body, contentType):
+        self.send_response(200)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # scrapes are not logged to the console, which belongs to the system menu
+    def log_message(self, format, *args):
+        pass
+
+
+# Starts the metrics server on a daemon thread
+# Inputs:
+#     port - TCP port to listen on
+#     host - address to bind to, localhost by default
+# Return:
+#     address (host, port) the server listens on
+def start_metrics_server(port, host='127.0.0.1'):
+    global metricsServer, metricsThread
+    if metricsServer is not None:
+        return metricsServer.server_address
+    metricsServer = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    metricsServer.daemon_threads = True
+    metricsThread = threading.Thread(target=metricsServer.serve_forever, daemon=True)
+    metricsThread.start()
+    return metricsServer.server_address
+
+
+# Stops the metrics server, if it is running
+# no input parameters and no return value
+def stop_metrics_server():
+    global metricsServer, metricsThread
+    if metricsServer is None:
+        return
+    metricsServer.shutdown()
+    metricsServer.server_close()
+    metricsThread.join()
+    metricsServer = None
+    metricsThread = None
@@ -11,8 +11,150 @@
 
 
 from pymata4 import pymata4
+import threading
 import time
-import system_menu
+from tank_states import defaultParameters
+
+
+
+# MotorController drives a bi-directional motor through the L293D without ever blocking its caller. command()
+# only records the target direction and PWM duty; a scheduler thread moves the motor towards the target. The duty
+# is ramped by rampStep every rampInterval (soft start and stop), a change of direction first ramps the duty to 0,
+# waits deadTime with the driver off, switches 1A and 2A and then ramps up again. A reversal at full speed, as in
+# fault recovery, therefore never switches the direction under load.
+# Inputs:
+#     board - the arduino board used
+#     en12Pin - L293D EN12 pin (PWM)
+#     pin1A - L293D 1A input
+#     pin2A - L293D 2A input
+#     rampStep - largest change of PWM duty per step
+#     rampInterval - time between ramp steps, s
+#     deadTime - time the driver is kept off before and after switching direction, s
+class MotorController:
+
+    def __init__(self, board, en12Pin=10, pin1A=9, pin2A=8, rampStep=25, rampInterval=0.02, deadTime=0.05):
+        self.board = board
+        self.en12Pin = en12Pin
+        self.pin1A = pin1A
+        self.pin2A = pin2A
+        self.rampStep = rampStep
+        self.rampInterval = rampInterval
+        self.deadTime = deadTime
+
+        self.condition = threading.Condition()
+        self.targetDirection = 'stop'
+        self.targetPwm = 0
+        self.currentDirection = 'stop'  # direction set on 1A and 2A
+        self.currentPwm = 0  # PWM duty last written to EN12
+        self.nextStepTime = 0
+        self.running = False
+        self.thread = None
+
+    # Sets up the motor pins with the motor off and starts the scheduler thread
+    # no input parameters and no return value
+    def setup(self):
+        self.close()
+        self.board.set_pin_mode_pwm_output(self.en12Pin)
+        self.board.pwm_write(self.en12Pin, 0)
+        for pin in (self.pin1A, self.pin2A):
+            self.board.set_pin_mode_digital_output(pin)
+            self.board.digital_write(pin, 0)
+        self.targetDirection = self.currentDirection = 'stop'
+        self.targetPwm = self.currentPwm = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='motor', daemon=True)
+        self.thread.start()
+
+    # Sets the target of the motor and returns at once
+    # Inputs:
+    #     direction - 'clockwise', 'anticlockwise' or 'stop'
+    #     duty - target PWM duty (ignored for 'stop')
+    # Return:
+    #     None
+    def command(self, direction, duty=0):
+        with self.condition:
+            if direction == 'stop':
+                # the direction pins are left as they are, the motor is stopped by ramping the duty down
+                self.targetDirection = self.currentDirection
+                self.targetPwm = 0
+            else:
+                self.targetDirection = direction
+                self.targetPwm = duty
+            self.condition.notify()
+
+    # Returns whether the motor has reached its target
+    # no input parameters
+    # Return:
+    #     True if the motor runs in the target direction at the target duty
+    def settled(self):
+        with self.condition:
+            return self.currentPwm == self.targetPwm and \
+                (self.targetPwm == 0 or self.currentDirection == self.targetDirection)
+
+    # Waits until the motor has reached its target, e.g. before the board is shut down
+    # Inputs:
+    #     timeout - longest time to wait, s
+    # Return:
+    #     True if the target was reached
+    def wait_settled(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(self.settled, timeout)
+
+    # Scheduler thread: makes one step towards the target every time a step is due
+    # no input parameters and no return value
+    def run(self):
+        with self.condition:
+            while self.running:
+                now = time.monotonic()
+                if self.settled():
+                    self.condition.wait()
+                elif now < self.nextStepTime:
+                    self.condition.wait(self.nextStepTime - now)
+                else:
+                    self.nextStepTime = now + self.step()
+                    # wakes wait_settled
+                    self.condition.notify_all()
+
+    # Makes one step towards the target. Called by the scheduler thread with the condition held.
+    # no input parameters
+    # Return:
+    #     time until the next step is due, s
+    def step(self):
+        if self.targetPwm > 0 and self.currentDirection != self.targetDirection:
+            if self.currentPwm > 0:
+                # ramp down before the direction is switched
+                self.write_pwm(max(self.currentPwm - self.rampStep, 0))
+                return self.deadTime if self.currentPwm == 0 else self.rampInterval
+            self.board.digital_write(self.pin1A, 1 if self.targetDirection == 'anticlockwise' else 0)
+            self.board.digital_write(self.pin2A, 1 if self.targetDirection == 'clockwise' else 0)
+            self.currentDirection = self.targetDirection
+            return self.deadTime
+        if self.currentPwm < self.targetPwm:
+            self.write_pwm(min(self.currentPwm + self.rampStep, self.targetPwm))
+        else:
+            self.write_pwm(max(self.currentPwm - self.rampStep, self.targetPwm))
+        return self.rampInterval
+
+    # Writes the PWM duty of EN12
+    # Inputs:
+    #     duty - PWM duty
+    # Return:
+    #     None
+    def write_pwm(self, duty):
+        self.board.pwm_write(self.en12Pin, duty)
+        self.currentPwm = duty
+
+    # Turns the motor off at once and stops the scheduler thread
+    # no input parameters and no return value
+    def close(self):
+        with self.condition:
+            if not self.running:
+                return
+            self.running = False
+            self.targetPwm = 0
+            self.condition.notify_all()
+        self.thread.join()
+        self.write_pwm(0)
 
 
 
@@ -28,28 +170,39 @@ def motor_setup(board):
     pin1A = 9       # PIN2 1A input
     pin2A = 8       # PIN7 2A input
 
-    global motorSpeedHigh, motorSpeedLow, motorFullSpeed
-    motorFullSpeed = 250
-    motorSpeedHigh = 175
-    motorSpeedLow = 125
+    global motorSpeedHigh, motorSpeedLow, motorFullSpeed, motorController
+    motorFullSpeed = defaultParameters['motorFullSpeed']
+    motorSpeedHigh = defaultParameters['motorSpeedHigh']
+    motorSpeedLow = defaultParameters['motorSpeedLow']
     motorPins = [en12Pin,pin1A,pin2A]
 
-    # pin setup 
-    for i in range(len(motorPins)):
-        if i == 0:
-            board.set_pin_mode_pwm_output(motorPins[i])
-            board.pwm_write(motorPins[i], 0)
-        else:
-            board.set_pin_mode_digital_output(motorPins[i])
-            board.digital_write(motorPins[i], 0)
+    # pin setup, the controller ramps the motor from here on
+    if 'motorController' in globals():
+        motorController.close()
+    motorController = MotorController(board, en12Pin, pin1A, pin2A)
+    motorController.setup()
             
     print('MOTOR setup complete.')
     print(f'Allocated pins [EN12A, 1A, 2A]: {motorPins}')
 
 
 
+# motor_speed_duty function is used to get the PWM duty of a speed setting
+# Inputs:
+#     speed - the speed of the motor activation, among high or low or full speed
+# Return:
+#     PWM duty
+def motor_speed_duty(speed):
+    if speed == "LOW":
+        return motorSpeedLow
+    elif speed == "HIGH":
+        return motorSpeedHigh
+    return motorFullSpeed
+
+
+
 # motor_clockwise_control function is used to activate the 5V DC motor to turn in the clockwise direction
-# according to the speed "high" or "low"
+# according to the speed "high" or "low". The motor controller ramps to the speed, the call returns at once.
 # Inputs:
 #     board - the arduino board used
 #     speed - the speed of the motor activation, among high or low or full speed
@@ -57,18 +210,7 @@ def motor_setup(board):
 #     None
 def motor_clockwise_control(board, speed):
 
-    global pin1A,pin2A,en12Pin
-    global motorSpeedHigh, motorSpeedLow, motorFullSpeed
-
-    board.digital_write(pin1A, 0)
-    board.digital_write(pin2A, 1)
-    time.sleep(0.01)
-    if speed == "LOW":
-        board.pwm_write(en12Pin, motorSpeedLow)
-    elif speed == "HIGH":
-        board.pwm_write(en12Pin, motorSpeedHigh)
-    else:
-        board.pwm_write(en12Pin, motorFullSpeed)
+    motorController.command('clockwise', motor_speed_duty(speed))
 
     print(
     f'PUMP ACTIVATED: Motor turning in CLOCKWISE direction and in {speed} speed.')
@@ -76,7 +218,8 @@ def motor_clockwise_control(board, speed):
 
 
 # motor_anticlockwise_control function is used to activate the 5V DC motor to 
-# turn in the anticlockwise direction according to the speed "high" or "low" or "full"
+# turn in the anticlockwise direction according to the speed "high" or "low" or "full".
+# The motor controller ramps to the speed, the call returns at once.
 # Inputs:
 #     board - the arduino board used
 #     speed - the speed of the motor activation, either high or low
@@ -84,18 +227,7 @@ def motor_clockwise_control(board, speed):
 #     None
 def motor_anticlockwise_control(board, speed):
 
-    global pin1A,pin2A,en12Pin
-    global motorSpeedHigh, motorSpeedLow, motorFullSpeed
-
-    board.digital_write(pin1A, 1)
-    board.digital_write(pin2A, 0)
-    time.sleep(0.01)
-    if speed == "LOW":
-        board.pwm_write(en12Pin, motorSpeedLow)
-    elif speed == "HIGH":
-        board.pwm_write(en12Pin, motorSpeedHigh)
-    else:
-        board.pwm_write(en12Pin, motorFullSpeed)
+    motorController.command('anticlockwise', motor_speed_duty(speed))
 
     print(
     f'PUMP ACTIVATED: Motor turning in ANTICLOCKWISE direction and in {speed} speed.')
@@ -103,19 +235,16 @@ def motor_anticlockwise_control(board, speed):
 
 
         
-# motor_stop_control function is used to deactivate the 5V DC motor 
+# motor_stop_control function is used to deactivate the 5V DC motor. The motor controller ramps the motor down,
+# the call returns at once.
 # Inputs:
 #     board - the arduino board used
 # Return:
 #     None        
 def motor_stop_control(board):
 
-    global pin1A,pin2A,en12Pin
-    global motorSpeedHigh, motorSpeedLow
-
-    board.pwm_write(en12Pin, 0)
+    motorController.command('stop')
     print("PUMP DEACTIVATED. MOTOR turning off...")
-    time.sleep(0.01)
 
         
 
@@ -141,6 +270,7 @@ if __name__ == '__main__':
             # time.sleep(3)
         except KeyboardInterrupt:
             motor_stop_control(board)
+            motorController.wait_settled(2)
             break
 
     board.shutdown()
\ No newline at end of file
@@ -0,0 +1,234 @@
+# polling_scheduler.py
+# Runs the polling loop at a fixed period against monotonic deadlines, each task at its own rate, shedding
+# optional work to meet the deadlines
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import threading
+import time
+from instrumentation import LatencyHistogram
+
+
+# PollingScheduler releases one polling cycle every period, on a grid of monotonic release times, so the time
+# between two samples is the period plus a small jitter whatever the cycle did. A cycle has until its release time
+# plus the deadline to finish. A cycle that is released late because the previous one ran past the period is not
+# followed by a burst of catch-up cycles: the missed releases are skipped.
+# The tasks of a cycle are run through run_task. A task with a rate in taskRates only runs in the cycles it is due
+# in, at most once per its rate, and the value it last returned stands in for it in the other cycles, so slow
+# changing readings such as the water temperature are not sampled every cycle. A caller that must not act on a
+# stale value twice (e.g. a fault check) asks ran_task whether the task ran in the current cycle. An optional task
+# (display refresh, temperature sampling, console output) is also skipped when its estimated duration would take
+# the cycle past the deadline. Tasks of a cycle may be run from several threads (e.g. overlapping sensor windows),
+# the task bookkeeping is kept under a lock while the tasks themselves run outside it.
+# Inputs:
+#     period - time between cycle releases, s (pollingMinRate)
+#     deadline - time after its release a cycle must finish by, s (pollingMaxRate)
+#     instrumentation - Instrumentation the shed work is counted in, None for none
+#     taskRates - dictionary of {task name: time between runs of the task, s}; tasks not in it, or with a rate of
+#                 0, run every cycle
+class PollingScheduler:
+
+    # weight of the latest duration in the estimate of an optional task
+    estimateWeight = 0.25
+
+    def __init__(self, period, deadline, instrumentation=None, taskRates=None):
+        if period <= 0:
+            raise ValueError("Polling period must be positive")
+        self.period = period
+        self.deadline = max(deadline, period)
+        self.instrumentation = instrumentation
+        self.taskRates = dict(taskRates or {})
+        self.lock = threading.Lock()
+        self.reset()
+
+    # Clears the schedule and the statistics, e.g. at the start of a polling session
+    # no input parameters and no return value
+    def reset(self):
+        self.nextRelease = None
+        self.releaseTime = None
+        self.cycleStart = None
+        self.interval = None
+        self.estimates = {}  # optional task: estimated duration, s
+        self.shed = {}  # optional task: cycles it was skipped in
+        self.lastRuns = {}  # task: release time of the cycle it last ran in
+        self.results = {}  # task: value it last returned
+        self.cached = {}  # task: cycles its last value stood in for it
+        self.missedReleases = 0
+        self.overruns = 0
+        self.jitterHistogram = LatencyHistogram()
+        self.busyHistogram = LatencyHistogram()
+        self.minInterval = None
+        self.maxInterval = None
+
+    # Waits for the release time of the next cycle. The first cycle is released at once.
+    # no input parameters and no return value
+    def wait_next(self):
+        if self.nextRelease is not None:
+            delay = self.nextRelease - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    # Starts a cycle: records its release jitter and the interval since the previous cycle and schedules the next
+    # release
+    # no input parameters
+    # Return:
+    #     interval - time since the start of the previous cycle, s (None for the first cycle)
+    def start_cycle(self):
+        now = time.monotonic()
+        releaseTime = now if self.nextRelease is None else self.nextRelease
+        self.jitterHistogram.record(int(abs(now - releaseTime) * 1e9))
+        self.interval = None if self.cycleStart is None else now - self.cycleStart
+        if self.interval is not None:
+            self.minInterval = self.interval if self.minInterval is None else min(self.minInterval, self.interval)
+            self.maxInterval = self.interval if self.maxInterval is None else max(self.maxInterval, self.interval)
+        self.releaseTime = releaseTime
+        self.cycleStart = now
+
+        # releases that have already passed are skipped rather than run back to back
+        self.nextRelease = releaseTime + self.period
+        if self.nextRelease < now:
+            missed = int((now - self.nextRelease) // self.period) + 1
+            self.missedReleases += missed
+            self.nextRelease += missed * self.period
+        return self.interval
+
+    # Returns the time left before the deadline of the current cycle
+    # no input parameters
+    # Return:
+    #     time left, s (negative once the deadline has passed)
+    def time_left(self):
+        if self.releaseTime is None:
+            return self.deadline
+        return self.releaseTime + self.deadline - time.monotonic()
+
+    # Returns whether a task is due in the current cycle
+    # Inputs:
+    #     name - name of the task
+    # Return:
+    #     True if the task has not run yet or its rate has passed since it last ran
+    def is_due(self, name):
+        with self.lock:
+            return self.task_due(name)
+
+    # Returns whether a task is due in the current cycle, with the lock held
+    # Inputs:
+    #     name - name of the task
+    # Return:
+    #     True if the task is due, see is_due
+    def task_due(self, name):
+        lastRun = self.lastRuns.get(name)
+        if lastRun is None or self.releaseTime is None:
+            return True
+        # half a period of tolerance keeps a task on the release grid despite jitter
+        return self.releaseTime - lastRun >= self.taskRates.get(name, 0) - self.period / 2
+
+    # Runs a task of the cycle if it is due and, for an optional task, if it fits before the deadline
+    # Inputs:
+    #     name - name of the task
+    #     function - function running the task
+    #     args - arguments of the function
+    #     optional - True if the task may be shed to meet the deadline
+    # Return:
+    #     result of the function, or the result of its last run if it was not run (None if it never ran)
+    def run_task(self, name, function, *args, optional=False):
+        with self.lock:
+            if not self.task_due(name):
+                self.cached[name] = self.cached.get(name, 0) + 1
+                return self.results.get(name)
+            shed = optional and self.estimates.get(name, 0) > self.time_left()
+            if shed:
+                self.shed[name] = self.shed.get(name, 0) + 1
+                lastResult = self.results.get(name)
+            releaseTime = self.releaseTime
+        if shed:
+            if self.instrumentation is not None:
+                self.instrumentation.count(f'shed {name}')
+            return lastResult
+        start = time.monotonic()
+        result = function(*args)
+        duration = time.monotonic() - start
+        with self.lock:
+            estimate = self.estimates.get(name)
+            self.estimates[name] = duration if estimate is None else \
+                estimate + self.estimateWeight * (duration - estimate)
+            self.lastRuns[name] = releaseTime
+            self.results[name] = result
+        return result
+
+    # Returns whether a task ran in the current cycle, rather than its last value standing in for it
+    # Inputs:
+    #     name - name of the task
+    # Return:
+    #     True if the task ran in the current cycle
+    def ran_task(self, name):
+        with self.lock:
+            return self.releaseTime is not None and self.lastRuns.get(name) == self.releaseTime
+
+    # Ends the cycle and records the time it was busy
+    # no input parameters
+    # Return:
+    #     True if the cycle finished after its deadline
+    def end_cycle(self):
+        now = time.monotonic()
+        self.busyHistogram.record(int((now - self.cycleStart) * 1e9))
+        overran = now > self.releaseTime + self.deadline
+        if overran:
+            self.overruns += 1
+        return overran
+
+    # Returns a copy of the scheduling statistics
+    # no input parameters
+    # Return:
+    #     dictionary of period, deadline, jitter and busy time summaries (see LatencyHistogram.summary), shortest
+    #     and longest interval, missed releases, overruns, the task rates, the cycles every optional task was shed in
+    #     and the cycles every task's last value stood in for it
+    def snapshot(self):
+        return {
+            'period': self.period,
+            'deadline': self.deadline,
+            'jitter': self.jitterHistogram.summary(),
+            'busy': self.busyHistogram.summary(),
+            'min interval': self.minInterval,
+            'max interval': self.maxInterval,
+            'missed releases': self.missedReleases,
+            'overruns': self.overruns,
+            'task rates': dict(self.taskRates),
+            'shed': self.copy_counts(self.shed),
+            'cached': self.copy_counts(self.cached)
+        }
+
+    # Copies a count dictionary of the scheduler under its lock
+    # Inputs:
+    #     counts - count dictionary
+    # Return:
+    #     copy of the counts
+    def copy_counts(self, counts):
+        with self.lock:
+            return dict(counts)
+
+
+# Prints the statistics of a polling scheduler
+# Inputs:
+#     snapshot - scheduler snapshot, see PollingScheduler.snapshot
+# Return:
+#     None
+def print_scheduler_report(snapshot):
+    print(f"\nSchedule: period {snapshot['period']}s, deadline {snapshot['deadline']}s, "
+          f"missed releases: {snapshot['missed releases']}, deadline overruns: {snapshot['overruns']}")
+    for title in ('jitter', 'busy'):
+        summary = snapshot[title]
+        print(f"{title:<18}{summary['count']:>7}" +
+              ''.join(f"{summary[statistic] * 1000:>8.2f}ms" for statistic in ('mean', 'p50', 'p95', 'p99', 'max')))
+    if snapshot['min interval'] is not None:
+        print(f"Interval between cycles: {snapshot['min interval']:.4f}s - {snapshot['max interval']:.4f}s")
+    if snapshot['shed']:
+        print('Shed: ' + ', '.join(f'{name} {count}x' for name, count in snapshot['shed'].items()))
+    if snapshot['cached']:
+        print('Not due, last value used: ' +
+              ', '.join(f"{name} {count}x (every {snapshot['task rates'][name]}s)"
+                        for name, count in snapshot['cached'].items()))
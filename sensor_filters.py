@@ -0,0 +1,163 @@
+# sensor_filters.py
+# Streaming filters that smooth sensor readings as they arrive, in constant time and memory per reading
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import math
+import threading
+import time
+
+
+# Every filter is updated from the pymata4 reporter thread (the sensor callbacks) and read from the polling loop,
+# so each one guards its state with a lock. update() takes a reading and its timestamp and returns the new
+# estimate; estimate() returns the current estimate at any moment, None before the first reading.
+
+
+# EwmaFilter is an exponentially weighted moving average. With alpha, each reading moves the estimate by alpha of
+# its difference from the estimate. With timeConstant, the weighting follows time instead of reading count: the
+# estimate decays towards the latest reading with the time constant, which suits pymata4 callbacks that only
+# report a value when it changes (the reading is held until the next one).
+# Inputs:
+#     alpha - weight of each new reading, 0 - 1 (used when timeConstant is None)
+#     timeConstant - time constant of the average, in seconds
+class EwmaFilter:
+
+    def __init__(self, alpha=0.2, timeConstant=None):
+        self.alpha = alpha
+        self.timeConstant = timeConstant
+        self.lock = threading.Lock()
+        self.reset()
+
+    # Forgets all readings
+    # no input parameters and no return value
+    def reset(self):
+        with self.lock:
+            self.value = None
+            self.lastReading = None
+            self.timestamp = None
+
+    def update(self, reading, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            if self.value is None:
+                self.value = float(reading)
+            elif self.timeConstant is None:
+                self.value += self.alpha * (reading - self.value)
+            else:
+                # the previous reading was held since the last update
+                self.value = self.held_value(timestamp)
+            self.lastReading = reading
+            self.timestamp = timestamp
+            return self.value
+
+    def estimate(self, timestamp=None):
+        with self.lock:
+            if self.value is None or self.timeConstant is None:
+                return self.value
+            return self.held_value(time.time() if timestamp is None else timestamp)
+
+    # Returns the estimate after the latest reading has been held until a given time. Called with the lock held.
+    # Inputs:
+    #     timestamp - time of the estimate
+    # Return:
+    #     estimate at that time
+    def held_value(self, timestamp):
+        decay = math.exp(-max(timestamp - self.timestamp, 0) / self.timeConstant)
+        return self.lastReading + (self.value - self.lastReading) * decay
+
+
+# MovingAverageFilter is the average of the latest windowSize readings. The readings are kept in a ring buffer
+# with a running sum, so an update is one subtraction and one addition; the sum is recomputed once per pass of
+# the ring to stop floating point drift.
+# Inputs:
+#     windowSize - number of readings averaged
+class MovingAverageFilter:
+
+    def __init__(self, windowSize=8):
+        self.windowSize = windowSize
+        self.lock = threading.Lock()
+        self.reset()
+
+    # Forgets all readings
+    # no input parameters and no return value
+    def reset(self):
+        with self.lock:
+            self.readings = [0.0] * self.windowSize
+            self.count = 0
+            self.index = 0
+            self.total = 0.0
+            self.timestamp = None
+
+    def update(self, reading, timestamp=None):
+        with self.lock:
+            self.total += reading - self.readings[self.index]
+            self.readings[self.index] = reading
+            self.index += 1
+            if self.index == self.windowSize:
+                self.index = 0
+                self.total = math.fsum(self.readings)
+            self.count = min(self.count + 1, self.windowSize)
+            self.timestamp = time.time() if timestamp is None else timestamp
+            return self.total / self.count
+
+    def estimate(self, timestamp=None):
+        with self.lock:
+            return self.total / self.count if self.count else None
+
+
+# AlphaBetaFilter tracks a value and its rate of change, e.g. a water level that the pump raises or lowers
+# steadily. Each reading corrects the predicted value by alpha of the residual and the rate by beta of the
+# residual per second; between readings the estimate is extrapolated along the rate.
+# Inputs:
+#     alpha - value correction gain, 0 - 1
+#     beta - rate correction gain, 0 - 1 (small compared to alpha)
+#     maxPrediction - longest time the estimate is extrapolated past the latest reading, in seconds
+class AlphaBetaFilter:
+
+    def __init__(self, alpha=0.5, beta=0.05, maxPrediction=2.0):
+        self.alpha = alpha
+        self.beta = beta
+        self.maxPrediction = maxPrediction
+        self.lock = threading.Lock()
+        self.reset()
+
+    # Forgets all readings
+    # no input parameters and no return value
+    def reset(self):
+        with self.lock:
+            self.value = None
+            self.rate = 0.0
+            self.timestamp = None
+
+    def update(self, reading, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            if self.value is None:
+                self.value = float(reading)
+                self.timestamp = timestamp
+                return self.value
+            dt = timestamp - self.timestamp
+            if dt <= 0:
+                # a reading with the same timestamp only corrects the value
+                self.value += self.alpha * (reading - self.value)
+                return self.value
+            predicted = self.value + self.rate * min(dt, self.maxPrediction)
+            residual = reading - predicted
+            self.value = predicted + self.alpha * residual
+            self.rate += self.beta * residual / dt
+            self.timestamp = timestamp
+            return self.value
+
+    def estimate(self, timestamp=None):
+        with self.lock:
+            if self.value is None:
+                return None
+            dt = (time.time() if timestamp is None else timestamp) - self.timestamp
+            return self.value + self.rate * min(max(dt, 0), self.maxPrediction)
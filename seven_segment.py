@@ -10,6 +10,8 @@
 
 from pymata4 import pymata4
 import time
+import threading
+import functools
 
 
 
@@ -71,6 +73,29 @@ digitMap = {
 
 
 decimalIndex = 7    # index of decimal bit 
+frameBits = 15    # bits per digit frame: 8 segment bits, 4 digit select bits, 3 LED bits
+
+# precompiled integer codes, bit 0 of each code is the last character of its binary string
+charCodeMap = {char: int(code, 2) for char, code in charMap.items()}
+digitCodeMap = {digit: int(code, 2) for digit, code in digitMap.items()}
+decimalMask = 1 << (7 - decimalIndex)
+ledCodeMap = {
+    # LED bits appended after the digit select bits
+    "Low": 0b100,  # yellow LED
+    "High": 0b100,
+    "Near empty": 0b010,  # red LED
+    "Near full": 0b010,
+    "Overfull": 0b001,  # blue LED
+    "Empty": 0b001,
+    "Within normal range": 0b000  # LEDs off
+}
+scrollDuration = 0.5    # display duration of each scrolling frame, in seconds
+batchedShiftOut = True    # send each display frame as one serial transaction when the board supports it
+
+# display service state, the latest (message, tankVolumeState) request is swapped in as a single tuple
+displayRequest = None
+displayThread = None
+displayStopEvent = threading.Event()
 
 
 # Sets up the seven-segment display.
@@ -83,131 +108,179 @@ def seven_segment_setup(board):
     ser = 5  # PIN14 SER data input
     rclk = 6  # PIN12 RCLK latch/reg clock
     srclk = 7  # PIN11 SRCLK clock
-    global ctrlPins
+    global ctrlPins, ctrlPort, ctrlMask
     ctrlPins = [ser, rclk, srclk]
+    # batched shift-out needs all control pins on the same digital port
+    ctrlPort = ser // 8 if rclk // 8 == ser // 8 == srclk // 8 else None
+    ctrlMask = sum(1 << (pin % 8) for pin in ctrlPins)
     for pin in ctrlPins:
         board.set_pin_mode_digital_output(pin)
         board.digital_write(pin, 0)
 
 
-# Function converts a message to be displayed by the seven segment display into a 2D list of binary codes 
+# Function converts a message to be displayed by the seven segment display into a 2D list of segment codes
 # Inputs:
 #     strInput - Message to be printed, type str
 # Return:
-#     segCodes - 2D list of converted binary codes, with each nested list sorted into groups of 4 for printing
+#     segCodes - 2D list of integer segment codes, with each nested list sorted into groups of 4 for printing
 def seven_seg_code(strInput):
-    msgCodes = []  # list of all binary codes
-    segCodes = []  # 2D array for 7seg display codes, sets of 4 (4 digits) or less
-    ind = 0
+    msgCodes = []  # list of all segment codes
 
-    # converting characters to binary code
-    strInput = strInput.upper()
-    for char in strInput:
+    # converting characters to segment codes
+    for char in strInput.upper():
         if char == '.':
-            decimalString = msgCodes[ind - 1]
-            decimalString = decimalString[:decimalIndex] + "1" + decimalString[decimalIndex+1:]
-            msgCodes[ind - 1] = decimalString
+            # set the decimal point of the previous character (or of a blank digit if there is none)
+            if msgCodes:
+                msgCodes[-1] |= decimalMask
+            else:
+                msgCodes.append(charCodeMap[" "] | decimalMask)
         else:
-            # append binary code to display list
-            msgCodes.append(charMap[char])
-        ind += 1
-
-    # generate scrolling text
-    tempList = []
-    tempMsgList = msgCodes
+            msgCodes.append(charCodeMap[char])
 
+    # generate scrolling text, sorted into windows of four
     if len(msgCodes) >= 4:
-        while len(tempMsgList) >= 4:
-            # sort into groups of four
-            for i in range(4):
-                tempList.append(tempMsgList[i])
-            tempMsgList.pop(0)
-            segCodes.append(tempList)
-            tempList = []
+        segCodes = [msgCodes[i:i + 4] for i in range(len(msgCodes) - 3)]
     else:
-        for i in range(len(msgCodes)):
-            tempList.append(tempMsgList[i])
-        segCodes.append(tempList)
-
-    # add empty space padding for messages with less than 4 chars
-    firstCodeSet = segCodes[0]
-    if len(firstCodeSet) < 4:
-        for i in range(4 - len(firstCodeSet)):
-            firstCodeSet.insert(0, charMap[" "])
+        # add empty space padding for messages with less than 4 chars
+        segCodes = [[charCodeMap[" "]] * (4 - len(msgCodes)) + msgCodes]
 
     return segCodes
 
-# Writes values to 1 seven-segment display digit through two shift registers
+
+# Function precompiles a message into complete shift register frames (segments, digit select and LED bits) for
+# the current tank state. Results are kept in an LRU cache, so repeated messages such as "5.23L" skip encoding.
+# Inputs:
+#     strInput - Message to be printed, type str
+#     tankVolumeState - current state in water tank
+# Return:
+#     frames - tuple of display frames, each a tuple of 4 integer digit frames
+@functools.lru_cache(maxsize=64)
+def seven_seg_frames(strInput, tankVolumeState="Within normal range"):
+    ledCode = ledCodeMap.get(tankVolumeState, 0)
+    frames = []
+    for segCodeSet in seven_seg_code(strInput):
+        frames.append(tuple(
+            (segCode << 7) | (digitCodeMap[digit] << 3) | ledCode
+            for digit, segCode in enumerate(segCodeSet)))
+    return tuple(frames)
+
+
+# Shifts one integer frame into the two shift registers, least significant bit first, and latches it
 # Inputs:
 #     board - current Arduino board
-#     segCode - segment code to be written onto display
-#     digit - digit of the 4-dig display to write segCode onto
-#     tankVolumeState - current state in the water tank
+#     frame - frame bits to be written, bit 0 is shifted first
+#     frameLength - number of bits in the frame
+#     latchDelay - time the latch is held high, in seconds
 # Return:
 #     None
-def write_segment(board, segCode, digit,tankVolumeState='Within normal range'):
-    # writes the code on each digit
+def write_frame(board, frame, frameLength=frameBits, latchDelay=0.01):
     global ctrlPins
     # push bits into sr
-    flashCode = segCode + digitMap[digit]
-    if tankVolumeState == 'Low' or tankVolumeState == "High":
-        # turn on yellow LED
-        flashCode += "100"
-    elif tankVolumeState == 'Near empty' or tankVolumeState == "Near full":
-        # turn on  red LED
-        flashCode += "010"
-    elif tankVolumeState == 'Overfull' or tankVolumeState == "Empty":
-        # turn on blue LED
-        flashCode += "001"
-    elif tankVolumeState == "Within normal range":
-        # turn off LEDs
-        flashCode += "000"
-
-    reversedflashCode = flashCode[::-1] # reverse list 
-    
-    # writing to 1 digit, 8 seg
-    for i in range(len(reversedflashCode)):
-  
-        board.digital_write(ctrlPins[0], int(reversedflashCode[i]))
+    for i in range(frameLength):
+        board.digital_write(ctrlPins[0], (frame >> i) & 1)
         # srclk to push/shift each ser bit
         board.digital_write(ctrlPins[2], 1)
         board.digital_write(ctrlPins[2], 0)
     # rclk (latch) to store all registered bits, displays them
     board.digital_write(ctrlPins[1], 1)
-    time.sleep(0.01)  # delay for proper display
+    if latchDelay:
+        time.sleep(latchDelay)  # delay for proper display
     board.digital_write(ctrlPins[1], 0)
-    
+
+
+# Builds the digital port states that shift a sequence of frames out of the control pins and latch each one.
+# SER changes together with the falling SRCLK edge of the previous bit and the latch rises together with the last
+# falling SRCLK edge, so a 15 bit frame takes 32 port writes instead of 47 pin writes.
+# Inputs:
+#     frames - tuple of integer frames, bit 0 of each frame is shifted first
+#     frameLength - number of bits in each frame
+#     pins - (ser, rclk, srclk) control pins
+# Return:
+#     portStates - tuple of control pin port values, in the order they are to be written
+@functools.lru_cache(maxsize=64)
+def shift_out_port_states(frames, frameLength, pins):
+    serBit, rclkBit, srclkBit = [1 << (pin % 8) for pin in pins]
+    portStates = []
+    for frame in frames:
+        for i in range(frameLength):
+            serState = serBit if (frame >> i) & 1 else 0
+            # SER set with SRCLK low, then the rising SRCLK edge shifts the bit in
+            for state in (serState, serState | srclkBit):
+                if not portStates or portStates[-1] != state:
+                    portStates.append(state)
+        # rclk (latch) to store all registered bits, displays them
+        portStates.append(serState | rclkBit)
+        portStates.append(serState)
+    return tuple(portStates)
+
+
+# Writes a sequence of frames (e.g. one frame per digit of a 4-digit refresh) to the shift registers, each shown
+# for latchDelay. When the board supports it every frame is sent as one batched serial write and then held, so all
+# the digits of a refresh are lit for the same time; otherwise each frame falls back to write_frame.
+# Inputs:
+#     board - current Arduino board
+#     frames - tuple of integer frames to be written
+#     frameLength - number of bits in each frame
+#     latchDelay - display time of each frame, in seconds
+# Return:
+#     None
+def write_frames(board, frames, frameLength=frameBits, latchDelay=0.01):
+    portWriter = getattr(board, 'write_digital_port_sequence', None)
+    if batchedShiftOut and portWriter is not None and ctrlPort is not None:
+        for frame in frames:
+            portStates = shift_out_port_states((frame,), frameLength, tuple(ctrlPins))
+            if portWriter(ctrlPort, ctrlMask, portStates) is None:
+                # the board has no batched write support, which is known at the first frame
+                break
+            if latchDelay:
+                time.sleep(latchDelay)  # delay for proper display
+        else:
+            return
+
+    for frame in frames:
+        write_frame(board, frame, frameLength, latchDelay)
+
+
+# Writes values to 1 seven-segment display digit through two shift registers
+# Inputs:
+#     board - current Arduino board
+#     segCode - integer segment code to be written onto display
+#     digit - digit of the 4-dig display to write segCode onto
+#     tankVolumeState - current state in the water tank
+# Return:
+#     None
+def write_segment(board, segCode, digit,tankVolumeState='Within normal range'):
+    frame = (segCode << 7) | (digitCodeMap[digit] << 3) | ledCodeMap.get(tankVolumeState, 0)
+    write_frame(board, frame)
+
 # Function iterates through the 4 digits of the seven segment display and writes a scrolling display message onto each digit
 # Inputs:
 #     board - current Arduino board
-#     segCodes - 2D array of segment codes to be displayed
-#     tankVolumeState - current state in water tank
+#     frames - precompiled display frames to be displayed
 # Return:
 #     None
-def write_4_digits_scrolling(board, segCodes,tankVolumeState):
+def write_4_digits_scrolling(board, frames):
     # display duration for each set, in seconds
-    dispDuration = 0.5
+    dispDuration = scrollDuration
     # elapsed duration
     currDuration = 0
     # display scrolling message
-    for i in range(len(segCodes)):
+    for frame in frames:
         start = time.time()
         while currDuration < dispDuration:
-            for j in range(len(segCodes[i])):
-                write_segment(board,segCodes[i][j],j,tankVolumeState)
-                end = time.time()
-                currDuration = end - start
+            write_frames(board, frame)
+            end = time.time()
+            currDuration = end - start
         # reset timer
         currDuration = 0
 
 # Function iterates through the 4 digits of the seven segment display and writes a 4-character message (or less) onto each digit
 # Inputs:
 #     board - current Arduino board
-#     segCodes - 2D array of binary codes to be displayed
-#     tankVolumeState - current state in water tank
+#     frames - precompiled display frames to be displayed
 # Return:
 #     None
-def write_4_digits_no_scroll(board, segCodes,tankVolumeState):
+def write_4_digits_no_scroll(board, frames):
     # display duration, in seconds
     dispDuration = 1
     # elapsed duration
@@ -215,8 +288,7 @@ def write_4_digits_no_scroll(board, segCodes,tankVolumeState):
     # display scrolling message
     start = time.time()
     while currDuration < dispDuration:
-        for i in range(len(segCodes[0])):
-            write_segment(board, segCodes[0][i], i,tankVolumeState)
+        write_frames(board, frames[0])
         end = time.time()
         currDuration = end - start
     
@@ -229,32 +301,90 @@ def write_4_digits_no_scroll(board, segCodes,tankVolumeState):
 # Return:
 #     None
 def disp_seven_segment(board, strInput,tankVolumeState="Within normal range"):
-    segCodes = seven_seg_code(strInput)
-    if len(segCodes) > 1:
-        write_4_digits_scrolling(board, segCodes,tankVolumeState)
+    frames = seven_seg_frames(strInput, tankVolumeState)
+    if len(frames) > 1:
+        write_4_digits_scrolling(board, frames)
     else:
-        write_4_digits_no_scroll(board, segCodes,tankVolumeState)
+        write_4_digits_no_scroll(board, frames)
     time.sleep(0.1)  # process delay before initiating shutdown
 
 
+# Starts the display service, a background thread that owns the shift register pins and keeps refreshing the
+# 4 digits with the latest posted message, so the caller never has to wait for the display multiplexing.
+# Inputs:
+#     board - current Arduino board
+#     strInput - message to be displayed until a new one is posted
+#     tankVolumeState - current state in water tank
+# Return:
+#     None
+def start_display_service(board, strInput=" ", tankVolumeState="Within normal range"):
+    global displayRequest, displayThread
+    if displayThread is not None and displayThread.is_alive():
+        post_display_message(strInput, tankVolumeState)
+        return
+
+    displayRequest = (strInput, tankVolumeState)
+    displayStopEvent.clear()
+    displayThread = threading.Thread(target=display_service_loop, args=(board,), daemon=True)
+    displayThread.start()
+
+
+# Posts a new message to the display service and returns immediately. The service picks it up on its next refresh.
+# Inputs:
+#     strInput - message string to be displayed
+#     tankVolumeState - current state in water tank
+# Return:
+#     None
+def post_display_message(strInput, tankVolumeState="Within normal range"):
+    global displayRequest
+    displayRequest = (strInput, tankVolumeState)
+
+
+# Stops the display service and waits for its thread to finish, handing the shift register pins back to the caller.
+# no input parameters and no return value
+def stop_display_service():
+    global displayThread
+    if displayThread is None:
+        return
+    displayStopEvent.set()
+    displayThread.join()
+    displayThread = None
+
+
+# Refresh loop run by the display service thread. Multiplexes the 4 digits continuously; messages longer than
+# 4 digits scroll one frame every scrollDuration seconds.
+# Inputs:
+#     board - current Arduino board
+# Return:
+#     None
+def display_service_loop(board):
+    currentRequest = None
+    while not displayStopEvent.is_set():
+        request = displayRequest
+        # only look up the frames when a new message has been posted
+        if request != currentRequest:
+            newMessage = currentRequest is None or request[0] != currentRequest[0]
+            currentRequest = request
+            frames = seven_seg_frames(*request)
+            # a new message starts scrolling from the beginning, a new tank state only changes the LEDs
+            if newMessage or frameIndex >= len(frames):
+                frameIndex = 0
+                frameStart = time.time()
+        elif len(frames) > 1 and time.time() - frameStart >= scrollDuration:
+            frameIndex = (frameIndex + 1) % len(frames)
+            frameStart = time.time()
+
+        write_frames(board, frames[frameIndex])
+
+
 # Turn off the seven segment display
 # Inputs: 
 #     board - current Arduino board
 # Return:
 #     None
 def write_segment_off(board):
-    # writes the code on each digit
-    global ctrlPins
-    # push bits into sr
-    # writing to 1 digit, 8 seg
-    for i in range(16):
-        board.digital_write(ctrlPins[0], 0)
-        # srclk to push/shift each ser bit
-        board.digital_write(ctrlPins[2], 1)
-        board.digital_write(ctrlPins[2], 0)
-    # rclk (latch) to store all registered bits, displays them
-    board.digital_write(ctrlPins[1], 1)
-    board.digital_write(ctrlPins[1], 0)
+    # clear both shift registers (16 bits) without holding the latch
+    write_frames(board, (0,), 16, 0)
 
 
 
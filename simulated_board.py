@@ -0,0 +1,250 @@
+# simulated_board.py
+# A simulated Arduino board that stands in for pymata4.Pymata4 so the tank system can run without hardware
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import collections
+import math
+import random
+import threading
+import time
+from pymata4.private_constants import PrivateConstants
+from tank_geometry import TankGeometry
+
+
+# SimulatedBoard implements the part of the pymata4 API used by the tank system on top of a physical model of the
+# tank. The pump (L293D EN12 PWM and the 1A/2A direction pins) fills or drains the tank, the sonar on the trigger
+# pin reports the gap to the water surface and the thermistor on A0 reports the ADC value for the water
+# temperature. Every command is encoded and counted exactly as pymata4 would send it over serial, and every
+# digital and PWM write is recorded.
+# Inputs:
+#     tankBaseArea - base area of the simulated tank, cm^2 (used when no tankGeometry is given)
+#     tankHeight - height of the tank (and of the ultrasonic sensor above the base), cm
+#     initialLevel - water level at start up, cm
+#     maxFlowRate - pump flow at full PWM (255), L/s
+#     leakRate - constant outflow through a leak, L/s
+#     waterTemperature - water temperature, degree celcius
+#     motorPins - (EN12, 1A, 2A) pins of the pump motor driver
+#     sonarNoise - standard deviation of the sonar reading, cm
+#     tickTime - physics and sensor update period, in seconds
+#     writeLatency - time each serial write takes, in seconds, to mimic the latency of a real serial link
+#     seed - random seed for the sensor noise
+#     tankGeometry - level to volume table of the simulated tank, a prism of tankBaseArea by default
+class SimulatedBoard:
+
+    def __init__(self, tankBaseArea=24 * 24, tankHeight=21, initialLevel=10, maxFlowRate=0.05, leakRate=0,
+                 waterTemperature=25, motorPins=(10, 9, 8), sonarNoise=0, tickTime=0.05, writeLatency=0,
+                 seed=None, tankGeometry=None):
+        self.tankBaseArea = tankBaseArea
+        self.tankHeight = tankHeight
+        self.tankGeometry = tankGeometry or TankGeometry('prism', tankHeight, tankBaseArea)
+        self.volume = self.tankGeometry.volume_at(initialLevel)  # L
+        self.maxFlowRate = maxFlowRate
+        self.leakRate = leakRate
+        self.waterTemperature = waterTemperature
+        self.en12Pin, self.pin1A, self.pin2A = motorPins
+        self.sonarNoise = sonarNoise
+        self.tickTime = tickTime
+        self.writeLatency = writeLatency
+        self.random = random.Random(seed)
+
+        # pin state, as held by the board
+        self.digitalOutputPortPins = [0] * 16
+        self.pwmValues = {}
+        self.analogPins = {}  # pin: [callback, differential, value, timestamp]
+        self.sonarPins = {}  # trigger pin: [callback, distance, timestamp]
+
+        # serial traffic and write records
+        self.transactions = 0
+        self.messages = 0
+        self.bytesSent = 0
+        self.digitalWriteCount = 0
+        self.pwmWriteCount = 0
+        # latest writes, as (timestamp, 'digital', port, port value) or (timestamp, 'pwm', pin, value)
+        self.pinWrites = collections.deque(maxlen=100000)
+
+        self.lock = threading.RLock()
+        self.stopEvent = threading.Event()
+        self.lastTick = time.monotonic()
+        self.physicsThread = threading.Thread(target=self.physics_loop, daemon=True)
+        self.physicsThread.start()
+
+    # pymata4 API used by the tank system, with the same signatures and return values as pymata4.Pymata4
+    def set_pin_mode_digital_output(self, pin_number):
+        self._send_command([PrivateConstants.SET_PIN_MODE, pin_number, PrivateConstants.OUTPUT])
+
+    def set_pin_mode_pwm_output(self, pin_number):
+        self._send_command([PrivateConstants.SET_PIN_MODE, pin_number, PrivateConstants.PWM])
+
+    def set_pin_mode_analog_input(self, pin_number, callback=None, differential=1):
+        with self.lock:
+            value = self.analogPins.get(pin_number, [None, differential, self.thermistor_adc(), 0])[2]
+            self.analogPins[pin_number] = [callback, differential, value, time.time()]
+        self._send_command([PrivateConstants.SET_PIN_MODE, pin_number + 14, PrivateConstants.ANALOG,
+                            PrivateConstants.REPORT_ANALOG + pin_number, PrivateConstants.REPORTING_ENABLE])
+
+    def set_pin_mode_sonar(self, trigger_pin, echo_pin, callback=None, timeout=80000):
+        # pymata4 ignores a repeated request for the same trigger pin
+        if trigger_pin in self.sonarPins:
+            return
+        with self.lock:
+            self.sonarPins[trigger_pin] = [callback, self.sonar_distance(), time.time()]
+        self._send_command([PrivateConstants.SET_PIN_MODE, trigger_pin, PrivateConstants.SONAR,
+                            PrivateConstants.SET_PIN_MODE, echo_pin, PrivateConstants.SONAR,
+                            PrivateConstants.START_SYSEX, PrivateConstants.SONAR_CONFIG, trigger_pin, echo_pin,
+                            timeout & 0x7f, (timeout >> 7) & 0x7f, PrivateConstants.END_SYSEX])
+
+    def digital_write(self, pin, value):
+        port = pin // 8
+        mask = 1 << (pin % 8)
+        if value == 1:
+            portValue = self.digitalOutputPortPins[port] | mask
+        else:
+            portValue = self.digitalOutputPortPins[port] & ~mask
+        self._send_command([PrivateConstants.DIGITAL_MESSAGE + port, portValue & 0x7f, (portValue >> 7) & 0x7f])
+
+    def pwm_write(self, pin, value):
+        self._send_command([PrivateConstants.PWM_MESSAGE + pin, value & 0x7f, (value >> 7) & 0x7f])
+
+    def analog_read(self, pin):
+        analogPin = self.analogPins.get(pin)
+        if analogPin is None:
+            return 0, 0
+        return analogPin[2], analogPin[3]
+
+    def sonar_read(self, trigger_pin):
+        sonarPin = self.sonarPins.get(trigger_pin)
+        if sonarPin is None:
+            return [0, 0]
+        return [sonarPin[1], sonarPin[2]]
+
+    def shutdown(self):
+        self.stopEvent.set()
+        self.physicsThread.join()
+
+    # Decodes and applies the Firmata messages of one serial write, counting the traffic. Digital and PWM messages
+    # update the simulated pins, configuration messages are only counted.
+    # Inputs:
+    #     command - bytes of one or more Firmata messages
+    # Return:
+    #     number of bytes sent
+    def _send_command(self, command):
+        command = bytes(command)
+        with self.lock:
+            self.transactions += 1
+            self.bytesSent += len(command)
+            now = time.time()
+            i = 0
+            while i < len(command):
+                commandByte = command[i]
+                if commandByte == PrivateConstants.START_SYSEX:
+                    i = command.index(PrivateConstants.END_SYSEX, i) + 1
+                elif PrivateConstants.DIGITAL_MESSAGE <= commandByte < PrivateConstants.DIGITAL_MESSAGE + 16:
+                    port = commandByte - PrivateConstants.DIGITAL_MESSAGE
+                    portValue = command[i + 1] | (command[i + 2] << 7)
+                    self.digitalOutputPortPins[port] = portValue
+                    self.digitalWriteCount += 1
+                    self.pinWrites.append((now, 'digital', port, portValue))
+                    i += 3
+                elif PrivateConstants.PWM_MESSAGE <= commandByte < PrivateConstants.PWM_MESSAGE + 16:
+                    pin = commandByte - PrivateConstants.PWM_MESSAGE
+                    self.pwmValues[pin] = command[i + 1] | (command[i + 2] << 7)
+                    self.pwmWriteCount += 1
+                    self.pinWrites.append((now, 'pwm', pin, self.pwmValues[pin]))
+                    i += 3
+                elif PrivateConstants.REPORT_ANALOG <= commandByte < PrivateConstants.REPORT_DIGITAL + 16:
+                    i += 2
+                elif commandByte == PrivateConstants.SET_PIN_MODE:
+                    i += 3
+                else:
+                    i += 1
+                self.messages += 1
+            if self.writeLatency:
+                time.sleep(self.writeLatency)
+        return len(command)
+
+    # Returns the current value of a digital output pin
+    # Inputs:
+    #     pin - digital pin number
+    # Return:
+    #     pin value, 0 or 1
+    def digital_pin_value(self, pin):
+        return (self.digitalOutputPortPins[pin // 8] >> (pin % 8)) & 1
+
+    # Returns the flow into the tank produced by the pump. Clockwise (1A low, 2A high) fills the tank,
+    # anticlockwise (1A high, 2A low) drains it, equal direction pins stop the motor.
+    # no input parameters
+    # Return:
+    #     pump flow into the tank, L/s (negative when draining)
+    def pump_flow(self):
+        direction = self.digital_pin_value(self.pin2A) - self.digital_pin_value(self.pin1A)
+        return direction * self.maxFlowRate * min(self.pwmValues.get(self.en12Pin, 0), 255) / 255
+
+    # Returns the water level of the simulated tank
+    # no input parameters
+    # Return:
+    #     water level, cm
+    def water_level(self):
+        return self.tankGeometry.level_at(self.volume)
+
+    # Returns the distance the sonar reports: the gap to the water surface plus the 1 cm between the bottom of the
+    # sensor and the point where the sound is emitted, rounded to whole centimetres like FirmataExpress
+    # no input parameters
+    # Return:
+    #     sonar distance, cm
+    def sonar_distance(self):
+        gap = self.tankHeight - self.water_level() + 1
+        if self.sonarNoise:
+            gap += self.random.gauss(0, self.sonarNoise)
+        return max(int(round(gap)), 0)
+
+    # Returns the 10-bit ADC value of the thermistor divider for the water temperature, the inverse of the
+    # conversion in thermistor.py (5 V supply, 10 kOhm fixed resistor, +2 degree calibration offset)
+    # no input parameters
+    # Return:
+    #     ADC value, 0 - 1023
+    def thermistor_adc(self):
+        rThermistor = 1000 * math.exp((72.203 - (self.waterTemperature - 2)) / 21.21)
+        vOut = 5 * rThermistor / (10000 + rThermistor)
+        return min(max(int(round(vOut * 1023 / 5)), 0), 1023)
+
+    # Advances the tank model by one tick and reports the sensor values that changed through their callbacks,
+    # as the pymata4 reporter thread would
+    # no input parameters and no return value
+    def tick(self):
+        now = time.monotonic()
+        callbacks = []
+        with self.lock:
+            dt = now - self.lastTick
+            self.lastTick = now
+            self.volume += (self.pump_flow() - self.leakRate) * dt
+            self.volume = min(max(self.volume, 0), self.tankGeometry.capacity)
+
+            timestamp = time.time()
+            distance = self.sonar_distance()
+            for triggerPin, sonarPin in self.sonarPins.items():
+                if sonarPin[1] != distance:
+                    sonarPin[1], sonarPin[2] = distance, timestamp
+                    if sonarPin[0]:
+                        callbacks.append((sonarPin[0], [PrivateConstants.SONAR, triggerPin, distance, timestamp]))
+
+            adcValue = self.thermistor_adc()
+            for pin, analogPin in self.analogPins.items():
+                if abs(adcValue - analogPin[2]) >= analogPin[1]:
+                    analogPin[2], analogPin[3] = adcValue, timestamp
+                    if analogPin[0]:
+                        callbacks.append((analogPin[0], [PrivateConstants.ANALOG, pin, adcValue, timestamp]))
+
+        for callback, data in callbacks:
+            callback(data)
+
+    # Runs the tank model every tickTime seconds until the board is shut down. Runs on the physics thread.
+    # no input parameters and no return value
+    def physics_loop(self):
+        while not self.stopEvent.wait(self.tickTime):
+            self.tick()
@@ -0,0 +1,189 @@
+# state_tracker.py
+# Tracks how long the tank has been in its current state and keeps a run-length encoded history of its states
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from telemetry import tankStates, stateCodes, unknownStateCode
+
+
+# StateHistory stores the tank state history run-length encoded, as one (state code, start time, duration) record
+# per episode of a state instead of one entry per sample, so its memory grows with the number of state changes
+# rather than with the polling time. The records are kept in compact typed arrays ordered by start time, so the
+# episodes in a time range are found by binary search and every query only visits those episodes. Once maxRuns is
+# exceeded the oldest half of the records are dropped.
+# Inputs:
+#     maxRuns - number of episodes kept
+class StateHistory:
+
+    def __init__(self, maxRuns=10000):
+        self.maxRuns = maxRuns
+        self.reset()
+
+    # Clears the history
+    # no input parameters and no return value
+    def reset(self):
+        self.codes = array('b')
+        self.starts = array('d')
+        self.durations = array('d')
+
+    def __len__(self):
+        return len(self.codes)
+
+    # Records the state of a sample: extends the current episode or starts a new one
+    # Inputs:
+    #     state - tank state of the sample (see telemetry.tankStates)
+    #     timestamp - time of the sample, s
+    # Return:
+    #     True if a new episode was started
+    def record(self, state, timestamp):
+        code = stateCodes.get(state, unknownStateCode)
+        if self.codes and self.codes[-1] == code:
+            self.durations[-1] = timestamp - self.starts[-1]
+            return False
+        if self.codes:
+            # the previous episode lasted until the new state was seen
+            self.durations[-1] = timestamp - self.starts[-1]
+        if len(self.codes) >= self.maxRuns:
+            dropped = len(self.codes) - self.maxRuns // 2
+            del self.codes[:dropped], self.starts[:dropped], self.durations[:dropped]
+        self.codes.append(code)
+        self.starts.append(timestamp)
+        self.durations.append(0.0)
+        return True
+
+    # Returns the episodes that overlap a time range, clipped to the range
+    # Inputs:
+    #     startTime - start of the range, s (None for the start of the history)
+    #     endTime - end of the range, s (None for the end of the history)
+    # Return:
+    #     list of (state, start time, duration) of every episode, oldest first
+    def episodes(self, startTime=None, endTime=None):
+        first = 0 if startTime is None else max(bisect_right(self.starts, startTime) - 1, 0)
+        last = len(self.codes) if endTime is None else bisect_left(self.starts, endTime)
+        episodes = []
+        for index in range(first, last):
+            start = self.starts[index]
+            end = start + self.durations[index]
+            if startTime is not None:
+                if end < startTime:
+                    continue
+                start = max(start, startTime)
+            if endTime is not None:
+                end = min(end, endTime)
+            code = self.codes[index]
+            episodes.append((tankStates[code] if 0 <= code < len(tankStates) else 'Unknown', start, end - start))
+        return episodes
+
+    # Counts the episodes of every state in a time range
+    # Inputs:
+    #     startTime, endTime - time range, see episodes
+    # Return:
+    #     dictionary of {state: number of episodes}
+    def state_counts(self, startTime=None, endTime=None):
+        counts = {}
+        for state, _, _ in self.episodes(startTime, endTime):
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    # Adds up the time spent in every state in a time range
+    # Inputs:
+    #     startTime, endTime - time range, see episodes
+    # Return:
+    #     dictionary of {state: time, s}
+    def time_in_states(self, startTime=None, endTime=None):
+        times = {}
+        for state, _, duration in self.episodes(startTime, endTime):
+            times[state] = times.get(state, 0.0) + duration
+        return times
+
+    # Finds the longest episode in a time range
+    # Inputs:
+    #     state - only episodes of this state are considered, None for every state
+    #     startTime, endTime - time range, see episodes
+    # Return:
+    #     (state, start time, duration) of the longest episode, None if there is none
+    def longest_episode(self, state=None, startTime=None, endTime=None):
+        episodes = [episode for episode in self.episodes(startTime, endTime) if state is None or episode[0] == state]
+        return max(episodes, key=lambda episode: episode[2], default=None)
+
+
+# StateDurationTracker holds only the current tank state and the time it was entered, so the time spent in the
+# current state is a subtraction however long the state has lasted and no per-cycle history is needed. Every
+# episode of a state is kept in a run-length encoded StateHistory.
+# Inputs:
+#     maxRuns - number of episodes kept in the history
+class StateDurationTracker:
+
+    def __init__(self, maxRuns=10000):
+        self.history = StateHistory(maxRuns)
+        self.reset()
+
+    # Forgets the current state and the history, e.g. at the start of a polling session
+    # no input parameters and no return value
+    def reset(self):
+        self.state = None
+        self.entryTime = None
+        self.history.reset()
+
+    # Records the state of a sample
+    # Inputs:
+    #     state - tank state of the sample
+    #     timestamp - time of the sample, s
+    # Return:
+    #     time the tank has been in the state, s (0 when it has just entered it)
+    def update(self, state, timestamp):
+        if state != self.state or self.entryTime is None:
+            self.state = state
+            self.entryTime = timestamp
+        self.history.record(state, timestamp)
+        return timestamp - self.entryTime
+
+    # Returns the time the tank has been in its current state
+    # Inputs:
+    #     timestamp - current time, s
+    # Return:
+    #     time in the current state, s (0 if no state has been recorded)
+    def duration(self, timestamp):
+        if self.entryTime is None:
+            return 0
+        return timestamp - self.entryTime
+
+    # Returns the state changes
+    # no input parameters
+    # Return:
+    #     list of (state, entry time, duration) of every episode, oldest first
+    def transitions(self):
+        return self.history.episodes()
+
+
+# Prints the state timeline of a time range: every episode, then the episodes, total time and longest episode of
+# every state
+# Inputs:
+#     history - StateHistory
+#     startTime, endTime - time range, see StateHistory.episodes
+#     maxEpisodes - number of latest episodes listed
+# Return:
+#     None
+def print_state_timeline(history, startTime=None, endTime=None, maxEpisodes=20):
+    episodes = history.episodes(startTime, endTime)
+    print(f"\n{'start':<10}{'duration':>10}  state")
+    if len(episodes) > maxEpisodes:
+        print(f'... {len(episodes) - maxEpisodes} earlier episodes')
+    for state, start, duration in episodes[-maxEpisodes:]:
+        print(f"{time.strftime('%H:%M:%S', time.localtime(start)):<10}{duration:>9.1f}s  {state}")
+
+    counts = history.state_counts(startTime, endTime)
+    times = history.time_in_states(startTime, endTime)
+    print(f"\n{'state':<22}{'episodes':>9}{'total':>10}{'longest':>10}")
+    for state in tankStates + ['Unknown']:
+        if state in counts:
+            longest = history.longest_episode(state, startTime, endTime)
+            print(f"{state:<22}{counts[state]:>9}{times[state]:>9.1f}s{longest[2]:>9.1f}s")
@@ -8,23 +8,39 @@
 #           5. VINCENT LAW YUN KAE
 # Last modified: 21 MAY 2023
 
+import os
 import time
 import matplotlib.pyplot as plt
+import numpy as np
 import tank_operations
 from pymata4 import pymata4
 import seven_segment
 import motor
 import alert_system as rov
+import ultrasonic
+import thermistor
+import analytics
+from board_guard import BoardGuard
+from simulated_board import SimulatedBoard
+from tank_geometry import TankGeometry
+from tank_states import defaultParameters
+from instrumentation import pollingInstrumentation, print_report
+from polling_scheduler import print_scheduler_report
+from state_tracker import print_state_timeline
+from telemetry import tankStates
 
 
 # system_menu_and_data is a function that displays a user-interface system that allows the user to choose and
 # switch between modes: tank operation, system settings, data observation, admin access, and quit program
-# no input parameters and no return value
-def system_menu_and_data():
+# Input:
+#  simulated - run against a simulated board instead of an Arduino
+# Return:
+#  None
+def system_menu_and_data(simulated=False):
 
     global password, adminMasterKey, tempAdminStatus
 
-    system_start_up()
+    system_start_up(simulated)
     while True:
 
         try:
@@ -374,6 +390,10 @@ def update_system_setting():
                         validate_input(prompt, acceptedValues, "int"))
                     newParam = observationTime
 
+                # the level to volume table depends on the tank dimensions
+                if userParamChoice in ("1", "2"):
+                    build_tank_geometry()
+
                 # update confirmation message
                 print('\n\nUpdating parameter..\n\n')
                 progress_bar(100)
@@ -543,24 +563,31 @@ def validate_input(inputPrompt, acceptableValues, type):
                 invalid = True
 
 
-# system_start_up is a function that initialises all global variables needed in the code, displays the default
-# parameters of the system and checks whether the user is a normal user or admin.
-# :return: None
-def system_start_up():
+# initialise_system_parameters is a function that initialises all global variables needed in the code to their
+# default values
+# no input parameters and return value
+def initialise_system_parameters():
 
     # initalises the required global variables
     global tankBaseArea, tankHeight, maxTankVolume, motorSpeedLow, motorSpeedHigh, pollingMinRate, pollingMaxRate, observationTime
+    global telemetryRetention, telemetryLogDirectory, tankShape, tankDimensions, taskRates
     global password, adminMasterKey, lockOut, errorCount, lockOutTimeSecond, adminStatus,adminLockOutTime,tempAdminStatus
-    global board
 
-    tankBaseArea = 24 * 24  # cm^2
-    tankHeight = 21  # cm
-    maxTankVolume = 10  # L
-    motorSpeedLow = 90  # PWM
-    motorSpeedHigh = 250  # PWM
-    pollingMinRate = 1  # s
-    pollingMaxRate = 5  # s
+    tankShape = 'prism'  # see tank_geometry.tankShapes
+    tankDimensions = {}  # dimensions other shapes need, e.g. {'length': 40} or {'bottomRadius': 5, 'topRadius': 15} (cm)
+    tankBaseArea = defaultParameters['tankBaseArea']  # cm^2
+    tankHeight = defaultParameters['tankHeight']  # cm
+    maxTankVolume = defaultParameters['maxTankVolume']  # L
+    motorSpeedLow = defaultParameters['motorSpeedLow']  # PWM
+    motorSpeedHigh = defaultParameters['motorSpeedHigh']  # PWM
+    pollingMinRate = defaultParameters['pollingMinRate']  # s
+    pollingMaxRate = defaultParameters['pollingMaxRate']  # s
     observationTime = 20  # s
+    telemetryRetention = 86400  # number of polling cycles kept for data observation
+    telemetryLogDirectory = 'telemetry_logs'  # every polling session is logged to a file in this directory
+    # time between runs of each polling loop task, s; 0 runs the task every cycle. The water temperature changes over
+    # minutes while the level changes over seconds.
+    taskRates = {'temperature': 30, 'sonar': 0, 'display': 0, 'rate': 0, 'alerts': 0}
     lockOut = False
 
     #For marking and testing purposes, lock out time can be modified here
@@ -573,6 +600,48 @@ def system_start_up():
     tempAdminStatus = False
     adminStatus = False
 
+    build_tank_geometry()
+
+
+# build_tank_geometry is a function that builds the level to volume table of the tank from the tank shape and
+# dimensions. It is called again whenever the tank dimensions change.
+# no input parameters and return value
+def build_tank_geometry():
+    global tankGeometry
+    tankGeometry = TankGeometry(tankShape, tankHeight, tankBaseArea, **tankDimensions)
+
+
+# board_setup is a function that sets up all tank components (motor, seven segment display, alert system and sensors)
+# on the board
+# Input:
+#  board - the arduino board used
+# Return:
+#  None
+def board_setup(board):
+    motor.motor_setup(board)
+    seven_segment.seven_segment_setup(board)
+    # alerts raised and cleared are kept in a log next to the telemetry logs
+    os.makedirs(telemetryLogDirectory, exist_ok=True)
+    rov.alert_setup(board, os.path.join(telemetryLogDirectory, 'alerts.log'))
+    # the sensors report continuously from here on, the polling loop only reads their filtered values
+    ultrasonic.ultrasonic_setup(board)
+    print('ULTRASONIC SENSOR setup complete.')
+    thermistor.thermistor_setup(board)
+    print('THERMISTOR setup complete.')
+
+
+# system_start_up is a function that initialises all global variables needed in the code, sets up the board, displays
+# the default parameters of the system and checks whether the user is a normal user or admin.
+# Input:
+#  simulated - run against a simulated board (tank physics, sonar and thermistor) instead of an Arduino
+# :return: None
+def system_start_up(simulated=False):
+
+    global password, adminMasterKey, tempAdminStatus, adminStatus
+    global board
+
+    initialise_system_parameters()
+
     # printing start up screen
     print('====================================')
     print('TANK MONITORING SYSTEM'.center(40))
@@ -580,12 +649,13 @@ def system_start_up():
     time.sleep(1)
     print('\nSystem starting up...\n\n')
     progress_bar(100)
-    board = pymata4.Pymata4()
-    motor.motor_setup(board)
-    seven_segment.seven_segment_setup(board)
-    rov.alert_setup(board)
-    print('ULTRASONIC SENSOR setup complete.')
-    print('THERMISTOR setup complete.')
+    # guarded so the concurrent sensor acquisition in the polling loop can share the serial link
+    if simulated:
+        print('SIMULATED BOARD selected: no Arduino required.')
+        board = BoardGuard(SimulatedBoard(tankBaseArea, tankHeight, tankGeometry=tankGeometry))
+    else:
+        board = BoardGuard(pymata4.Pymata4())
+    board_setup(board)
     print('\n\nSYSTEM START UP SUCCESSFUL. Displaying system parameters.')
     seven_segment.disp_seven_segment(board,"WELCOME")
     # displays default system paramters
@@ -724,7 +794,7 @@ def admin_access():
 
 
 # data_observation is a function to enable visualisation of the water volume of the tank through a formatted
-# graph. The graph is plotted based on data from elaspedTimeList and tankWaterVolumeList in the last 20 seconds
+# graph. The graph is plotted based on the telemetry store of the polling loop in the last observationTime seconds
 # no input parameters and return value
 def data_observation():
 
@@ -740,60 +810,81 @@ def data_observation():
             1 Water Volume against Time
             2 Rate of Change of Water Volume against Time 
             3 Water Level against Time
-            4 return to system menu
+            4 Polling Loop Timing
+            5 Tank State Timeline
+            6 return to system menu
                                 """)
-            prompt = "Please select mode (1/2/3/4): "
-            acceptedValues = ["1", "2", "3", "4"]
+            prompt = "Please select mode (1/2/3/4/5/6): "
+            acceptedValues = ["1", "2", "3", "4", "5", "6"]
 
             user = validate_input(prompt, acceptedValues, "int")
 
+            # option: return to system menu, the telemetry store is not needed
+            if user == "6":
+                print('\n\nReturning to system menu...\n')
+                progress_bar(100)
+                return
+
+            # stage timings are kept for every cycle, no observation window is needed
+            if user == "4":
+                print_report(pollingInstrumentation.snapshot())
+                if tank_operations.pollingScheduler is not None:
+                    print_scheduler_report(tank_operations.pollingScheduler.snapshot())
+                time.sleep(1)
+                continue
+
+            # the state history is run-length encoded over the whole session, no observation window is needed
+            if user == "5":
+                stateHistory = tank_operations.stateTracker.history
+                if len(stateHistory) == 0:
+                    print("NO DATA COLLECTED: Please go to tank operation to collect enough data.")
+                    time.sleep(1)
+                    continue
+                print('\n\nTank state timeline of the polling session...\n')
+                print_state_timeline(stateHistory)
+                print("NOTICE: Please close the graph to continue using the system")
+                progress_bar(100)
+                # one row per state, one bar per episode
+                episodes = stateHistory.episodes()
+                sessionStartTime = episodes[0][1]
+                states = [state for state in tankStates + ['Unknown'] if any(episode[0] == state for episode in episodes)]
+                for row, state in enumerate(states):
+                    plt.broken_barh([(start - sessionStartTime, max(duration, 0.1))
+                                     for episodeState, start, duration in episodes if episodeState == state],
+                                    (row - 0.4, 0.8))
+                plt.yticks(range(len(states)), states)
+                plt.xlabel("Time (second, s)")
+                plt.title("Tank State Timeline")
+                graphName = "Tank_State_Timeline.png"
+                plt.tight_layout()
+                plt.savefig(graphName)
+                plt.show()
+                continue
+
             # check if enough data for plotting
-            if sum(tank_operations.elapsedTimeList) < observationTime:
+            telemetryStore = tank_operations.telemetryStore
+            latestTime = telemetryStore.latest('timestamp')
+            if latestTime is None or telemetryStore.totalTime < observationTime or len(telemetryStore) < 2:
                 print(
                     f"INSUFFICIENT DATA: Polling duration must exceed {observationTime}s"
                 )
                 time.sleep(1)
                 print('\n\nReturning to system menu...\n')
                 progress_bar(100)
-            else:
-                # filter lists to contain only last 20s worth of data
-                plotElaspedTimeList = tank_operations.elapsedTimeList[:]
-                plotTankWaterVolumeList = tank_operations.tankWaterVolumeList[:]
-                plotRateOfVolumeChangeList = tank_operations.rateOfVolumeChangeList[:]
-                plotTankWaterLevelList = tank_operations.tankWaterLevelList[:]
-
-                while sum(plotElaspedTimeList) > observationTime:
-                    plotElaspedTimeList.pop(0)
-                    # retain last removed volume value for plotting
-                    lastPoppedVolume = plotTankWaterVolumeList.pop(0)
-                    lastPoppedRate = plotRateOfVolumeChangeList.pop(0)
-                    lastPoppedLevel = plotTankWaterLevelList.pop(0)
-
-                cumulativeTimeList = []
-                for timeIndex in range(len(plotElaspedTimeList)):
-                    cumulativeTimeList.append(
-                        plotElaspedTimeList[timeIndex] +
-                        sum(plotElaspedTimeList[0:timeIndex]))
-
-                # set reference origin
-                cumulativeTimeList.insert(0, 0)
-                cumulativeTimeList[-1] = observationTime
-                plotTankWaterVolumeList.insert(0, lastPoppedVolume)
-                plotRateOfVolumeChangeList.insert(0, lastPoppedRate)
-                plotTankWaterLevelList.insert(0, lastPoppedLevel)
+                return
+
+            # select the last observationTime seconds of data, keeping the sample before the window as the origin
+            window = telemetryStore.window(observationTime, includePrevious=True)
+            windowStartTime = latestTime - observationTime
+            cumulativeTimeList = np.maximum(window['timestamp'] - windowStartTime, 0)
 
             if user == "1":
                 print('\n\nSUFFICIENT DATA: Plotting Water Volume against Time graph...\n')
                 print(
                     "NOTICE: Please close the graph to continue using the system")
                 progress_bar(100)
-                while len(cumulativeTimeList) != len(plotTankWaterVolumeList):
-                    if len(cumulativeTimeList) > len(plotTankWaterVolumeList):
-                        cumulativeTimeList.pop(0)
-                    else:
-                        plotTankWaterVolumeList.pop(0)
                 # plotting Water Volume against Time graph
-                plt.plot(cumulativeTimeList, plotTankWaterVolumeList[0:len(cumulativeTimeList)], 'o-b')
+                plt.plot(cumulativeTimeList, window['volume'], 'o-b')
                 plt.xlabel("Time (second, s)")
                 plt.ylabel("Water Volume (litre, L)")
                 plt.title("Graph of Water Volume against Time (L/s)")
@@ -807,12 +898,10 @@ def data_observation():
                 print(
                     "NOTICE: Please close the graph to continue using the system")
                 progress_bar(100)   
-                while len(cumulativeTimeList) != len(plotRateOfVolumeChangeList):
-                    if len(cumulativeTimeList) > len(plotRateOfVolumeChangeList):
-                        cumulativeTimeList.pop(0)
-                    else:
-                        plotRateOfVolumeChangeList.pop(0)
-                plt.plot(cumulativeTimeList, plotRateOfVolumeChangeList[0:len(cumulativeTimeList)], 'o-b')
+                # rates over the whole window in one vectorised pass
+                plotRates = analytics.rate_of_change(window['timestamp'], window['volume'])
+                analytics.print_rate_statistics(analytics.rate_statistics(plotRates))
+                plt.plot(cumulativeTimeList, plotRates, 'o-b')
                 plt.xlabel("Time (second,s )")
                 plt.ylabel("Change In Water Volume (litre, L)")
                 plt.title("Graph of Rate of Change of Water Volume against Time (L/s^2)")
@@ -826,12 +915,7 @@ def data_observation():
                 print(
                     "NOTICE: Please close the graph to continue using the system")
                 progress_bar(100)   
-                while len(cumulativeTimeList) != len(plotTankWaterLevelList):
-                    if len(cumulativeTimeList) > len(plotTankWaterLevelList):
-                        cumulativeTimeList.pop(0)
-                    else:
-                        plotTankWaterLevelList.pop(0)
-                plt.plot(cumulativeTimeList, plotTankWaterLevelList[0:len(cumulativeTimeList)], 'o-b')
+                plt.plot(cumulativeTimeList, window['level'], 'o-b')
                 plt.xlabel("Time (second,s )")
                 plt.ylabel("Water Level (metre, m)")
                 plt.title("Graph of Water Level against Time (m/s)")
@@ -839,11 +923,6 @@ def data_observation():
                 plt.savefig(graphName)
                 plt.show()        
 
-            else:
-                print('\n\nReturning to system menu...\n')
-                progress_bar(100)
-                return
-
         except KeyboardInterrupt:
             print("\nKEYBOARD INTERRUPT DETECTED: Returning to system menu.")
             progress_bar(100)
@@ -886,9 +965,11 @@ def end_program():
     time.sleep(.5)
     print('SEVEN-SEGMENT DISPLAY turning off...')
     seven_segment.disp_seven_segment(board,"GOODBYE")
-    seven_segment.write_segment(board, "00000000", 'off')
+    seven_segment.write_segment_off(board)
     time.sleep(.8)
     print('ARDUINO BOARD shutting down...')
+    motor.motorController.close()
+    rov.alertEngine.stop()
     board.shutdown()
     time.sleep(.5)
     print("\n\nFeature shutdown complete. Ending program...\n\n")
@@ -0,0 +1,252 @@
+# tank_controller.py
+# Controls one tank with its own pins, parameters and telemetry, so several tanks can be run side by side
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import time
+import thermistor
+from alert_system import AlertEngine, ConsoleAlertSink, LogAlertSink, PinAlertSink, SocketAlertSink
+from instrumentation import Instrumentation
+from motor import MotorController
+from sensor_filters import AlphaBetaFilter, EwmaFilter
+from state_tracker import StateDurationTracker
+from tank_geometry import TankGeometry
+from tank_states import classify_tank_state, defaultParameters, pumpSettings, state_alerts, state_volume
+from telemetry import TelemetryStore, stateCodes, unknownStateCode
+import telemetry_log
+
+
+# pins of the single tank wired as in the rest of the system
+defaultPins = {
+    'trigger': 13,  # ultrasonic trigger
+    'echo': 12,  # ultrasonic echo
+    'thermistor': 0,  # analog pin
+    'en12': 10,  # L293D EN12 (PWM)
+    '1A': 9,  # L293D 1A
+    '2A': 8,  # L293D 2A
+    'alertRov': 11,  # rate of volume change alert
+    'alertState': 2,  # near empty / empty alert
+    'alertState5s': 3,  # tank state held for alertDelay alert
+    'alertEnable': 4  # alert system enable
+}
+
+# TankController runs the polling cycle of one tank: it reads the tank's sensors through its own filters,
+# classifies the state, drives its pump, checks the rate of volume change and records the cycle in its own
+# telemetry store. Its alerts are published to an alert engine of its own (see alert_system.AlertEngine), labelled
+# with the tank, which drives its alert pins and passes them on to the console, an alert log and a socket. It holds
+# no module-level state, so any number of controllers can share a board (on different pins) or each use their own
+# board. A cycle is run by poll(), which never waits on the sensors except for the optional sensorWindow.
+# Inputs:
+#     name - name of the tank
+#     board - board the tank is wired to (shared boards should be wrapped in a BoardGuard)
+#     pins - pin map of the tank, keys as in defaultPins
+#     tankGeometry - level to volume table of the tank, see tank_geometry.TankGeometry
+#     tankHeight - height of the ultrasonic sensor above the tank base, cm
+#     maxTankVolume - maximum tank volume, L
+#     motorSpeedLow - PWM duty of the LOW pump speed
+#     motorSpeedHigh - PWM duty of the HIGH pump speed
+#     pollingMinRate - period the tank is polled at, s
+#     pollingMaxRate - longest acceptable time between two polls, s
+#     limitRate - rate of volume change above which a fault is suspected, L/s
+#     sensorWindow - time the sensor filters are left to follow the sensors in each cycle, s
+#     motorRamp - dictionary of the rampStep, rampInterval and deadTime of the pump's motor controller
+#     telemetryRetention - number of cycles kept in the telemetry store
+#     logPath - path of a telemetry log file for the tank, None for no log
+#     alertLogPath - path of the alert log, which can be shared with other tanks; None for no log
+#     alertSocketAddress - socket address the alerts are sent to, see alert_system.SocketAlertSink; None for none
+#     alertSource - label of the tank's alerts, the tank name by default
+#     alertConsole - False to keep the alert warnings off the console
+#     alertSinks - further sinks the tank's alerts are passed on to, see alert_system.AlertEngine
+class TankController:
+
+    motorFullSpeed = defaultParameters['motorFullSpeed']
+
+    def __init__(self, name, board, pins=None, tankGeometry=None, tankHeight=defaultParameters['tankHeight'],
+                 maxTankVolume=defaultParameters['maxTankVolume'], motorSpeedLow=defaultParameters['motorSpeedLow'],
+                 motorSpeedHigh=defaultParameters['motorSpeedHigh'], pollingMinRate=defaultParameters['pollingMinRate'],
+                 pollingMaxRate=defaultParameters['pollingMaxRate'], limitRate=defaultParameters['limitRate'],
+                 sensorWindow=0, motorRamp=None, telemetryRetention=86400, logPath=None, alertLogPath=None,
+                 alertSocketAddress=None, alertSource=None, alertConsole=True, alertSinks=None):
+        self.name = name
+        self.board = board
+        self.pins = dict(defaultPins, **(pins or {}))
+        self.tankHeight = tankHeight
+        self.tankGeometry = tankGeometry or TankGeometry('prism', tankHeight, defaultParameters['tankBaseArea'])
+        self.maxTankVolume = maxTankVolume
+        self.motorSpeeds = {'LOW': motorSpeedLow, 'HIGH': motorSpeedHigh, 'FULL': self.motorFullSpeed}
+        self.pollingMinRate = pollingMinRate
+        self.pollingMaxRate = pollingMaxRate
+        self.limitRate = limitRate
+        self.sensorWindow = sensorWindow
+
+        self.distanceFilter = AlphaBetaFilter()
+        self.adcFilter = EwmaFilter(timeConstant=1.0)
+        self.motor = MotorController(board, self.pins['en12'], self.pins['1A'], self.pins['2A'], **(motorRamp or {}))
+        self.telemetryStore = TelemetryStore(telemetryRetention)
+        self.telemetryLog = telemetry_log.TelemetryLog(logPath) if logPath else None
+        self.instrumentation = Instrumentation()
+        self.alertLogPath = alertLogPath
+        self.alertSocketAddress = alertSocketAddress
+        self.alertSource = alertSource or name
+        self.alertConsole = alertConsole
+        self.alertSinks = list(alertSinks or [])
+        self.alertEngine = None
+
+        self.stateTracker = StateDurationTracker()
+        self.lastPollTime = None
+        self.latest = {}
+
+    # Sets up the tank's pins and starts its alert engine: the sensors report to this controller's callbacks from
+    # then on
+    # no input parameters and no return value
+    def setup(self):
+        pins = self.pins
+        self.motor.setup()
+        for pin in ('alertRov', 'alertState', 'alertState5s', 'alertEnable'):
+            self.board.set_pin_mode_digital_output(pins[pin])
+            self.board.digital_write(pins[pin], 0)
+
+        if self.alertEngine is not None:
+            self.alertEngine.stop()
+        sinks = [PinAlertSink(self.board, {'enable': pins['alertEnable'], 'rov': pins['alertRov'],
+                                           'state': pins['alertState'], 'state persistent': pins['alertState5s']})]
+        if self.alertConsole:
+            sinks.append(ConsoleAlertSink())
+        if self.alertLogPath is not None:
+            sinks.append(LogAlertSink(self.alertLogPath))
+        if self.alertSocketAddress is not None:
+            sinks.append(SocketAlertSink(self.alertSocketAddress))
+        sinks.extend(self.alertSinks)
+        self.alertEngine = AlertEngine(sinks, source=self.alertSource)
+        self.board.set_pin_mode_sonar(pins['trigger'], pins['echo'], self.sonar_callback, timeout=10000000)
+        self.board.set_pin_mode_analog_input(pins['thermistor'], self.thermistor_callback)
+
+    # Feeds a sonar report into the distance filter
+    # Inputs:
+    #     data - [pin_type=12, trigger pin number, distance, timestamp]
+    # Return:
+    #     None
+    def sonar_callback(self, data):
+        self.distanceFilter.update(data[2], data[3])
+
+    # Feeds a thermistor report into the ADC filter
+    # Inputs:
+    #     data - [pin_type=2, analog pin number, ADC value, timestamp]
+    # Return:
+    #     None
+    def thermistor_callback(self, data):
+        self.adcFilter.update(data[2], data[3])
+
+    # Reads the filtered sensor values, feeding in the values the board holds as pymata4 only calls back on changes
+    # no input parameters
+    # Return:
+    #     gapHeight - gap between the ultrasonic sensor and water level, cm
+    #     temp - water temperature, degree celcius
+    def read_sensors(self):
+        if self.sensorWindow > 0:
+            time.sleep(self.sensorWindow)
+        heldDistance, reportTime = self.board.sonar_read(self.pins['trigger'])
+        if reportTime:
+            self.distanceFilter.update(heldDistance)
+        heldValue, reportTime = self.board.analog_read(self.pins['thermistor'])
+        if reportTime:
+            self.adcFilter.update(heldValue)
+
+        distance = self.distanceFilter.estimate()
+        adcValue = self.adcFilter.estimate()
+        # 1 cm between the bottom of the ultrasonic sensor and the spot where the sonar wave is released
+        gapHeight = (heldDistance if distance is None else distance) - 1
+        temp = thermistor.adc_to_temperature(heldValue if adcValue is None else adcValue)
+        return gapHeight, temp
+
+    # Sets the pump's target, the motor controller ramps the pump to it without holding up the poll
+    # Inputs:
+    #     direction - 'clockwise' (fill), 'anticlockwise' (drain) or 'stop'
+    #     speed - 'LOW', 'HIGH' or 'FULL' (ignored for 'stop')
+    # Return:
+    #     None
+    def drive_pump(self, direction, speed):
+        self.motor.command(direction, 0 if direction == 'stop' else self.motorSpeeds[speed])
+
+    # Runs one polling cycle of the tank
+    # no input parameters
+    # Return:
+    #     latest - dictionary of the readings of the cycle (time, gap height, temperature, level, volume, state,
+    #              state time, rate, pwm, fault)
+    def poll(self):
+        instrumentation = self.instrumentation
+        startTime = time.time()
+        with instrumentation.stage('sensors'):
+            gapHeight, temp = self.read_sensors()
+
+        with instrumentation.stage('classification'):
+            level = self.tankHeight - gapHeight
+            volume = self.tankGeometry.volume_at(level)
+            state = (classify_tank_state(volume, self.maxTankVolume, self.tankGeometry.capacity)
+                     or self.stateTracker.state or '')
+            volume = state_volume(state, volume, self.maxTankVolume)
+            stateTime = self.stateTracker.update(state, startTime)
+
+        with instrumentation.stage('alert'):
+            stateAlert, persistentAlert = state_alerts(state, stateTime)
+            self.alertEngine.publish('enable', True)
+            self.alertEngine.publish('state persistent', persistentAlert, f"The tank has been {state} for more than 5s")
+            self.alertEngine.publish('state', stateAlert)
+
+        with instrumentation.stage('rate'):
+            previousVolume = self.telemetryStore.latest('volume')
+            elapsedTime = startTime - self.lastPollTime if self.lastPollTime is not None else None
+            rate = None
+            fault = False
+            if previousVolume is not None and elapsedTime:
+                rate = (volume - previousVolume) / elapsedTime
+                fault = abs(rate) > self.limitRate
+            self.alertEngine.publish('rov', fault,
+                                     "Rate of volume change exceeds normal amount. Please check for tank leaks/damages.")
+
+        with instrumentation.stage('pump'):
+            if fault:
+                # suspected leak or pump fault: the pump works against the change at full speed
+                self.drive_pump('anticlockwise' if rate > 0 else 'clockwise', 'FULL')
+                instrumentation.count('faults')
+            else:
+                self.drive_pump(*pumpSettings.get(state, ('stop', None)))
+
+        with instrumentation.stage('record'):
+            endTime = time.time()
+            self.telemetryStore.append(elapsedTime or 0, volume, level, state, rate)
+            if self.telemetryLog is not None:
+                self.telemetryLog.append(endTime, gapHeight, volume, level, stateCodes.get(state, unknownStateCode),
+                                         temp, rate, self.motor.currentPwm)
+
+        # the cycle time of a tank is the time between two polls, the polling rate it actually achieves
+        if elapsedTime is not None:
+            instrumentation.record_cycle(elapsedTime, self.pollingMaxRate)
+        self.lastPollTime = startTime
+        self.latest = {
+            'time': endTime, 'gapHeight': gapHeight, 'temperature': temp, 'level': level, 'volume': volume,
+            'state': state, 'stateTime': stateTime, 'rate': rate, 'pwm': self.motor.currentPwm, 'fault': fault
+        }
+        return self.latest
+
+    # Stops the pump and the alerts and closes the tank's telemetry log
+    # no input parameters and no return value
+    def stop(self):
+        self.drive_pump('stop', None)
+        self.motor.wait_settled(1)
+        self.motor.close()
+        if self.alertEngine is not None:
+            # the clears reach the alert log and socket before the engine stops
+            for kind in ('rov', 'state', 'state persistent', 'enable'):
+                self.alertEngine.publish(kind, False)
+            self.alertEngine.stop()
+            self.alertEngine = None
+        for pin in ('alertRov', 'alertState', 'alertState5s', 'alertEnable'):
+            self.board.digital_write(self.pins[pin], 0)
+        if self.telemetryLog is not None:
+            self.telemetryLog.close()
@@ -0,0 +1,93 @@
+# tank_geometry.py
+# Converts between water level and water volume for prism, horizontal cylinder and cone/frustum shaped tanks
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import numpy as np
+
+
+tankShapes = ['prism', 'horizontal cylinder', 'frustum']
+tableSize = 4096  # points in the level to volume table
+
+
+# TankGeometry holds a dense level to volume table of a tank, built once for its shape, and converts levels to
+# volumes and volumes to levels by linear interpolation in the table. A conversion costs the same for every shape,
+# and single readings and whole arrays of readings are converted alike. Levels outside the tank are clamped to
+# the bottom and the top of the tank, so a volume never exceeds the capacity; a level at or above the top reads
+# as the capacity, which tank_states.classify_tank_state treats as Overfull.
+# Inputs:
+#     shape - one of tankShapes:
+#             'prism' - vertical walls, baseArea
+#             'horizontal cylinder' - a cylinder on its side, diameter equal to height, length
+#             'frustum' - round tank tapering linearly from bottomRadius to topRadius (a cone when one is 0)
+#     height - height of the tank, cm
+#     baseArea - base area of a prism, cm^2
+#     length - length of a horizontal cylinder, cm
+#     bottomRadius - radius at the bottom of a frustum, cm
+#     topRadius - radius at the top of a frustum, cm
+#     tableSize - number of points in the level to volume table
+class TankGeometry:
+
+    def __init__(self, shape, height, baseArea=None, length=None, bottomRadius=None, topRadius=None,
+                 tableSize=tableSize):
+        if height <= 0:
+            raise ValueError("Tank height must be positive")
+        self.shape = shape
+        self.height = height
+        self.levels = np.linspace(0, height, tableSize)
+        self.volumes = shape_volumes(shape, self.levels, height, baseArea, length, bottomRadius, topRadius) / 1000
+        self.capacity = float(self.volumes[-1])
+
+    # Converts water levels to volumes
+    # Inputs:
+    #     level - water level in cm, a single value or an array
+    # Return:
+    #     volume in L, a float for a single value or a NumPy array
+    def volume_at(self, level):
+        volume = np.interp(level, self.levels, self.volumes)
+        return float(volume) if np.ndim(volume) == 0 else volume
+
+    # Converts water volumes to levels
+    # Inputs:
+    #     volume - water volume in L, a single value or an array
+    # Return:
+    #     level in cm, a float for a single value or a NumPy array
+    def level_at(self, volume):
+        level = np.interp(volume, self.volumes, self.levels)
+        return float(level) if np.ndim(level) == 0 else level
+
+
+# Calculates the exact volume of a tank shape filled to each of the given levels
+# Inputs:
+#     shape, height, baseArea, length, bottomRadius, topRadius - see TankGeometry
+#     levels - NumPy array of water levels from 0 to height, cm
+# Return:
+#     NumPy array of volumes, cm^3
+def shape_volumes(shape, levels, height, baseArea=None, length=None, bottomRadius=None, topRadius=None):
+    if shape == 'prism':
+        if baseArea is None:
+            raise ValueError("A prism tank needs a baseArea")
+        return levels * baseArea
+
+    if shape == 'horizontal cylinder':
+        if length is None:
+            raise ValueError("A horizontal cylinder tank needs a length")
+        # area of the circular segment below the water surface, times the length
+        radius = height / 2
+        depth = np.clip(levels, 0, height) - radius
+        segmentAreas = (radius ** 2 * np.arccos(-depth / radius)
+                        + depth * np.sqrt(np.maximum(radius ** 2 - depth ** 2, 0)))
+        return segmentAreas * length
+
+    if shape == 'frustum':
+        if bottomRadius is None or topRadius is None:
+            raise ValueError("A frustum tank needs a bottomRadius and a topRadius")
+        surfaceRadii = bottomRadius + (topRadius - bottomRadius) * levels / height
+        return np.pi * levels * (bottomRadius ** 2 + bottomRadius * surfaceRadii + surfaceRadii ** 2) / 3
+
+    raise ValueError(f"Unknown tank shape: {shape}. Expected one of {', '.join(tankShapes)}")
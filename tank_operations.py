@@ -10,12 +10,35 @@
 
 import time
 import random
+import threading
 import system_menu
 import ultrasonic as us
 import seven_segment as ss
 import motor
 import alert_system as rov
 import thermistor as tm
+import analytics
+from telemetry import TelemetryStore, stateCodes, unknownStateCode
+import telemetry_log
+import metrics_server
+from instrumentation import pollingInstrumentation, slowest_stage, print_report
+from board_guard import BoardGuard
+from tank_states import classify_tank_state, defaultParameters, pumpSettings, state_volume
+from polling_scheduler import PollingScheduler, print_scheduler_report
+from state_tracker import StateDurationTracker
+
+
+# time each sensor filter follows its reports before it is read, per polling cycle, in seconds. The sensors are set up
+# once in system_menu.board_setup and the polling scheduler paces the loop, so the filters are read straight away.
+thermistorDetectionTime = 0
+ultrasonicDetectionTime = 0
+
+# releases a polling cycle every pollingMinRate and sheds optional work past pollingMaxRate, see polling_setup
+pollingScheduler = None
+# informational console output of the current cycle, printed at its end unless it is shed
+cycleMessages = []
+# current tank state, the time it was entered and the run-length encoded state changes of the polling session
+stateTracker = StateDurationTracker()
 
 
 # A function that will repeat the sub operations that are included in the polling loop,
@@ -32,135 +55,189 @@ def polling_loop():
     time.sleep(1)
     print('\nPolling...')
 
-    global tankVolumeState, tankHeight, tankBaseArea, pollingMinRate, pollingMaxRate, motorSpeedHigh, motorSpeedLow, rateOfVolumeChange
-    global elapsedTimeList, tankWaterVolumeList, tankWaterLevelList, tankVolumeStateList
-    global operationState
+    polling_setup()
+    try:
+        while True:
+            pollingScheduler.wait_next()
+            polling_cycle()
+
+    except KeyboardInterrupt:
+        cleanup()
+
+
+# Prepares a polling session: reads the system parameters, starts the display service and opens the telemetry
+# store and session log.
+# no input parameters and no return value
+def polling_setup():
+    global tankVolumeState, tankHeight, tankGeometry, pollingMinRate, pollingMaxRate, motorSpeedHigh, motorSpeedLow
+    global telemetryStore, telemetryLog
     global board
-    global pollingStartTime
+    global pollingStartTime, pollingScheduler, rateCheckSample
 
     # arduino board
     board = system_menu.board
+    # the display refreshes itself on its own thread, the loop only posts new messages to it
+    ss.start_display_service(board)
 
     # system parameters
     tankHeight = system_menu.tankHeight
-    tankBaseArea = system_menu.tankBaseArea
+    tankGeometry = system_menu.tankGeometry
     pollingMinRate = system_menu.pollingMinRate
     pollingMaxRate = system_menu.pollingMaxRate
     motorSpeedHigh = system_menu.motorSpeedHigh
     motorSpeedLow = system_menu.motorSpeedLow
+    # the pump runs at the configured speeds
+    motor.motorSpeedHigh = motorSpeedHigh
+    motor.motorSpeedLow = motorSpeedLow
 
     # initialising variables
     tankVolumeState = ''
-    tankWaterVolumeList = []
-    elapsedTimeList = []
-    tankWaterLevelList = []
-    tankVolumeStateList = []
+    # history of this polling session, bounded by the configured retention
+    telemetryStore = TelemetryStore(system_menu.telemetryRetention)
+    # persistent copy of the session, survives the program exiting or losing power
+    telemetryLog = telemetry_log.TelemetryLog(telemetry_log.new_session_path(system_menu.telemetryLogDirectory))
+    stateTracker.reset()
     pollingStartTime = time.time()
-    # distance between the ultrasonic and water level (initialised as 0)
-    gapHeight = 0
-
-    try:
-        while True:
-            # start time recording, call subfunctions
-            startTime = time.time()
-            temp = tm.thermistor_detect(board,0.5)
-            print(f"Current temperature in the water tank is {round(temp,2)} degree celcius")
-            # for testing and demo purpose  
-            if temp < 20:
-                print("WARNING: Temperature is too low")
-            elif temp > 30:
-                print("WARNING: Temperature is too high")
-
-            gapHeight = us.ultrasonic_detect(board, 1)
-            tank_water_level_detection(gapHeight, tankHeight, tankBaseArea)
-            # detect the current tankState and the time it last for for alert system checking
-            if len(tankVolumeStateList) > 1 and tankVolumeStateList[-1] == tankVolumeStateList[-2]:
-                volumeContinuousStateCount += 1
-                markingTime = time.time()   # a marking time used for measuring the time taken to reach this point for calculation of time remained of particular tank state
-                tankVolumeStateTime = sum(elapsedTimeList[-volumeContinuousStateCount:]) + (markingTime - startTime)
-            else:
-                # reset counts and time remained for particular state to 0
-                tankVolumeStateTime = 0
-                volumeContinuousStateCount = 0
-            # activate alert system if tankState has been near full, near empty, empty and overfull for 5 s
-            rov.tank_state_alert(board,tankVolumeState,tankVolumeStateTime)
-            time.sleep(0.01)
-            pump_activation(tankVolumeState)
-            seven_segment_display()
-
-            # end time recording, get elapsedTime
-            endTime = time.time()
-            elapsedTime = endTime - startTime
-
-            print('----------------------------------------------')
-            print(f'LOOP COMPLETE. Time taken: {elapsedTime:.4f}s')
-
-            # append to list for data_observation needs
-            elapsedTimeList.append(elapsedTime)
-            tankWaterLevelList.append(tankWaterHeight)
-
-            # elapsedTime out of reasonable range warning
-            if elapsedTime > pollingMaxRate or elapsedTime < pollingMinRate:
-                print('|| WARNING: Elapsed time out of reasonable range. ||')
-
-            # print total polling time
-            print(f'Total Polling time = {sum(elapsedTimeList):.2f}s')
-
-            # check for tank faults
-            operationStateVolChange = rate_of_volume_change(
-                elapsedTimeList, tankWaterVolumeList)
-
-            # check if tank remains operational
-            operationState = operationStateVolChange
-
-            # emergency termination in event of tank fault
-            if operationState == False:
-                # time.sleep(2)
-                print(
-                    'SUSPECTED FAULTS DETECTED'
-                )
-                if rateOfVolumeChange > 0:
-                    print("Water is draining in too fast.")
-                    motor.motor_anticlockwise_control(board,"FULL")
-                else:
-                    print("Water is draining out too fast.")
-                    motor.motor_clockwise_control(board,"FULL")
-                # time.sleep(1)
+    # stage timings and counters of this polling session
+    pollingInstrumentation.reset()
+    # fixed rate cycles: a cycle every pollingMinRate, each to finish within pollingMaxRate of its release, and every
+    # task at its own rate
+    pollingScheduler = PollingScheduler(pollingMinRate, pollingMaxRate, pollingInstrumentation,
+                                        system_menu.taskRates)
+    # (time, volume) of the last rate of volume change check
+    rateCheckSample = None
+    cycleMessages.clear()
+
+
+# Runs one cycle of the polling loop: samples the sensors, classifies the tank state, drives the alerts, pump and
+# display, checks the rate of volume change and records the cycle. The polling scheduler runs the temperature
+# sample, the sonar reading, the state alerts, the display refresh and the rate check at their own rates
+# (system_menu.taskRates), their last values stand in between. The display refresh, the temperature sample and the
+# console output are optional and are shed when the cycle is running out of time.
+# no input parameters and no return value
+def polling_cycle():
+    global operationState
 
-                # system_menu.end_program()
-                # quit(0)
+    # start time recording, the interval since the last cycle is the dt of the rate of volume change
+    startTime = time.time()
+    interval = pollingScheduler.start_cycle()
+    # both sensor windows run concurrently, the cycle only waits for the longest one
+    with pollingInstrumentation.stage('sensors'):
+        temp, gapHeight = sensor_acquisition(board, thermistorDetectionTime, ultrasonicDetectionTime, pollingScheduler)
+    if temp is not None:
+        console_message(f"Current temperature in the water tank is {round(temp,2)} degree celcius")
+        # for testing and demo purpose
+        if temp < 20:
+            print("WARNING: Temperature is too low")
+        elif temp > 30:
+            print("WARNING: Temperature is too high")
+
+    with pollingInstrumentation.stage('classification'):
+        tank_water_level_detection(gapHeight, tankHeight, tankGeometry)
+        # the time the current tankState has lasted for alert system checking, 0 when it has just changed
+        tankVolumeStateTime = stateTracker.update(tankVolumeState, time.time())
+    # activate alert system if tankState has been near full, near empty, empty and overfull for 5 s
+    with pollingInstrumentation.stage('alert'):
+        pollingScheduler.run_task('alerts', rov.tank_state_alert, board, tankVolumeState, tankVolumeStateTime)
+    with pollingInstrumentation.stage('pump'):
+        pump_activation(tankVolumeState)
+    with pollingInstrumentation.stage('display'):
+        pollingScheduler.run_task('display', seven_segment_display, optional=True)
+
+    # end time recording; the first cycle of a session has no interval and is timed by its own duration
+    endTime = time.time()
+    elapsedTime = interval if interval is not None else endTime - startTime
+
+    console_message('----------------------------------------------')
+    console_message(f'LOOP COMPLETE. Time taken: {endTime - startTime:.4f}s, time since last cycle: {elapsedTime:.4f}s')
+
+    # check for tank faults
+    with pollingInstrumentation.stage('rate'):
+        operationStateVolChange = pollingScheduler.run_task('rate', rate_of_volume_change,
+                                                            pollingScheduler.cycleStart, tankWaterVolume)
+        # in a cycle the check is not due in, its last result is no new measurement or fault
+        rateChecked = pollingScheduler.ran_task('rate')
+
+    # record the cycle for data_observation needs, in a single append
+    with pollingInstrumentation.stage('record'):
+        cycleRate = rateOfVolumeChange if rateChecked and operationStateVolChange is not None else None
+        telemetryStore.append(elapsedTime, tankWaterVolume, tankWaterHeight, tankVolumeState, cycleRate)
+        telemetryLog.append(endTime, gapHeight, tankWaterVolume, tankWaterHeight,
+                            stateCodes.get(tankVolumeState, unknownStateCode), temp, cycleRate,
+                            motor.motorController.currentPwm)
+        # latest readings for the metrics server, swapped in as a whole
+        metrics_server.publish_snapshot({
+            'timestamp': endTime, 'volume': tankWaterVolume, 'level': tankWaterHeight, 'state': tankVolumeState,
+            'stateCode': stateCodes.get(tankVolumeState, unknownStateCode), 'temperature': temp,
+            'rate': cycleRate, 'pwm': motor.motorController.currentPwm, 'gapHeight': gapHeight
+        })
+    console_message(f'Total Polling time = {telemetryStore.totalTime:.2f}s')
+    pollingScheduler.run_task('console', print_console_messages, optional=True)
+    cycleMessages.clear()
+
+    # the cycle time is the polling rate achieved, the time between two cycles
+    lateCycle = interval is not None and pollingInstrumentation.record_cycle(interval, pollingMaxRate)
+    if pollingScheduler.end_cycle():
+        # the breakdown of a cycle that ran past its deadline names the stage that held it up
+        print('|| WARNING: Polling cycle ran past the maximum polling rate. ||')
+        stage = slowest_stage(pollingInstrumentation.lastOverrun)
+        if stage is not None:
+            print(f'|| Slowest stage: {stage[0]} ({stage[1]:.3f}s) ||')
+    elif lateCycle:
+        print('|| WARNING: Time between polling cycles exceeds the maximum polling rate. ||')
+
+    # check if tank remains operational
+    operationState = operationStateVolChange
+
+    # emergency termination in event of tank fault
+    if rateChecked and operationState == False:
+        pollingInstrumentation.count('faults')
+        # time.sleep(2)
+        print(
+            'SUSPECTED FAULTS DETECTED'
+        )
+        if rateOfVolumeChange > 0:
+            print("Water is draining in too fast.")
+            motor.motor_anticlockwise_control(board,"FULL")
+        else:
+            print("Water is draining out too fast.")
+            motor.motor_clockwise_control(board,"FULL")
+        # time.sleep(1)
 
-    except KeyboardInterrupt:
-        cleanup()
+        # system_menu.end_program()
+        # quit(0)
 
 
 # Conduct system cleanup in the event of KeyboardInterrupt detection.
 # no input parameters and no return value
 def cleanup():
 
-    # if elapsed time is not appended by the time keyboard interrupted detected, time is calculated using
-    # the difference between the time when keyboard interrupt detected and (sum of polling time + polling loop start time)
-
-    # adds or removes elapsedTime value in the event of KeyboardInterrupt
-    timeKeyBoardInterEnd = time.time()
-    if len(elapsedTimeList) < len(tankWaterVolumeList) or len(
-            elapsedTimeList) < len(rateOfVolumeChangeList) or len(
-                elapsedTimeList) < len(tankWaterLevelList):
-        elapsedTimeList.append(timeKeyBoardInterEnd - pollingStartTime -
-                               sum(elapsedTimeList))
-    elif len(tankWaterVolumeList) < len(elapsedTimeList) or len(
-            rateOfVolumeChangeList) < len(elapsedTimeList) or len(
-                tankWaterLevelList) < len(elapsedTimeList):
-        elapsedTimeList.pop()
+    # a cycle interrupted by the KeyboardInterrupt is never recorded, as every cycle is appended to the
+    # telemetry store in a single call, so the recorded data is always consistent
 
     # console alert
     print('\nKEYBOARD INTERRUPT DETECTED: Terminating polling loop...\n\n')
     time.sleep(0.5)
     motor.motor_stop_control(board)
     rov.stop_alert_system(board)
+    # the pump ramps down while the session is closed, it is off before the menu returns
+    motor.motorController.wait_settled(1)
+    telemetryLog.close()
     # print runtime & return
-    print(f'Total elapsed time: {sum(elapsedTimeList):.2f}s')
-    displayString = round(sum(elapsedTimeList),2) + "s"
+    print(f'Total elapsed time: {telemetryStore.totalTime:.2f}s')
+    # end-of-run summary of the rate of volume change over the retained history
+    analytics.print_rate_statistics(analytics.window_rate_statistics(telemetryStore))
+    # per stage timings of the session
+    print_report(pollingInstrumentation.snapshot())
+    print_scheduler_report(pollingScheduler.snapshot())
+    # actuator writes the board wrapper found unchanged and did not send
+    if isinstance(board, BoardGuard):
+        writeCounts = board.write_counts()
+        print(f"Board writes sent: {writeCounts['digital sent']} digital, {writeCounts['pwm sent']} PWM; "
+              f"suppressed: {writeCounts['digital suppressed']} digital, {writeCounts['pwm suppressed']} PWM")
+    rov.print_alert_report()
+    displayString = str(round(telemetryStore.totalTime,2)) + "s"
+    ss.stop_display_service()
     ss.disp_seven_segment(board,displayString)
     ss.write_segment_off(board)
     time.sleep(.5)
@@ -168,65 +245,107 @@ def cleanup():
     system_menu.progress_bar(100)
 
 
-# Generates a display message from the tank's volume and calls to the seven_segment functions to display it
+# Samples the thermistor and the ultrasonic sensor at the same time. When both have a detection window, the
+# thermistor window runs on a worker thread while the ultrasonic window runs on the calling thread, so the time
+# spent sensing is the longest of the two windows instead of their sum; with no window to overlap both are read
+# on the calling thread. Both sensors report through their own pymata4 callbacks. With a scheduler, a sensor
+# is only read when its task ('temperature', 'sonar') is due, its last reading is returned otherwise.
+# Inputs:
+#     board - current Arduino board
+#     thermistorTime - detection time for the thermistor, in seconds
+#     ultrasonicTime - detection time for the ultrasonic sensor, in seconds
+#     scheduler - polling scheduler running the sensor tasks, None to read both sensors
+# Return:
+#     temp - temperature in the water tank, None if it has never been sampled
+#     gapHeight - gap between the ultrasonic sensor and water level
+def sensor_acquisition(board, thermistorTime, ultrasonicTime, scheduler=None):
+    thermistorResult = {}
+
+    # runs the thermistor window and keeps its reading (or error) for the calling thread
+    def thermistor_task():
+        try:
+            with pollingInstrumentation.stage('thermistor'):
+                if scheduler is None:
+                    thermistorResult['temp'] = tm.thermistor_detect(board, thermistorTime)
+                else:
+                    thermistorResult['temp'] = scheduler.run_task('temperature', tm.thermistor_detect,
+                                                                  board, thermistorTime, optional=True)
+        except Exception as error:
+            thermistorResult['error'] = error
+
+    # a thermistor task that is not due only returns its last reading, and one without a window to overlap with the
+    # ultrasonic window is as quick inline, neither needs a thread
+    thermistorThread = None
+    if thermistorTime > 0 and ultrasonicTime > 0 and (scheduler is None or scheduler.is_due('temperature')):
+        thermistorThread = threading.Thread(target=thermistor_task, daemon=True)
+        thermistorThread.start()
+    else:
+        thermistor_task()
+    with pollingInstrumentation.stage('ultrasonic'):
+        if scheduler is None:
+            gapHeight = us.ultrasonic_detect(board, ultrasonicTime)
+        else:
+            gapHeight = scheduler.run_task('sonar', us.ultrasonic_detect, board, ultrasonicTime)
+    if thermistorThread is not None:
+        thermistorThread.join()
+
+    if 'error' in thermistorResult:
+        raise thermistorResult['error']
+    return thermistorResult['temp'], gapHeight
+
+
+# Adds a line of informational console output to the current cycle
+# Inputs:
+#     message - line to be printed
+# Return:
+#     None
+def console_message(message):
+    cycleMessages.append(message)
+
+
+# Prints the informational console output of the current cycle
+# no input parameters and no return value
+def print_console_messages():
+    print('\n'.join(cycleMessages))
+
+
+# Generates a display message from the tank's volume and posts it to the seven segment display service
 # no input parameters and no return value
 def seven_segment_display():
     global tankVolumeState
-    displayString = str(round(tankWaterVolumeList[-1], 2)) + "L"
-    ss.disp_seven_segment(board, displayString, tankVolumeState)
+    displayString = str(round(tankWaterVolume, 2)) + "L"
+    ss.post_display_message(displayString, tankVolumeState)
 
 
 # Detects and classifies the tank's measured volume into one of the following states: over full, near full,
 # high, within normal range, low or nearly empty based on their respective threshold percentages
 # Inputs
-#     randomHeight - Random height value to simulate data from ultrasonic sensor, float
+#     gapHeight - gap between the ultrasonic sensor and water level in cm, float
 #     tankHeight - Height of the tank in cm, float
-#     tankBaseArea - Base area of the tank in cm^2, float
+#     tankGeometry - level to volume table of the tank, see tank_geometry.TankGeometry
 # Return:
 #     None
-def tank_water_level_detection(gapHeight, tankHeight, tankBaseArea):
+def tank_water_level_detection(gapHeight, tankHeight, tankGeometry):
 
-    global tankVolumeState, tankWaterHeight, maxTankVolume,tankVolumeStateList
+    global tankVolumeState, tankWaterHeight, tankWaterVolume, maxTankVolume
 
-    # converting distance measurement(cm) to volume measurement(L)
+    # converting distance measurement(cm) to volume measurement(L) through the level to volume table of the tank
     tankWaterHeight = tankHeight - gapHeight
-    tankWaterVolume = tankWaterHeight * tankBaseArea / 1000
+    tankWaterVolume = tankGeometry.volume_at(tankWaterHeight)
     maxTankVolume = system_menu.maxTankVolume
 
-    # converting percentage of tank water volume
-    tankWaterPercentage = tankWaterVolume / maxTankVolume * 100
-
-    # assigning state of tank according to calculated percentage of volume
-    if tankWaterPercentage <= 0:
-        tankWaterVolume = 0
-        tankVolumeState = 'Empty'
+    # assigning state of tank according to the percentage of the maximum tank volume
+    tankVolumeState = classify_tank_state(tankWaterVolume, maxTankVolume, tankGeometry.capacity) or tankVolumeState
+    tankWaterVolume = state_volume(tankVolumeState, tankWaterVolume, maxTankVolume)
+    if tankVolumeState == 'Empty':
         print('Tank is completely empty')
-    elif tankWaterPercentage < 30:
-        tankVolumeState = 'Near empty'
-    elif 30 <= tankWaterPercentage < 40:
-        tankVolumeState = 'Low'
-    elif 40 <= tankWaterPercentage <= 60:
-        tankVolumeState = 'Within normal range'
-    elif 60 < tankWaterPercentage <= 70:
-        tankVolumeState = 'High'
-    elif 70 < tankWaterPercentage <= 100:
-        tankVolumeState = 'Near full'
-    elif tankWaterPercentage > 100:
-        tankVolumeState = 'Overfull'
-        tankWaterVolume = maxTankVolume
-
-    # append data to list for data_observation needs
-    tankWaterVolumeList.append(tankWaterVolume)
-    tankVolumeStateList.append(tankVolumeState)
-
-    print("")
-    print(f'Tank Water Volume: {tankWaterVolume:.4f}')
-    print(f'Tank State: {tankVolumeState}')
-
-    if tankVolumeState == 'Overfull':
-        print(
-            '|| WARNING: Tank water level exceeds measurement range. Please inspect tank for overflows. ||'
-        )
+
+    console_message("")
+    console_message(f'Tank Water Volume: {tankWaterVolume:.4f}')
+    console_message(f'Tank State: {tankVolumeState}')
+
+    # the alert engine warns once when the tank becomes overfull and reminds while it stays overfull
+    rov.overfull_alert(tankVolumeState == 'Overfull')
 
 
 # Activates the input or output pump based on the state of water level and prints a console alert accordingly
@@ -239,27 +358,15 @@ def pump_activation(tankVolumeState):
     global board
     board = system_menu.board
 
-    # activate pumps (motor) according to state
-    if tankVolumeState == 'Low':
-        motor.motor_clockwise_control(board, 'LOW')
+    # activate pumps (motor) according to state, 'Off' to shut down
+    direction, speed = pumpSettings.get(tankVolumeState, (None, None))
+    if direction == 'clockwise':
+        motor.motor_clockwise_control(board, speed)
 
-    elif tankVolumeState == 'Near empty' or tankVolumeState == 'Empty':
-        motor.motor_clockwise_control(board, 'HIGH')
+    elif direction == 'anticlockwise':
+        motor.motor_anticlockwise_control(board, speed)
 
-    elif tankVolumeState == 'Within normal range':
-        motor.motor_stop_control(board)
-
-    elif tankVolumeState == 'High':
-        motor.motor_anticlockwise_control(board, 'LOW')
-
-    elif tankVolumeState == 'Near full':
-        motor.motor_anticlockwise_control(board, 'HIGH')
-
-    elif tankVolumeState == 'Overfull':
-        motor.motor_anticlockwise_control(board, 'HIGH')
-
-    # shutdown
-    elif tankVolumeState == 'Off':
+    elif direction == 'stop':
         motor.motor_stop_control(board)
 
 
@@ -267,51 +374,37 @@ def pump_activation(tankVolumeState):
 # If the rate of volume change exceeds a predefined limit, it
 # indicates that either the motor is faulty or there is a leak
 # in the tank. Hence, the system will shutdown if the limit is
-# exceeded.
+# exceeded. The check may run less often than the polling loop,
+# so dV and dt are taken from the previous check.
 # Inputs:
-#     elaspedTimeList - List of elasped time values to access the change in time (dt)
-#     tankWaterVolumeList - List of tank water volume values to calculate the change in volume (dV)
-
-
+#     sampleTime - monotonic time the volume was sampled at, in seconds
+#     tankWaterVolume - current tank water volume, compared against the volume of the previous check (dV)
 # Return:
 #     True if rate of volume change does not exceed limit
 #     False if rate of volume change exceeds limit, Boolean
-def rate_of_volume_change(elaspedTimeList, tankWaterVolumeList):
+#     None if there is no previous volume to compare against
+def rate_of_volume_change(sampleTime, tankWaterVolume):
     global board
-    global limitRate, rateOfVolumeChange
-    global rateOfVolumeChangeList
-    limitRate = 1
+    global limitRate, rateOfVolumeChange, rateCheckSample
+    limitRate = defaultParameters['limitRate']
 
-    if len(elaspedTimeList) < 2:
+    previousSample = rateCheckSample
+    rateCheckSample = (sampleTime, tankWaterVolume)
+    if previousSample is None or sampleTime <= previousSample[0]:
         print(
             "Rate of volume change: INSUFFICIENT DATA. Must have at least 2 polled values."
         )
         return None
 
-    index = (len(elaspedTimeList) - 1)
-    changeInTime = elapsedTimeList[index]
-    changeInVolume = tankWaterVolumeList[index] - tankWaterVolumeList[index -1]
+    previousTime, previousVolume = previousSample
+    changeInTime = sampleTime - previousTime
+    changeInVolume = tankWaterVolume - previousVolume
     rateOfVolumeChange = changeInVolume / changeInTime
-    print(f'Rate of volume change: {rateOfVolumeChange:.4f}L/s')
-    # activate alert system if rate of water volume change exceeds the limit rate
+    console_message(f'Rate of volume change: {rateOfVolumeChange:.4f}L/s')
+    # activate alert system if rate of water volume change exceeds the limit rate, the alert engine shows the warning
     rov.rov_alert(board, abs(rateOfVolumeChange), limitRate)
     # check for abnormal volume changes, terminates pump
     if abs(rateOfVolumeChange) > limitRate:
-        print(
-            '\n|| WARNING: Volume change rate exceeds normal range. Please check for tank leaks/damages. ||'
-        )
-        try:
-            rateOfVolumeChangeList.append(rateOfVolumeChange)
-            return False
-        except NameError:
-            rateOfVolumeChangeList = [rateOfVolumeChange]
-            return False
+        return False
 
-    else:
-        # adding rate of volume change to list
-        try:
-            rateOfVolumeChangeList.append(rateOfVolumeChange)
-            return True
-        except NameError:
-            rateOfVolumeChangeList = [rateOfVolumeChange]
-            return True
+    return True
@@ -0,0 +1,100 @@
+# tank_states.py
+# Classifies the tank water volume into tank states and sets what the pump and alerts do in every state, for the
+# polling loop and the tank controllers alike
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+
+# default operating parameters of a tank, the system parameters start from these
+defaultParameters = {
+    'tankBaseArea': 24 * 24,  # cm^2
+    'tankHeight': 21,  # cm
+    'maxTankVolume': 10,  # L
+    'motorSpeedLow': 125,  # PWM
+    'motorSpeedHigh': 175,  # PWM
+    'motorFullSpeed': 250,  # PWM, fault recovery
+    'pollingMinRate': 1,  # s
+    'pollingMaxRate': 5,  # s
+    'limitRate': 1,  # L/s, rate of volume change above which a fault is suspected
+    'alertDelay': 5  # s, time after which a persistent state raises its alert
+}
+
+# pump direction and speed for every tank state, as (direction, speed)
+pumpSettings = {
+    'Empty': ('clockwise', 'HIGH'),
+    'Near empty': ('clockwise', 'HIGH'),
+    'Low': ('clockwise', 'LOW'),
+    'Within normal range': ('stop', None),
+    'High': ('anticlockwise', 'LOW'),
+    'Near full': ('anticlockwise', 'HIGH'),
+    'Overfull': ('anticlockwise', 'HIGH'),
+    'Off': ('stop', None)
+}
+
+# states that raise the alert once they have lasted alertDelay seconds
+persistentAlertStates = ('Empty', 'Near empty', 'Near full', 'Overfull')
+
+
+# Classifies a tank water volume into one of the tank states by its percentage of the maximum tank volume. The
+# tank geometry clamps levels to the top of the tank, so a tank whose capacity is not above the maximum tank
+# volume could never be measured above it; a volume at the capacity is therefore Overfull as well.
+# Inputs:
+#     volume - tank water volume, L
+#     maxTankVolume - maximum tank volume, L
+#     capacity - volume of the tank filled to the top, L (see tank_geometry.TankGeometry), None to use only
+#                maxTankVolume
+# Return:
+#     tank state (see telemetry.tankStates), None if the volume is not a number
+def classify_tank_state(volume, maxTankVolume, capacity=None):
+    tankWaterPercentage = volume / maxTankVolume * 100
+    if capacity is not None and volume >= capacity:
+        return 'Overfull'
+    elif tankWaterPercentage <= 0:
+        return 'Empty'
+    elif tankWaterPercentage < 30:
+        return 'Near empty'
+    elif tankWaterPercentage < 40:
+        return 'Low'
+    elif tankWaterPercentage <= 60:
+        return 'Within normal range'
+    elif tankWaterPercentage <= 70:
+        return 'High'
+    elif tankWaterPercentage <= 100:
+        return 'Near full'
+    elif tankWaterPercentage > 100:
+        return 'Overfull'
+    return None
+
+
+# Returns the volume recorded for a tank state: an empty tank holds nothing and an overfull tank is counted as full,
+# as the level is out of the measurement range
+# Inputs:
+#     tankVolumeState - tank state of the volume
+#     volume - tank water volume, L
+#     maxTankVolume - maximum tank volume, L
+# Return:
+#     volume recorded, L
+def state_volume(tankVolumeState, volume, maxTankVolume):
+    if tankVolumeState == 'Empty':
+        return 0
+    elif tankVolumeState == 'Overfull':
+        return maxTankVolume
+    return volume
+
+
+# Returns which tank state alerts are raised
+# Inputs:
+#     tankVolumeState - current tank state
+#     tankVolumeStateTime - time the tank has been in that state, s
+#     alertDelay - time after which a persistent state raises its alert, s
+# Return:
+#     (state alert, persistent state alert) - True if raised. The state alert is raised while the tank is near
+#     empty or empty, until the persistent state alert takes over.
+def state_alerts(tankVolumeState, tankVolumeStateTime, alertDelay=defaultParameters['alertDelay']):
+    persistent = tankVolumeState in persistentAlertStates and tankVolumeStateTime >= alertDelay
+    return not persistent and tankVolumeState in ('Empty', 'Near empty'), persistent
@@ -0,0 +1,160 @@
+# tank_supervisor.py
+# Runs several tank controllers concurrently, each polled at its own rate
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# TankSupervisor polls every tank controller once per its pollingMinRate on a thread pool. A scheduler keeps the
+# next due time of every tank in a heap and hands a tank to the pool when it is due; the tank is only put back in
+# the heap when its poll has finished, so a tank is never polled twice at once while a slow sensor window of one
+# tank never holds up the others. The rate a tank achieves is recorded by its controller's instrumentation.
+# Inputs:
+#     controllers - list of TankController
+#     maxWorkers - number of pool threads, one per tank by default
+#     onPoll - function called as onPoll(index, controller, readings) after every poll, on the pool thread
+class TankSupervisor:
+
+    def __init__(self, controllers, maxWorkers=None, onPoll=None):
+        check_pin_conflicts(controllers)
+        self.controllers = controllers
+        self.maxWorkers = maxWorkers or len(controllers)
+        self.onPoll = onPoll
+        self.condition = threading.Condition()
+        self.dueTimes = []  # heap of (due time, controller index)
+        self.stopEvent = threading.Event()
+        self.errors = []
+
+    # Sets up every tank's pins
+    # no input parameters and no return value
+    def setup(self):
+        for controller in self.controllers:
+            controller.setup()
+
+    # Polls one tank and schedules its next poll. Runs on a pool thread.
+    # Inputs:
+    #     index - index of the controller
+    #     dueTime - time the poll was due
+    # Return:
+    #     None
+    def poll_controller(self, index, dueTime):
+        controller = self.controllers[index]
+        try:
+            readings = controller.poll()
+            if self.onPoll is not None:
+                self.onPoll(index, controller, readings)
+        except Exception as error:
+            self.errors.append((controller.name, error))
+            self.stopEvent.set()
+        # the next poll is due one period after this one was due, or now if the tank has fallen behind
+        nextDueTime = dueTime + controller.pollingMinRate
+        now = time.monotonic()
+        if nextDueTime < now:
+            controller.instrumentation.count('late')
+            nextDueTime = now
+        with self.condition:
+            heapq.heappush(self.dueTimes, (nextDueTime, index))
+            self.condition.notify()
+
+    # Polls the tanks until the duration has passed, stop() is called or a controller fails
+    # Inputs:
+    #     duration - time to run for, s (None to run until stopped)
+    # Return:
+    #     None
+    def run(self, duration=None):
+        self.stopEvent.clear()
+        startTime = time.monotonic()
+        endTime = None if duration is None else startTime + duration
+        self.dueTimes = [(startTime, index) for index in range(len(self.controllers))]
+        heapq.heapify(self.dueTimes)
+
+        with ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix='tank') as executor:
+            while not self.stopEvent.is_set():
+                now = time.monotonic()
+                if endTime is not None and now >= endTime:
+                    break
+                with self.condition:
+                    if not self.dueTimes or self.dueTimes[0][0] > now:
+                        # wait for the next due time, a finished poll or the end of the run
+                        timeout = self.dueTimes[0][0] - now if self.dueTimes else None
+                        if endTime is not None:
+                            timeout = min(timeout, endTime - now) if timeout is not None else endTime - now
+                        self.condition.wait(timeout)
+                        continue
+                    dueTime, index = heapq.heappop(self.dueTimes)
+                executor.submit(self.poll_controller, index, dueTime)
+            self.stopEvent.set()
+
+        if self.errors:
+            name, error = self.errors[0]
+            raise RuntimeError(f"Tank {name} failed") from error
+
+    # Asks a running supervisor to stop after the polls in progress
+    # no input parameters and no return value
+    def stop(self):
+        self.stopEvent.set()
+        with self.condition:
+            self.condition.notify()
+
+    # Stops the pumps and alerts of every tank
+    # no input parameters and no return value
+    def shutdown(self):
+        for controller in self.controllers:
+            controller.stop()
+
+    # Summarises the polling of every tank
+    # no input parameters
+    # Return:
+    #     dictionary of {tank name: {'cycles', 'late', 'overruns', 'interval p50', 'interval p95', 'interval max',
+    #     'state', 'volume'}}
+    def summary(self):
+        tanks = {}
+        for controller in self.controllers:
+            snapshot = controller.instrumentation.snapshot()
+            counters = snapshot['counters']
+            tanks[controller.name] = {
+                'cycles': counters.get('cycles', 0),
+                'late': counters.get('late', 0),
+                'overruns': counters.get('overruns', 0),
+                'interval p50': snapshot['cycle']['p50'],
+                'interval p95': snapshot['cycle']['p95'],
+                'interval max': snapshot['cycle']['max'],
+                'state': controller.latest.get('state'),
+                'volume': controller.latest.get('volume')
+            }
+        return tanks
+
+    # Prints the polling summary of every tank
+    # no input parameters and no return value
+    def print_summary(self):
+        print(f"\n{'tank':<10}{'cycles':>7}{'late':>6}{'overruns':>9}{'p50':>9}{'p95':>9}{'max':>9}  state")
+        for name, tank in self.summary().items():
+            volume = '' if tank['volume'] is None else f" ({tank['volume']:.2f}L)"
+            print(f"{name:<10}{tank['cycles']:>7}{tank['late']:>6}{tank['overruns']:>9}"
+                  f"{tank['interval p50']:>8.2f}s{tank['interval p95']:>8.2f}s{tank['interval max']:>8.2f}s"
+                  f"  {tank['state']}{volume}")
+
+
+# Checks that no two tanks on the same board use the same pin
+# Inputs:
+#     controllers - list of TankController
+# Return:
+#     None, raises ValueError on a conflict
+def check_pin_conflicts(controllers):
+    usedPins = {}
+    for controller in controllers:
+        for role, pin in controller.pins.items():
+            # analog pins are numbered separately from digital pins
+            key = (id(controller.board), 'analog' if role == 'thermistor' else 'digital', pin)
+            if key in usedPins:
+                raise ValueError(f"Tanks {usedPins[key]} and {controller.name} both use pin {pin} of the same board")
+            usedPins[key] = controller.name
@@ -0,0 +1,142 @@
+# telemetry.py
+# Stores the data collected by the polling loop in fixed-capacity columns for data observation
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import math
+import numpy as np
+
+
+# all tank states in order of water volume, a state is stored as its index in this list
+tankStates = ['Empty', 'Near empty', 'Low', 'Within normal range', 'High', 'Near full', 'Overfull']
+stateCodes = {state: code for code, state in enumerate(tankStates)}
+unknownStateCode = -1
+
+
+# TelemetryStore keeps the latest samples of the polling loop in NumPy columns of fixed capacity. Once the
+# retention is reached the oldest sample is dropped for every new one, so memory stays bounded however long the
+# tank runs. Columns are kept contiguous (each has room for twice the retention and is compacted when full),
+# so reading a column is a zero-copy view.
+# Inputs:
+#     capacity - number of samples retained
+class TelemetryStore:
+
+    # column name and data type of every value recorded per polling cycle
+    columnTypes = {
+        'timestamp': np.float64,  # cumulative polling time at the end of the cycle, s (monotonic)
+        'elapsedTime': np.float64,  # duration of the polling cycle, s
+        'volume': np.float64,  # tank water volume, L
+        'level': np.float64,  # tank water height, cm
+        'stateCode': np.int8,  # index of the tank state in tankStates
+        'rate': np.float64  # rate of volume change, L/s (NaN if unknown)
+    }
+
+    def __init__(self, capacity=86400):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(2 * capacity, dtype=columnType)
+                        for name, columnType in self.columnTypes.items()}
+        self.start = 0  # buffer position of the oldest retained sample
+        self.end = 0  # buffer position after the newest sample
+        self.sampleCount = 0  # monotonic index of the next sample, never reset by the retention
+        self.totalTime = 0  # sum of all elapsed times, including dropped samples
+
+    # Records the values of one polling cycle
+    # Inputs:
+    #     elapsedTime - duration of the polling cycle, s
+    #     volume - tank water volume, L
+    #     level - tank water height, cm
+    #     tankVolumeState - tank state, one of tankStates
+    #     rate - rate of volume change in L/s, None if not known yet
+    # Return:
+    #     monotonic index of the recorded sample
+    def append(self, elapsedTime, volume, level, tankVolumeState, rate=None):
+        # move the retained samples back to the start of the buffer once its end is reached
+        if self.end == 2 * self.capacity:
+            keep = self.capacity - 1
+            for column in self.columns.values():
+                column[:keep] = column[self.end - keep:self.end]
+            self.start, self.end = 0, keep
+
+        self.totalTime += elapsedTime
+        position = self.end
+        self.columns['timestamp'][position] = self.totalTime
+        self.columns['elapsedTime'][position] = elapsedTime
+        self.columns['volume'][position] = volume
+        self.columns['level'][position] = level
+        self.columns['stateCode'][position] = stateCodes.get(tankVolumeState, unknownStateCode)
+        self.columns['rate'][position] = math.nan if rate is None else rate
+
+        self.end += 1
+        if self.end - self.start > self.capacity:
+            self.start += 1
+        self.sampleCount += 1
+        return self.sampleCount - 1
+
+    def __len__(self):
+        return self.end - self.start
+
+    # Returns the retained samples of one column, oldest first
+    # Inputs:
+    #     name - column name, one of columnTypes
+    # Return:
+    #     read-only NumPy view of the column
+    def column(self, name):
+        view = self.columns[name][self.start:self.end]
+        view.flags.writeable = False
+        return view
+
+    # Returns the newest value of one column
+    # Inputs:
+    #     name - column name, one of columnTypes
+    # Return:
+    #     newest value, or None if the store is empty
+    def latest(self, name):
+        if self.end == self.start:
+            return None
+        return self.columns[name][self.end - 1].item()
+
+    # Returns the newest tank state
+    # no input parameters
+    # Return:
+    #     newest tank state, or None if the store is empty or the state is unknown
+    def latest_state(self):
+        stateCode = self.latest('stateCode')
+        if stateCode is None or stateCode == unknownStateCode:
+            return None
+        return tankStates[stateCode]
+
+    # Returns the monotonic index of the oldest retained sample
+    # no input parameters
+    # Return:
+    #     index of the oldest retained sample
+    def first_sample_index(self):
+        return self.sampleCount - len(self)
+
+    # Finds the samples recorded in a time window ending at a given timestamp. The window start is found with a
+    # binary search over the monotonic timestamps, so the cost does not depend on how much history is retained.
+    # Inputs:
+    #     duration - length of the window, s
+    #     endTime - timestamp at the end of the window, defaults to the newest sample
+    #     includePrevious - also include the last sample before the window, as a reference origin for plotting
+    # Return:
+    #     window - dictionary of {column name: read-only NumPy view} for the samples in the window
+    def window(self, duration, endTime=None, includePrevious=False):
+        timestamps = self.columns['timestamp'][self.start:self.end]
+        if endTime is None:
+            endTime = timestamps[-1] if len(timestamps) else 0
+        windowStart = np.searchsorted(timestamps, endTime - duration, side='left')
+        windowEnd = np.searchsorted(timestamps, endTime, side='right')
+        if includePrevious and windowStart > 0:
+            windowStart -= 1
+
+        window = {}
+        for name, column in self.columns.items():
+            view = column[self.start + windowStart:self.start + windowEnd]
+            view.flags.writeable = False
+            window[name] = view
+        return window
@@ -0,0 +1,197 @@
+# telemetry_log.py
+# Persists the polling data of each session to an append-only binary log that survives crashes and power loss
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+
+
+logMagic = b'TANKLOG1'
+# header: magic, record size, session start time (unix time)
+headerStruct = struct.Struct('<8sHxxxxxxd')
+headerSize = 64
+# record: sequence number, timestamp, gap height, volume, level, temperature, rate, PWM, state code, CRC32
+recordStruct = struct.Struct('<QddddddhbxI')
+recordSize = recordStruct.size
+recordFields = ['sequence', 'timestamp', 'gapHeight', 'volume', 'level', 'temperature', 'rate', 'pwm',
+                'stateCode', 'crc']
+recordDtype = np.dtype({
+    'names': recordFields,
+    'formats': ['<u8', '<f8', '<f8', '<f8', '<f8', '<f8', '<f8', '<i2', 'i1', '<u4'],
+    'offsets': [0, 8, 16, 24, 32, 40, 48, 56, 58, 60],
+    'itemsize': recordSize
+})
+growthRecords = 4096  # records added to the file each time it runs out of space
+
+
+# TelemetryLog appends fixed-width binary records to a session log file through a memory map. Appending is only a
+# memory copy; a background thread flushes the dirty pages to disk in batches every flushInterval seconds, so the
+# polling loop never waits on the disk. Each record carries a sequence number and a CRC32 so that recover_log can
+# ignore a record torn by a crash or power loss. The flush only holds the record lock to take the dirty flag, the
+# disk write runs under a separate map lock that append only takes when it has to grow the map.
+# Inputs:
+#     path - path of the log file, created if it does not exist and resumed after its last valid record if it does
+#     flushInterval - time between flushes to disk, in seconds
+class TelemetryLog:
+
+    def __init__(self, path, flushInterval=1.0):
+        self.path = path
+        self.lock = threading.Lock()  # record count and dirty flag
+        self.mapLock = threading.Lock()  # keeps the map from being resized during a flush
+        self.dirty = False
+
+        # resume after the last valid record of an existing log, dropping a torn tail
+        records, sessionStartTime = recover_log(path) if os.path.exists(path) else (None, time.time())
+        self.recordCount = 0 if records is None else len(records)
+        self.sessionStartTime = sessionStartTime
+
+        self.file = open(path, 'r+b' if records is not None else 'w+b')
+        capacity = max(self.recordCount + growthRecords, growthRecords)
+        self.file.truncate(headerSize + capacity * recordSize)
+        self.memoryMap = mmap.mmap(self.file.fileno(), 0)
+        if records is None:
+            self.memoryMap[:headerStruct.size] = headerStruct.pack(logMagic, recordSize, sessionStartTime)
+        # clear a torn record so it cannot be mistaken for valid data after the next crash
+        tail = headerSize + self.recordCount * recordSize
+        self.memoryMap[tail:tail + recordSize] = bytes(recordSize)
+
+        self.flushInterval = flushInterval
+        self.stopEvent = threading.Event()
+        self.flushThread = threading.Thread(target=self.flush_loop, daemon=True)
+        self.flushThread.start()
+
+    # Appends one record to the log. Only copies the record into the memory map, the disk write happens later.
+    # Inputs:
+    #     timestamp - unix time of the sample
+    #     gapHeight - gap between the ultrasonic sensor and water level, cm
+    #     volume - tank water volume, L
+    #     level - tank water height, cm
+    #     stateCode - tank state code, see telemetry.stateCodes
+    #     temperature - water temperature in degree celcius, None if not known
+    #     rate - rate of volume change in L/s, None if not known
+    #     pwm - current pump PWM duty
+    # Return:
+    #     sequence number of the record
+    def append(self, timestamp, gapHeight, volume, level, stateCode, temperature, rate, pwm):
+        with self.lock:
+            sequence = self.recordCount
+            offset = headerSize + sequence * recordSize
+            if offset + recordSize > len(self.memoryMap):
+                with self.mapLock:
+                    self.memoryMap.resize(len(self.memoryMap) + growthRecords * recordSize)
+
+            self.memoryMap[offset:offset + recordSize] = pack_record(sequence, timestamp, gapHeight, volume, level,
+                                                                     stateCode, temperature, rate, pwm)
+            self.recordCount += 1
+            self.dirty = True
+        return sequence
+
+    # Writes the dirty pages of the memory map to disk. Records appended during the write are flushed next time.
+    # no input parameters and no return value
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+        with self.mapLock:
+            self.memoryMap.flush()
+
+    # Flushes the log every flushInterval seconds until the log is closed. Runs on the flush thread.
+    # no input parameters and no return value
+    def flush_loop(self):
+        while not self.stopEvent.wait(self.flushInterval):
+            self.flush()
+
+    # Stops the flush thread, writes the remaining records to disk and closes the log file
+    # no input parameters and no return value
+    def close(self):
+        if self.stopEvent.is_set():
+            return
+        self.stopEvent.set()
+        self.flushThread.join()
+        self.flush()
+        self.memoryMap.close()
+        self.file.close()
+
+
+# Packs one record in the log format, with its CRC32
+# Inputs:
+#     sequence - sequence number of the record
+#     timestamp, gapHeight, volume, level, stateCode, temperature, rate, pwm - see TelemetryLog.append
+# Return:
+#     record bytes, recordSize long
+def pack_record(sequence, timestamp, gapHeight, volume, level, stateCode, temperature, rate, pwm):
+    record = recordStruct.pack(sequence, timestamp, gapHeight, volume, level,
+                               float('nan') if temperature is None else temperature,
+                               float('nan') if rate is None else rate, pwm, stateCode, 0)
+    return record[:-4] + zlib.crc32(record[:-4]).to_bytes(4, 'little')
+
+
+# Unpacks one record packed by pack_record
+# Inputs:
+#     record - record bytes
+# Return:
+#     dictionary of the record fields (see recordFields), temperature and rate None if they were not known; None if
+#     the CRC does not match
+def unpack_record(record):
+    fields = dict(zip(recordFields, recordStruct.unpack(record)))
+    if fields['crc'] != zlib.crc32(record[:-4]):
+        return None
+    for field in ('temperature', 'rate'):
+        if math.isnan(fields[field]):
+            fields[field] = None
+    return fields
+
+
+# Scans a log file and returns its valid records. The scan stops at the first record whose CRC or sequence number
+# does not match, which is where a crash or power loss left a torn (or never written) record.
+# Inputs:
+#     path - path of the log file
+# Return:
+#     records - NumPy structured array of the valid records (fields as in recordFields)
+#     sessionStartTime - unix time at which the logged session started
+def recover_log(path):
+    with open(path, 'rb') as logFile:
+        data = logFile.read()
+
+    if len(data) < headerSize:
+        raise ValueError(f"{path} is not a telemetry log: file too short")
+    magic, logRecordSize, sessionStartTime = headerStruct.unpack_from(data)
+    if magic != logMagic or logRecordSize != recordSize:
+        raise ValueError(f"{path} is not a telemetry log of this version")
+
+    recordCount = (len(data) - headerSize) // recordSize
+    validCount = 0
+    for i in range(recordCount):
+        offset = headerSize + i * recordSize
+        record = data[offset:offset + recordSize]
+        sequence = int.from_bytes(record[:8], 'little')
+        crc = int.from_bytes(record[-4:], 'little')
+        if sequence != i or crc != zlib.crc32(record[:-4]):
+            break
+        validCount += 1
+
+    records = np.frombuffer(data, dtype=recordDtype, count=validCount, offset=headerSize).copy()
+    return records, sessionStartTime
+
+
+# Creates the path of a new session log in the log directory, named after the session start time
+# Inputs:
+#     logDirectory - directory holding the session logs, created if it does not exist
+# Return:
+#     path of the session log file
+def new_session_path(logDirectory):
+    os.makedirs(logDirectory, exist_ok=True)
+    return os.path.join(logDirectory, time.strftime('session_%Y%m%d_%H%M%S.tlog'))
@@ -0,0 +1,60 @@
+# test_instrumentation.py
+# Checks the percentiles read back from the stage timing histograms
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import pytest
+from instrumentation import LatencyHistogram, histogramBuckets
+
+
+def test_empty_histogram_reads_zero():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    assert histogram.summary()['mean'] == 0.0
+
+
+def test_percentiles_are_bucket_upper_bounds():
+    histogram = LatencyHistogram()
+    # 90 durations of 1000 ns (bucket up to 1024 ns) and 10 of 100000 ns (bucket up to 131072 ns)
+    for _ in range(90):
+        histogram.record(1000)
+    for _ in range(10):
+        histogram.record(100000)
+    assert histogram.percentile(50) == 1024 / 1e9
+    assert histogram.percentile(90) == 1024 / 1e9
+    # the upper bound of the last bucket is capped at the longest duration recorded
+    assert histogram.percentile(95) == 100000 / 1e9
+    assert histogram.percentile(100) == 100000 / 1e9
+
+
+def test_percentile_is_within_a_factor_of_two():
+    histogram = LatencyHistogram()
+    durations = [37 * i * i + 5 for i in range(1, 501)]
+    for duration in durations:
+        histogram.record(duration)
+    for percentile in (50, 95, 99):
+        exact = sorted(durations)[int(percentile / 100 * len(durations)) - 1]
+        assert exact / 1e9 <= histogram.percentile(percentile) <= 2 * exact / 1e9
+
+
+def test_summary():
+    histogram = LatencyHistogram()
+    for duration in (2000, 4000, 6000):
+        histogram.record(duration)
+    summary = histogram.summary()
+    assert summary['count'] == 3
+    assert summary['mean'] == pytest.approx(4000 / 1e9)
+    assert summary['max'] == 6000 / 1e9
+    assert summary['last'] == 6000 / 1e9
+    assert summary['buckets'] == {2048 / 1e9: 1, 4096 / 1e9: 1, 8192 / 1e9: 1}
+
+
+def test_very_long_durations_land_in_the_last_bucket():
+    histogram = LatencyHistogram()
+    histogram.record(1 << 60)
+    assert histogram.buckets[histogramBuckets - 1] == 1
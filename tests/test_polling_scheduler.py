@@ -0,0 +1,97 @@
+# test_polling_scheduler.py
+# Checks when the polling scheduler runs, reuses and sheds tasks
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import pytest
+import polling_scheduler
+from polling_scheduler import PollingScheduler
+
+
+# Stands in for time.monotonic so that cycles can be released without waiting
+class FakeClock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fakeClock = FakeClock()
+    monkeypatch.setattr(polling_scheduler.time, 'monotonic', fakeClock)
+    return fakeClock
+
+
+def test_period_must_be_positive():
+    with pytest.raises(ValueError):
+        PollingScheduler(0, 1)
+
+
+def test_task_runs_at_its_own_rate(clock):
+    scheduler = PollingScheduler(1, 1, taskRates={'temperature': 3})
+    readings = iter(range(10))
+    results = []
+    for cycle in range(6):
+        scheduler.start_cycle()
+        results.append((scheduler.is_due('temperature'),
+                        scheduler.run_task('temperature', lambda: next(readings)),
+                        scheduler.ran_task('temperature')))
+        scheduler.end_cycle()
+        clock.now += 1
+    assert results == [(True, 0, True), (False, 0, False), (False, 0, False),
+                       (True, 1, True), (False, 1, False), (False, 1, False)]
+    assert scheduler.snapshot()['cached'] == {'temperature': 4}
+
+
+def test_task_without_rate_runs_every_cycle(clock):
+    scheduler = PollingScheduler(1, 1)
+    for cycle in range(3):
+        scheduler.start_cycle()
+        assert scheduler.is_due('sonar')
+        scheduler.run_task('sonar', lambda: cycle)
+        clock.now += 1
+    assert scheduler.results['sonar'] == 2
+
+
+def test_optional_task_is_shed_when_it_does_not_fit(clock):
+    scheduler = PollingScheduler(1, 1)
+
+    # takes 0.6 s of the fake clock
+    def slow_task():
+        clock.now += 0.6
+        return 'reading'
+
+    scheduler.start_cycle()
+    assert scheduler.run_task('temperature', slow_task, optional=True) == 'reading'
+    scheduler.end_cycle()
+
+    # 0.5 s into the next cycle, the 0.6 s estimate does not fit before the deadline
+    clock.now = scheduler.nextRelease
+    scheduler.start_cycle()
+    clock.now += 0.5
+    assert scheduler.run_task('temperature', slow_task, optional=True) == 'reading'
+    assert not scheduler.ran_task('temperature')
+    assert scheduler.snapshot()['shed'] == {'temperature': 1}
+
+    # a required task runs whatever the time left
+    assert scheduler.run_task('sonar', slow_task) == 'reading'
+    assert scheduler.end_cycle()
+    assert scheduler.overruns == 1
+
+
+def test_missed_releases_are_skipped(clock):
+    scheduler = PollingScheduler(1, 1)
+    scheduler.start_cycle()
+    clock.now += 3.5
+    # the cycle released at 101 s starts late, the releases at 102 s and 103 s have passed
+    scheduler.start_cycle()
+    assert scheduler.missedReleases == 2
+    assert scheduler.nextRelease == pytest.approx(104.0)
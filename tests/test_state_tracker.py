@@ -0,0 +1,75 @@
+# test_state_tracker.py
+# Checks the run-length encoded tank state history and its timeline queries
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+from state_tracker import StateHistory, StateDurationTracker
+
+
+# Builds a history of Low 0-10 s, Within normal range 10-25 s, Low 25-30 s, High 30-40 s, sampled every second
+# no input parameters
+# Return:
+#     history - StateHistory
+def sample_history():
+    history = StateHistory()
+    for timestamp in range(41):
+        if timestamp < 10:
+            state = 'Low'
+        elif timestamp < 25:
+            state = 'Within normal range'
+        elif timestamp < 30:
+            state = 'Low'
+        else:
+            state = 'High'
+        history.record(state, timestamp)
+    return history
+
+
+def test_record_keeps_one_entry_per_episode():
+    history = sample_history()
+    assert len(history) == 4
+    assert history.episodes() == [('Low', 0, 10), ('Within normal range', 10, 15), ('Low', 25, 5), ('High', 30, 10)]
+
+
+def test_episodes_are_clipped_to_the_range():
+    history = sample_history()
+    assert history.episodes(5, 27) == [('Low', 5, 5), ('Within normal range', 10, 15), ('Low', 25, 2)]
+    assert history.episodes(12, 20) == [('Within normal range', 12, 8)]
+
+
+def test_state_counts_and_time_in_states():
+    history = sample_history()
+    assert history.state_counts() == {'Low': 2, 'Within normal range': 1, 'High': 1}
+    assert history.time_in_states() == {'Low': 15, 'Within normal range': 15, 'High': 10}
+    assert history.time_in_states(20, 35) == {'Within normal range': 5, 'Low': 5, 'High': 5}
+
+
+def test_longest_episode():
+    history = sample_history()
+    assert history.longest_episode() == ('Within normal range', 10, 15)
+    assert history.longest_episode('Low') == ('Low', 0, 10)
+    assert history.longest_episode('Low', 6, 40) == ('Low', 25, 5)
+    assert history.longest_episode('Overfull') is None
+
+
+def test_oldest_half_is_dropped_past_max_runs():
+    history = StateHistory(maxRuns=4)
+    for timestamp, state in enumerate(['Low', 'High', 'Low', 'High', 'Low']):
+        history.record(state, timestamp)
+    assert len(history) == 3
+    assert [start for _, start, _ in history.episodes()] == [2, 3, 4]
+
+
+def test_duration_tracker_counts_time_in_the_current_state():
+    tracker = StateDurationTracker()
+    assert tracker.duration(5) == 0
+    assert tracker.update('Low', 0) == 0
+    assert tracker.update('Low', 3) == 3
+    assert tracker.update('High', 4) == 0
+    assert tracker.duration(6) == 2
+    assert tracker.transitions() == [('Low', 0, 4), ('High', 4, 0)]
@@ -0,0 +1,62 @@
+# test_telemetry.py
+# Checks the bounded telemetry store and its time windows
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import pytest
+from telemetry import TelemetryStore
+
+
+# Builds a store of samples taken every second, with the sample number as the volume
+# Inputs:
+#     sampleCount - number of samples appended
+#     capacity - number of samples retained
+# Return:
+#     store - TelemetryStore
+def sample_store(sampleCount, capacity=100):
+    store = TelemetryStore(capacity)
+    for i in range(sampleCount):
+        store.append(1.0, float(i), 0.0, 'Within normal range')
+    return store
+
+
+def test_window_selects_the_samples_in_the_duration():
+    store = sample_store(10)
+    window = store.window(3)
+    # timestamps run 1 - 10 s, a 3 s window ending at 10 s starts at 7 s
+    assert list(window['timestamp']) == [7, 8, 9, 10]
+    assert list(window['volume']) == [6, 7, 8, 9]
+
+
+def test_window_with_end_time_and_previous_sample():
+    store = sample_store(10)
+    assert list(store.window(2, endTime=5)['timestamp']) == [3, 4, 5]
+    assert list(store.window(2, endTime=5, includePrevious=True)['timestamp']) == [2, 3, 4, 5]
+    assert list(store.window(2, endTime=3, includePrevious=True)['timestamp']) == [1, 2, 3]
+
+
+def test_window_views_are_read_only():
+    window = sample_store(5).window(2)
+    with pytest.raises(ValueError):
+        window['volume'][0] = 1
+
+
+def test_window_of_an_empty_store_is_empty():
+    store = TelemetryStore(10)
+    assert store.latest('timestamp') is None
+    assert all(len(view) == 0 for view in store.window(5).values())
+
+
+def test_window_after_the_retention_is_reached():
+    store = sample_store(25, capacity=8)
+    assert len(store) == 8
+    assert store.first_sample_index() == 17
+    assert list(store.column('volume')) == list(range(17, 25))
+    # the dropped samples still count towards the timestamps
+    assert list(store.window(2)['timestamp']) == [23, 24, 25]
+    assert list(store.window(100)['volume']) == list(range(17, 25))
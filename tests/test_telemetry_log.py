@@ -0,0 +1,81 @@
+# test_telemetry_log.py
+# Checks that a session log is recovered up to its last valid record after a crash
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import pytest
+from telemetry_log import TelemetryLog, recover_log, headerSize, recordSize, unpack_record
+
+
+# Writes a closed session log of records with the record number as the volume
+# Inputs:
+#     path - path of the log file
+#     recordCount - number of records written
+# Return:
+#     None
+def write_log(path, recordCount):
+    log = TelemetryLog(str(path), flushInterval=60)
+    for i in range(recordCount):
+        log.append(1000.0 + i, 10.0, float(i), 5.0, 3, None if i % 2 else 20.5, None, 125)
+    log.close()
+
+
+def test_recover_returns_every_record(tmp_path):
+    path = tmp_path / 'session.tlog'
+    write_log(path, 5)
+    records, _ = recover_log(str(path))
+    assert list(records['sequence']) == [0, 1, 2, 3, 4]
+    assert list(records['volume']) == [0, 1, 2, 3, 4]
+    with open(path, 'rb') as logFile:
+        logFile.seek(headerSize)
+        fields = unpack_record(logFile.read(recordSize))
+    assert fields['temperature'] == 20.5 and fields['rate'] is None
+
+
+def test_recover_stops_at_a_torn_tail(tmp_path):
+    path = tmp_path / 'session.tlog'
+    write_log(path, 5)
+    # a crash while the last record was being written leaves only part of it
+    with open(path, 'r+b') as logFile:
+        logFile.truncate(headerSize + 4 * recordSize + recordSize // 2)
+    records, _ = recover_log(str(path))
+    assert list(records['sequence']) == [0, 1, 2, 3]
+
+
+def test_recover_stops_at_a_bad_crc(tmp_path):
+    path = tmp_path / 'session.tlog'
+    write_log(path, 5)
+    with open(path, 'r+b') as logFile:
+        offset = headerSize + 2 * recordSize + 24  # volume of record 2
+        logFile.seek(offset)
+        byte = logFile.read(1)
+        logFile.seek(offset)
+        logFile.write(bytes([byte[0] ^ 0xFF]))
+    records, _ = recover_log(str(path))
+    assert list(records['sequence']) == [0, 1]
+
+
+def test_log_resumes_after_the_last_valid_record(tmp_path):
+    path = tmp_path / 'session.tlog'
+    write_log(path, 5)
+    with open(path, 'r+b') as logFile:
+        logFile.truncate(headerSize + 3 * recordSize + 10)
+    _, sessionStartTime = recover_log(str(path))
+    log = TelemetryLog(str(path), flushInterval=60)
+    assert log.append(2000.0, 10.0, 9.0, 5.0, 3, None, None, 0) == 3
+    log.close()
+    records, resumedStartTime = recover_log(str(path))
+    assert list(records['volume']) == [0, 1, 2, 9]
+    assert resumedStartTime == sessionStartTime
+
+
+def test_recover_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.tlog'
+    path.write_bytes(b'not a telemetry log' * 10)
+    with pytest.raises(ValueError):
+        recover_log(str(path))
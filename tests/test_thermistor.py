@@ -0,0 +1,58 @@
+# test_thermistor.py
+# Checks the thermistor ADC lookup table against the formula it replaced
+# Created by: Team MF02
+#           1. SANDRA LO YII SHIN
+#           2. MAJEED ABDUL MAJEED
+#           3. TAY MING HUI
+#           4. TEOH XHU WEI
+#           5. VINCENT LAW YUN KAE
+# Last modified: 18 OCT 2026
+
+import math
+import numpy as np
+import pytest
+import thermistor
+
+
+# Converts an ADC value to a temperature with the formula thermistor_detect used before the lookup table,
+# including its calibration offset of 2 degree celcius but not its rounding to two decimals
+# Inputs:
+#     adcValue - ADC value
+# Return:
+#     temperature, degree celcius
+def formula_temperature(adcValue, voltageSupply=5, fixResistance=10000, calibrationOffset=2):
+    vOut = adcValue*voltageSupply/1023
+    rThermistor = fixResistance*vOut/(voltageSupply-vOut)
+    return -21.21*math.log(rThermistor/1000) + 72.203 + calibrationOffset
+
+
+def test_table_matches_the_formula_for_every_code():
+    for adcValue in range(1, thermistor.adcResolution - 1):
+        assert thermistor.adc_to_temperature(adcValue) == pytest.approx(formula_temperature(adcValue), abs=1e-9)
+
+
+def test_shorted_and_open_codes_take_their_neighbour():
+    assert thermistor.adc_to_temperature(0) == thermistor.adc_to_temperature(1)
+    assert thermistor.adc_to_temperature(1023) == thermistor.adc_to_temperature(1022)
+    assert thermistor.adc_to_temperature(-5) == thermistor.adc_to_temperature(0)
+    assert thermistor.adc_to_temperature(2000) == thermistor.adc_to_temperature(1023)
+
+
+def test_filtered_values_round_to_the_nearest_code():
+    assert thermistor.adc_to_temperature(511.4) == thermistor.adc_to_temperature(511)
+    assert thermistor.adc_to_temperature(511.6) == thermistor.adc_to_temperature(512)
+
+
+def test_array_conversion_matches_single_values():
+    adcValues = [0, 1, 200.2, 511.6, 1022, 1023]
+    expected = [thermistor.adc_to_temperature(adcValue) for adcValue in adcValues]
+    assert np.allclose(thermistor.adc_array_to_temperature(adcValues), expected)
+
+
+def test_calibration_rebuilds_the_table():
+    try:
+        thermistor.calibrate_thermistor(calibrationOffset=0)
+        assert thermistor.adc_to_temperature(400) == pytest.approx(formula_temperature(400, calibrationOffset=0))
+    finally:
+        thermistor.calibrate_thermistor()
+    assert thermistor.adc_to_temperature(400) == pytest.approx(formula_temperature(400))
@@ -11,63 +11,103 @@
 # functions that run the thermistor to detect the temperature
 from pymata4 import pymata4
 import time
-import math
+import numpy as np
+from sensor_filters import EwmaFilter
 
-# A callback function to detect the changes in temperature during the detection time
+thermistorPin = 0 # Analog Pin
+adcResolution = 1024 # 10-bit ADC
+# ADC value of the thermistor divider, filtered as each report arrives so the latest estimate can be read at any time
+adcFilter = EwmaFilter(timeConstant=1.0)
+
+# Builds the calibration table of the thermistor: the temperature for every ADC code, so that a conversion is a
+# single index instead of a division and a logarithm
+# Inputs:
+#     voltageSupply - supply voltage of the thermistor divider, V
+#     fixResistance - fixed resistor of the divider, Ohm
+#     calibrationOffset - offset added to every temperature for calibration, degree celcius
+# Return:
+#     table - NumPy array of adcResolution temperatures in degree celcius, indexed by ADC code. Codes 0 and 1023
+#             (thermistor shorted or open) have no defined temperature and take the value of their neighbour.
+def build_temperature_table(voltageSupply=5, fixResistance=10000, calibrationOffset=2):
+    codes = np.arange(1, adcResolution - 1, dtype=np.float64)
+    vOut = codes*voltageSupply/(adcResolution - 1)
+    rThermistor = fixResistance*vOut/(voltageSupply-vOut)
+    temps = -21.21*np.log(rThermistor/1000) + 72.203 + calibrationOffset
+    return np.concatenate((temps[:1], temps, temps[-1:]))
+
+# ADC code to temperature table of the current calibration
+temperatureTable = build_temperature_table()
+
+# Rebuilds the calibration table, e.g. after the divider or the calibration offset has changed
 # Inputs:
-#     data - [pin_type=12, trigger pin number, distance, timestamp]
+#     voltageSupply, fixResistance, calibrationOffset - see build_temperature_table
+# Return:
+#     None
+def calibrate_thermistor(voltageSupply=5, fixResistance=10000, calibrationOffset=2):
+    global temperatureTable
+    temperatureTable = build_temperature_table(voltageSupply, fixResistance, calibrationOffset)
+
+# Converts an ADC value to a temperature by looking up the nearest ADC code in the calibration table
+# Inputs:
+#     adcValue - ADC value, may be a filtered (fractional) value
+# Return:
+#     temperature, degree celcius
+def adc_to_temperature(adcValue):
+    return float(temperatureTable[min(max(int(adcValue + 0.5), 0), adcResolution - 1)])
+
+# Converts a whole array of raw ADC values to temperatures in one lookup, e.g. for logged readings
+# Inputs:
+#     adcValues - array of ADC values
+# Return:
+#     NumPy array of temperatures, degree celcius
+def adc_array_to_temperature(adcValues):
+    codes = np.clip(np.rint(np.asarray(adcValues, dtype=np.float64)), 0, adcResolution - 1).astype(np.intp)
+    return temperatureTable[codes]
+
+# A callback function that feeds each change in the thermistor ADC value into the ADC filter
+# Inputs:
+#     data - [pin_type=2, analog pin number, ADC value, timestamp]
 # Return:
 #     None
 def the_callback_ther(data): 
-    global thermistorPollData
-    thermistorPollData.append(data[2])
+    adcFilter.update(data[2], data[3])
 
-# Function to detect the temperature in the water tank
+# Function to set up the thermistor pin once: the pin reports continuously to the_callback_ther from then on
 # Inputs:
-#     arduinoBoard - current Arduino board
-#     detectionTime - time for detecting the temperature
+#     board - current Arduino board
 # Return:
-#     finalTemp - temperature in the water tank
-def thermistor_detect(board,detectionTime): 
-    global thermistorPollData  
-    thermistorPin = 0 # Analog Pin
-    thermistorPollData = []
-    tempList = []
-    voltageSupply = 5
-    fixResistance = 10000
+#     None
+def thermistor_setup(board):
+    adcFilter.reset()
     # set up the pin and callback function
     board.set_pin_mode_analog_input(thermistorPin,the_callback_ther)
     time.sleep(0.1)
-    timePass = 0
-    while timePass < detectionTime:
-        # record start time for measuring the polling time
-        startTime = time.time()
-        # voltage passing through the thermistor is detected evert 0.2 seconds
-        time.sleep(0.2) 
-        # check if they is any temperature changes during the sleeptime
-        # if yes using the average value detected from callback function as current voltage passing through the thermistor
-        # if no using the value detected by analog_read
-        if thermistorPollData == []:
-            currentVoltage = board.analog_read(thermistorPin)[0]
-        else:
-            currentVoltage = sum(thermistorPollData)/len(thermistorPollData)
-        # using formula to convert raw data get to temperature
-        vOut = currentVoltage*voltageSupply/1023
-        rThermistor = fixResistance*vOut/(voltageSupply-vOut)
-        temp = round(-21.21*math.log(rThermistor/1000) + 72.203,2)
-        # append temperature get to a temperature list named 'tempList'
-        tempList.append(temp)
-        thermistorPollData = []
-        endTime = time.time()
-        timePass += (endTime-startTime)
-    # all the temperature in the tempList is added up by 2 for calibration
-    tempList = [i+2 for i in tempList]
-    # the final temperature is calculated by taking average of the tempList
-    finalTemp = sum(tempList)/len(tempList)
+
+# Function to detect the temperature in the water tank, read from the ADC filter. The thermistor pin must have
+# been set up with thermistor_setup.
+# Inputs:
+#     arduinoBoard - current Arduino board
+#     detectionTime - optional time for the ADC filter to follow the thermistor before it is read
+# Return:
+#     finalTemp - temperature in the water tank
+def thermistor_detect(board,detectionTime=0): 
+    if detectionTime > 0:
+        time.sleep(detectionTime)
+    # pymata4 only calls back when the value changes, so the value it currently holds is fed in as well, once the
+    # pin has reported
+    heldValue, reportTime = board.analog_read(thermistorPin)
+    if reportTime:
+        adcFilter.update(heldValue)
+    adcValue = adcFilter.estimate()
+    if adcValue is None:
+        adcValue = heldValue
+    # the calibration table already includes the +2 degree calibration offset
+    finalTemp = round(adc_to_temperature(adcValue), 2)
     return finalTemp
 
 if __name__ == "__main__":
     board = pymata4.Pymata4()
+    thermistor_setup(board)
     while True:
         try:
             print("Start detecting.....")
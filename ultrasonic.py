@@ -12,78 +12,71 @@
 
 import time
 from pymata4 import pymata4
+from sensor_filters import AlphaBetaFilter
 
 
 triggerPin = 13
 echoPin = 12
-callbackDistanceList = []
-distance = -1
-finalDistanceList = []
+# distance reported by the sonar, filtered as each report arrives so the latest estimate can be read at any time
+distanceFilter = AlphaBetaFilter()
 
 
 
-# A callback function to detect the changes in water level during the detection time
+# A callback function that feeds each change in water level reported by the sonar into the distance filter
 # Inputs:
 #     data - [pin_type=12, trigger pin number, distance, timestamp]
 # Return:
 #     None
 def the_callback(data):
 
-    try:
-        callbackDistanceList.append(data[2])
-    except KeyboardInterrupt:
-        return
+    distanceFilter.update(data[2], data[3])
 
 
 
-# Function to detect the gap between the ultrasonic sensor and the water level
+# Function to set up the sonar once: the trigger and echo pins report continuously to the_callback from then on
 # Inputs:
 #     arduinoBoard - current Arduino board
-#     detectionTime - time for detecting the water level
 # Return:
-#     gapHeight - gap between the ultrasonic sensor and water level
-def ultrasonic_detect(arduinoBoard, detectionTime):
-
-    global callbackDistanceList
-    global finalDistanceList
-    finalDistanceList = []
+#     None
+def ultrasonic_setup(arduinoBoard):
 
+    distanceFilter.reset()
     # set up the pin and callback function
     arduinoBoard.set_pin_mode_sonar(triggerPin, echoPin, the_callback, timeout = 10000000)
     time.sleep(0.1)
 
-    timePass = 0
-
-    while timePass < detectionTime:
-        startTime = time.time()
-        constantDistanceRead = arduinoBoard.sonar_read(triggerPin)[0]
-        # a instantGapDistance is detected every 0.3 seconds
-        time.sleep(0.3)
-        # check if they is any changes during the sleeptime
-        # if yes using the average value detected from callback function as instant gap between ultrasonic sensor and water level as instantGapDistance
-        # if not using the value detected by sonar_read
-        if callbackDistanceList == []:
-            instantGapDistance = constantDistanceRead
-        else:
-            instantGapDistance = sum(callbackDistanceList)/len(callbackDistanceList)
-        # append instantGapDistance to a finalDistanceList
-        finalDistanceList.append(instantGapDistance)
-        callbackDistanceList = []
-        endTime = time.time()
-        timePass += (endTime-startTime)
-    
-    # all the reading in finalDistanceList is subtracted by 1 to compensate the distance between the lowest point of ultrasonic sensor to the spot where sonar wave is released and detected
-    finalDistanceList = [reading-1 for reading in finalDistanceList]
-
-    # the final gapHeight during the detection time is calcultated by taking the average of finalDistanceList
-    gapHeight = sum(finalDistanceList)/len(finalDistanceList)
+
+
+# Function to detect the gap between the ultrasonic sensor and the water level, read from the distance filter.
+# The sonar must have been set up with ultrasonic_setup.
+# Inputs:
+#     arduinoBoard - current Arduino board
+#     detectionTime - optional time for the distance filter to follow the sonar before it is read
+# Return:
+#     gapHeight - gap between the ultrasonic sensor and water level
+def ultrasonic_detect(arduinoBoard, detectionTime=0):
+
+    if detectionTime > 0:
+        time.sleep(detectionTime)
+
+    # pymata4 only calls back when the distance changes, so the distance it currently holds is fed in as well,
+    # once the sonar has reported
+    heldDistance, reportTime = arduinoBoard.sonar_read(triggerPin)
+    if reportTime:
+        distanceFilter.update(heldDistance)
+    filteredDistance = distanceFilter.estimate()
+    if filteredDistance is None:
+        filteredDistance = heldDistance
+
+    # the filtered distance is subtracted by 1 to compensate the distance between the lowest point of ultrasonic sensor to the spot where sonar wave is released and detected
+    gapHeight = filteredDistance - 1
     return gapHeight
 
 
 
-# test code
 if __name__ == "__main__":
     board = pymata4.Pymata4()
+    ultrasonic_setup(board)
     distanceList = []
     while True:
         try: